@@ -0,0 +1,193 @@
+import numpy as np
+from typing import Callable, Dict, Any, List, Literal, Sequence
+
+from app.core.metrics import (
+    DEFAULT_QUANTILES,
+    _metrics_and_hist,
+    _ruin_metrics,
+    _tail_metrics,
+    batch_stderr,
+    tail_size,
+)
+
+TailMode = Literal["exact", "sketch"]
+
+# progress(years_done, estimate): called as years complete; estimate() returns
+# interim VaR/TVaR and is only worth calling when a report is actually sent
+ProgressFn = Callable[[int, Callable[[], Dict[str, float]]], None]
+
+
+class LossAccumulator:
+    """
+    Running summary of annual losses, fed one chunk of simulated years at a time.
+
+    - "exact" keeps every annual loss (8 bytes per year), reproduces
+      _metrics_and_hist bit for bit and adds batch-means standard errors.
+    - "sketch" keeps only the sum, ruin counts, a histogram on pre-agreed
+      edges (plus counts of years below/above them) and enough of the upper
+      tail to answer the lowest quantile level exactly. The tail is still
+      (1 - min quantile) of the years, e.g. 5% of them for VaR95, so memory
+      is a fraction of exact mode's rather than independent of the years.
+
+    Accumulators with the same settings can be merged, e.g. across shards.
+    """
+
+    def __init__(
+        self,
+        capital: float,
+        n_total: int,
+        mode: TailMode = "exact",
+        bins: int = 60,
+        hist_edges: Sequence[float] | None = None,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+        capital_levels: Sequence[float] | None = None,
+    ):
+        if mode not in ("exact", "sketch"):
+            raise ValueError(f"Unsupported tail mode: {mode}")
+        if mode == "sketch" and hist_edges is None:
+            raise ValueError("Sketch mode needs pre-agreed histogram edges")
+
+        self.capital = float(capital)
+        self.n_total = int(n_total)
+        self.mode = mode
+        self.bins = bins
+        self.quantiles = tuple(quantiles)
+        self.capital_levels = [self.capital, *(capital_levels or [])]
+
+        self.count = 0
+        self.total = 0.0
+        self.ruin_counts = np.zeros(len(self.capital_levels), dtype=np.int64)
+
+        # exact mode
+        self._chunks: List[np.ndarray] = []
+
+        # sketch mode
+        self.hist_edges = None if hist_edges is None else np.asarray(hist_edges, dtype=float)
+        self.hist_counts = None if hist_edges is None else np.zeros(len(hist_edges) - 1, dtype=np.int64)
+        # Years below the first / above the last edge, kept out of the edge bins
+        self.hist_outside = np.zeros(2, dtype=np.int64)
+        self.tail_size = tail_size(self.n_total, self.quantiles)
+        self.tail = np.empty(0)
+
+    def add(self, S: np.ndarray) -> None:
+        self.count += S.size
+        if self.mode == "exact":
+            self._chunks.append(S)
+            return
+
+        self.total += float(S.sum())
+        for i, c in enumerate(self.capital_levels):
+            self.ruin_counts[i] += np.count_nonzero(S > c)
+
+        # np.histogram drops values outside the agreed range; count them apart
+        self.hist_counts += np.histogram(S, bins=self.hist_edges)[0]
+        self.hist_outside[0] += np.count_nonzero(S < self.hist_edges[0])
+        self.hist_outside[1] += np.count_nonzero(S > self.hist_edges[-1])
+
+        self._update_tail(S)
+
+    def merge(self, other: "LossAccumulator") -> None:
+        if self._settings() != other._settings():
+            raise ValueError("Cannot merge accumulators with different settings")
+
+        self.count += other.count
+        if self.mode == "exact":
+            self._chunks.extend(other._chunks)
+            return
+
+        if not np.array_equal(other.hist_edges, self.hist_edges):
+            raise ValueError("Cannot merge accumulators with different histogram edges")
+        self.total += other.total
+        self.ruin_counts += other.ruin_counts
+        self.hist_counts += other.hist_counts
+        self.hist_outside += other.hist_outside
+        self._update_tail(other.tail)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Contents as plain arrays, e.g. to ship a partial result between processes."""
+        if self.mode == "exact":
+            losses = np.concatenate(self._chunks) if self._chunks else np.empty(0)
+            return {"count": np.array(self.count), "losses": losses}
+        return {
+            "count": np.array(self.count),
+            "total": np.array(self.total),
+            "ruin_counts": self.ruin_counts,
+            "hist_counts": self.hist_counts,
+            "hist_outside": self.hist_outside,
+            "tail": self.tail,
+        }
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> "LossAccumulator":
+        """Restore contents written by state() into an accumulator with the same settings."""
+        self.count = int(state["count"])
+        if self.mode == "exact":
+            self._chunks = [np.asarray(state["losses"], dtype=float)]
+            return self
+        self.total = float(state["total"])
+        self.ruin_counts = np.asarray(state["ruin_counts"], dtype=np.int64)
+        self.hist_counts = np.asarray(state["hist_counts"], dtype=np.int64)
+        self.hist_outside = np.asarray(state["hist_outside"], dtype=np.int64)
+        self.tail = np.asarray(state["tail"], dtype=float)
+        return self
+
+    def _settings(self) -> tuple:
+        return (self.mode, self.n_total, self.capital_levels, self.quantiles, self.bins)
+
+    def _update_tail(self, values: np.ndarray) -> None:
+        # Keep the tail_size largest values plus any ties with the smallest kept
+        # one, so TVaR stays exact when the VaR sits on an atom.
+        if self.tail.size >= self.tail_size:
+            values = values[values >= self.tail[0]]
+        if values.size == 0:
+            return
+
+        merged = np.concatenate([self.tail, values])
+        if merged.size > self.tail_size:
+            cutoff = np.partition(merged, merged.size - self.tail_size)[merged.size - self.tail_size]
+            merged = merged[merged >= cutoff]
+        merged.sort()
+        self.tail = merged
+
+    def interim_metrics(self) -> Dict[str, float]:
+        """VaR/TVaR of the years accumulated so far, e.g. for progress reports."""
+        if self.count == 0:
+            return {}
+        tail = np.sort(np.concatenate(self._chunks)) if self.mode == "exact" else self.tail
+        return _tail_metrics(tail, self.count, self.quantiles)
+
+    def sorted_losses(self) -> np.ndarray:
+        """Every accumulated annual loss in ascending order (exact mode only)."""
+        if self.mode != "exact":
+            raise ValueError("Loss vectors are only kept in exact tail mode")
+        return np.sort(np.concatenate(self._chunks))
+
+    def result(self) -> Dict[str, Any]:
+        """Metrics and histogram in the same shape as _metrics_and_hist."""
+        if self.count != self.n_total:
+            raise ValueError(f"Accumulated {self.count} of {self.n_total} years")
+
+        if self.mode == "exact":
+            S = np.concatenate(self._chunks)
+            out = _metrics_and_hist(
+                S,
+                self.capital,
+                bins=self.bins,
+                quantiles=self.quantiles,
+                capital_levels=self.capital_levels[1:],
+            )
+            out["stderr"] = batch_stderr(S, self.capital, self.quantiles)
+            return out
+
+        metrics: Dict[str, Any] = {"mean": self.total / self.count}
+        metrics.update(_tail_metrics(self.tail, self.count, self.quantiles))
+        metrics.update(_ruin_metrics(self.ruin_counts, self.count, self.capital_levels))
+
+        return {
+            "metrics": metrics,
+            "histogram": {
+                "counts": self.hist_counts.tolist(),
+                "bins": self.hist_edges.tolist(),
+                "underflow": int(self.hist_outside[0]),
+                "overflow": int(self.hist_outside[1]),
+            },
+        }
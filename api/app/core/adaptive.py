@@ -0,0 +1,131 @@
+import time
+from typing import Dict, Any, List, Sequence
+
+import numpy as np
+
+from app.core.accumulate import ProgressFn
+from app.core.metrics import (
+    DEFAULT_QUANTILES,
+    _metrics_and_hist,
+    _tail_metrics,
+    batch_stderr,
+    level_label,
+)
+from app.core.reinsurance import ReinsuranceConfig
+from app.core.simulate import iter_annual_losses
+
+# Two-sided normal quantiles for the supported confidence levels
+_Z = {0.9: 1.6449, 0.95: 1.9600, 0.99: 2.5758}
+
+
+def relative_half_widths(
+    result: Dict[str, Any], quantiles: Sequence[float], z: float
+) -> Dict[str, float]:
+    """z * SE / |metric| for every VaR/TVaR level of one result (inf if undefined)."""
+    out = {}
+    for q in quantiles:
+        for prefix in ("VaR", "TVaR"):
+            key = f"{prefix}{level_label(q)}"
+            value = abs(result["metrics"][key])
+            hw = z * result["stderr"].get(key, np.inf)
+            out[key] = float(hw / value) if value > 0 else (0.0 if hw == 0 else np.inf)
+    return out
+
+
+def simulate_gross_net_adaptive(
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    capital: float,
+    reinsurance: ReinsuranceConfig | None = None,
+    seed: int | None = None,
+    tolerance: float = 0.01,
+    confidence: float = 0.95,
+    batch_size: int = 10_000,
+    min_sims: int = 20_000,
+    max_sims: int = 500_000,
+    max_seconds: float | None = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+    stderr_batches: int = 20,
+    loss_sink: Dict[str, np.ndarray] | None = None,
+    progress: ProgressFn | None = None,
+) -> Dict[str, Any]:
+    """
+    simulate_gross_net that picks its own number of years.
+
+    Years are simulated `batch_size` at a time, batch i drawing from
+    SeedSequence(seed).spawn(...)[i] like the shards of the process backend,
+    so a run stopped after n years equals simulate_gross_net_parallel(n,
+    shard_size=batch_size). After each batch (once min_sims is reached) the
+    batch-means confidence interval of every requested VaR/TVaR level, gross
+    and net, is checked; the run stops when all relative half-widths are at
+    most `tolerance`, or when max_sims / max_seconds runs out.
+    """
+    if tolerance <= 0:
+        raise ValueError("tolerance must be positive")
+    if confidence not in _Z:
+        raise ValueError(f"Unsupported confidence level: {confidence} (use one of {sorted(_Z)})")
+    batch_size = max(int(batch_size), 1)
+    max_sims = max(int(max_sims), batch_size)
+    z = _Z[confidence]
+
+    t0 = time.perf_counter()
+    root = np.random.SeedSequence(seed)
+    gross_parts: List[np.ndarray] = []
+    net_parts: List[np.ndarray] = []
+    n_done = 0
+    reason = "max_sims"
+
+    while n_done < max_sims:
+        n_batch = min(batch_size, max_sims - n_done)
+        (seed_seq,) = root.spawn(1)
+        rng = np.random.default_rng(seed_seq)
+        for S_gross, S_net in iter_annual_losses(
+            rng, n_batch, freq_lambda, sev_mu, sev_sigma, reinsurance
+        ):
+            gross_parts.append(S_gross)
+            net_parts.append(S_net)
+        n_done += n_batch
+        if progress is not None:
+            progress(n_done, lambda: _tail_metrics(np.sort(np.concatenate(net_parts)), n_done, quantiles))
+
+        if n_done >= min_sims and n_done < max_sims:
+            # Precision check on everything simulated so far
+            widths = {}
+            for key, parts in (("gross", gross_parts), ("net", net_parts)):
+                S = np.concatenate(parts)
+                check = _metrics_and_hist(S, capital, bins=1, quantiles=quantiles)
+                check["stderr"] = batch_stderr(S, capital, quantiles, n_batches=stderr_batches)
+                widths[key] = relative_half_widths(check, quantiles, z)
+            if all(w <= tolerance for side in widths.values() for w in side.values()):
+                reason = "tolerance"
+                break
+        if max_seconds is not None and time.perf_counter() - t0 >= max_seconds:
+            reason = "max_seconds"
+            break
+
+    out: Dict[str, Any] = {}
+    precision = {}
+    for key, parts in (("gross", gross_parts), ("net", net_parts)):
+        S = np.concatenate(parts)
+        out[key] = _metrics_and_hist(
+            S, capital, quantiles=quantiles, capital_levels=capital_levels
+        )
+        out[key]["stderr"] = batch_stderr(S, capital, quantiles, n_batches=stderr_batches)
+        precision[key] = relative_half_widths(out[key], quantiles, z)
+        if loss_sink is not None:
+            loss_sink[key] = np.sort(S)
+
+    out["reinsurance"] = reinsurance or {"type": "none"}
+    out["convergence"] = {
+        "converged": all(w <= tolerance for side in precision.values() for w in side.values()),
+        "stop_reason": reason,
+        "n_sims": n_done,
+        "batch_size": batch_size,
+        "tolerance": tolerance,
+        "confidence": confidence,
+        "relative_half_width": precision,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+    }
+    return out
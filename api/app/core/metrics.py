@@ -0,0 +1,224 @@
+import math
+import numpy as np
+from typing import Dict, Any, Sequence
+
+from app.core.timing import phase
+
+DEFAULT_QUANTILES = (0.95, 0.99)
+
+
+def level_label(q: float) -> str:
+    """0.99 -> "99", 0.995 -> "99.5" (as in the VaR99 / TVaR99.5 metric keys)."""
+    return f"{q * 100:g}"
+
+
+def _sorted_quantile(sorted_tail: np.ndarray, n: int, q: float) -> float:
+    """
+    Linear-interpolated q-quantile of n values, given only the largest
+    len(sorted_tail) of them in ascending order. Matches np.quantile exactly
+    as long as the tail reaches down to index floor((n - 1) * q).
+    """
+    h = (n - 1) * q
+    lo = math.floor(h)
+    hi = min(lo + 1, n - 1)
+    offset = n - len(sorted_tail)
+    if lo < offset:
+        raise ValueError(f"Tail of {len(sorted_tail)} values is too short for q={q}")
+
+    a = sorted_tail[lo - offset]
+    b = sorted_tail[hi - offset]
+    t = h - lo
+    diff = b - a
+    # Same interpolation as numpy's _lerp
+    if t >= 0.5:
+        return float(b - diff * (1 - t))
+    return float(a + diff * t)
+
+
+def tail_size(n: int, quantiles: Sequence[float]) -> int:
+    """How many of the largest values _tail_metrics needs for these levels."""
+    return n - math.floor((n - 1) * min(quantiles))
+
+
+def _tail_metrics(sorted_tail: np.ndarray, n: int, quantiles: Sequence[float]) -> Dict[str, float]:
+    """VaR and TVaR at every level, from the top of the sorted losses."""
+    if not all(0 < q < 1 for q in quantiles):
+        raise ValueError(f"Quantile levels must be in (0, 1): {list(quantiles)}")
+    var = {q: _sorted_quantile(sorted_tail, n, q) for q in quantiles}
+    tvar = {
+        q: float(sorted_tail[np.searchsorted(sorted_tail, v, side="left"):].mean())
+        for q, v in var.items()
+    }
+    out = {f"VaR{level_label(q)}": v for q, v in var.items()}
+    out.update({f"TVaR{level_label(q)}": v for q, v in tvar.items()})
+    return out
+
+
+def _ruin_metrics(ruin_mass: Sequence[float], n: float, capital_levels: Sequence[float]) -> Dict[str, Any]:
+    """
+    ruinProb at the first (run) capital plus the full list of levels, from the
+    count (or total weight) of years above each level out of n.
+    """
+    probs = [float(c) / float(n) for c in ruin_mass]
+    return {
+        "ruinProb": probs[0],
+        "ruinProbs": [{"capital": float(c), "prob": p} for c, p in zip(capital_levels, probs)],
+    }
+
+
+def _metrics_and_hist(
+    S: np.ndarray,
+    capital: float,
+    bins: int = 60,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+    weights: np.ndarray | None = None,
+) -> Dict[str, Any]:
+    """
+    Risk metrics and histogram of the annual losses S from a single sort.
+
+    Every VaR/TVaR level, the ruin probabilities at `capital` and each of
+    `capital_levels`, and the histogram counts are all read off the same
+    sorted copy with binary searches. With `weights` (importance sampling
+    likelihood ratios) see _weighted_metrics_and_hist.
+    """
+    n = S.size
+    capital_levels = [capital, *(capital_levels or [])]
+    if weights is not None:
+        return _weighted_metrics_and_hist(S, weights, bins, quantiles, capital_levels)
+
+    with phase("sort", items=n):
+        S_sorted = np.sort(S)
+
+    with phase("quantiles", items=n):
+        metrics: Dict[str, Any] = {"mean": float(S.mean())}
+        metrics.update(_tail_metrics(S_sorted, n, quantiles))
+
+        ruin_counts = n - np.searchsorted(S_sorted, capital_levels, side="right")
+        metrics.update(_ruin_metrics(ruin_counts, n, capital_levels))
+
+    # Same edges and bin membership as np.histogram(S, bins=bins)
+    with phase("histogram", items=n):
+        edges = np.histogram_bin_edges(S_sorted[[0, -1]], bins=bins)
+        idx = np.searchsorted(S_sorted, edges, side="left")
+        idx[-1] = n
+        counts = np.diff(idx)
+
+    return {
+        "metrics": metrics,
+        "histogram": {"counts": counts.tolist(), "bins": edges.tolist()},
+    }
+
+
+def _weighted_metrics_and_hist(
+    S: np.ndarray,
+    weights: np.ndarray,
+    bins: int,
+    quantiles: Sequence[float],
+    capital_levels: Sequence[float],
+) -> Dict[str, Any]:
+    """
+    Self-normalized weighted metrics: VaR is the inverse of the weighted
+    empirical CDF, TVaR the weighted mean at or above it, and histogram
+    counts are weighted and rescaled to the number of years.
+    """
+    if not all(0 < q < 1 for q in quantiles):
+        raise ValueError(f"Quantile levels must be in (0, 1): {list(quantiles)}")
+
+    n = S.size
+    order = np.argsort(S, kind="stable")
+    S_sorted = S[order]
+    w_sorted = weights[order]
+    cum_w = np.concatenate([[0.0], np.cumsum(w_sorted)])
+    W = cum_w[-1]
+
+    metrics: Dict[str, Any] = {"mean": float(np.dot(w_sorted, S_sorted) / W)}
+
+    var = {}
+    for q in quantiles:
+        k = min(int(np.searchsorted(cum_w[1:], q * W, side="left")), n - 1)
+        var[q] = float(S_sorted[k])
+    tvar = {}
+    for q, v in var.items():
+        i = int(np.searchsorted(S_sorted, v, side="left"))
+        tvar[q] = float(np.dot(w_sorted[i:], S_sorted[i:]) / (W - cum_w[i]))
+    metrics.update({f"VaR{level_label(q)}": v for q, v in var.items()})
+    metrics.update({f"TVaR{level_label(q)}": v for q, v in tvar.items()})
+
+    above = np.searchsorted(S_sorted, capital_levels, side="right")
+    metrics.update(_ruin_metrics(W - cum_w[above], W, capital_levels))
+
+    edges = np.histogram_bin_edges(S_sorted[[0, -1]], bins=bins)
+    idx = np.searchsorted(S_sorted, edges, side="left")
+    idx[-1] = n
+    counts = np.diff(cum_w[idx]) * (n / W)
+
+    return {
+        "metrics": metrics,
+        "histogram": {"counts": counts.tolist(), "bins": edges.tolist()},
+    }
+
+
+def batch_stderr(
+    S: np.ndarray,
+    capital: float,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    weights: np.ndarray | None = None,
+    n_batches: int = 20,
+    block: int = 1,
+) -> Dict[str, float]:
+    """
+    Batch-means standard error of mean, VaR, TVaR and ruinProb: the years are
+    cut into n_batches contiguous batches (on multiples of `block`, e.g. 2 to
+    keep antithetic pairs together) and SE = sd(batch metric) / sqrt(n_batches).
+    """
+    n_blocks = S.size // block
+    n_batches = min(n_batches, n_blocks)
+    if n_batches < 2:
+        return {}
+
+    bounds = np.linspace(0, n_blocks, n_batches + 1).astype(int) * block
+    bounds[-1] = S.size
+
+    per_batch: Dict[str, list] = {}
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        w = None if weights is None else weights[lo:hi]
+        m = _metrics_and_hist(S[lo:hi], capital, bins=1, quantiles=quantiles, weights=w)["metrics"]
+        for key, value in m.items():
+            if isinstance(value, float):
+                per_batch.setdefault(key, []).append(value)
+
+    return {
+        key: float(np.std(values, ddof=1) / np.sqrt(n_batches))
+        for key, values in per_batch.items()
+    }
+
+
+def query_sorted_losses(
+    S_sorted: np.ndarray,
+    prefix_sum: np.ndarray,
+    quantiles: Sequence[float] = (),
+    capital_levels: Sequence[float] = (),
+) -> Dict[str, Any]:
+    """
+    VaR/TVaR at any level and ruin probabilities at any capital from a
+    persisted sorted loss vector and its prefix sums (prefix_sum[i] = sum of
+    the i smallest losses). Each answer touches O(log n) elements, so both
+    arrays can be memory-mapped.
+    """
+    n = S_sorted.size
+    out: Dict[str, Any] = {"n_sims": n}
+    if quantiles:
+        if not all(0 < q < 1 for q in quantiles):
+            raise ValueError(f"Quantile levels must be in (0, 1): {list(quantiles)}")
+        for q in quantiles:
+            var = _sorted_quantile(S_sorted, n, q)
+            i = int(np.searchsorted(S_sorted, var, side="left"))
+            out[f"VaR{level_label(q)}"] = var
+            out[f"TVaR{level_label(q)}"] = float((prefix_sum[n] - prefix_sum[i]) / (n - i))
+    if capital_levels:
+        above = n - np.searchsorted(S_sorted, capital_levels, side="right")
+        out["ruinProbs"] = [
+            {"capital": float(c), "prob": float(k) / n} for c, k in zip(capital_levels, above)
+        ]
+    return out
@@ -0,0 +1,314 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+from app.core.accumulate import LossAccumulator, ProgressFn, TailMode
+from app.core.metrics import DEFAULT_QUANTILES
+from app.core.reinsurance import ReinsuranceConfig
+from app.core.timing import collect_phases, record_phases, timing_enabled
+from app.core.simulate import (
+    DEFAULT_PRECISION_TOLERANCE,
+    _accumulator_kwargs,
+    accumulate_gross_net,
+    batch_result,
+    collect_losses,
+    select_dtype,
+)
+
+# Years per shard. Shards (not workers) own the random streams, so this must
+# stay fixed for a given seed to reproduce a run.
+DEFAULT_SHARD_SIZE = 10_000
+
+
+def shard_bounds(n_sims: int, shard_size: int) -> List[Tuple[int, int]]:
+    """(start, stop) year ranges of each shard, in order."""
+    return [(start, min(start + shard_size, n_sims)) for start in range(0, n_sims, shard_size)]
+
+
+def _simulate_shard(args: Tuple) -> Tuple[LossAccumulator, List[LossAccumulator], Dict | None]:
+    (seed_seq, n_years, n_total, freq_lambda, sev_mu, sev_sigma, capital,
+     treaties, chunk_size, acc_kwargs, dtype, timed) = args
+
+    rng = np.random.default_rng(seed_seq)
+    # Phase timings do not cross process boundaries; send them back with the shard
+    with collect_phases(timed) as timer:
+        gross_acc, net_accs = accumulate_gross_net(
+            rng, n_years, n_total, freq_lambda, sev_mu, sev_sigma, capital,
+            treaties, chunk_size, acc_kwargs, dtype=dtype,
+        )
+    return gross_acc, net_accs, timer.phases if timer is not None else None
+
+
+def _run_shards(
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    capital: float,
+    treaties: List[ReinsuranceConfig | None],
+    seed: int | None,
+    workers: int | None,
+    shard_size: int,
+    chunk_size: int | None,
+    acc_kwargs: Dict[str, Any],
+    progress: ProgressFn | None = None,
+    dtype: DTypeLike = np.float64,
+    shards: range | None = None,
+) -> Tuple[LossAccumulator, List[LossAccumulator]]:
+    """Simulate every shard of the run (or only `shards`) and merge them in order."""
+    workers = workers or os.cpu_count() or 1
+
+    bounds = shard_bounds(n_sims, max(int(shard_size), 1))
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(bounds))
+    if shards is None:
+        shards = range(len(bounds))
+    if len(shards) == 0:
+        return (
+            LossAccumulator(capital, n_sims, **acc_kwargs),
+            [LossAccumulator(capital, n_sims, **acc_kwargs) for _ in treaties],
+        )
+    tasks = [
+        (seed_seqs[i], bounds[i][1] - bounds[i][0], n_sims, freq_lambda, sev_mu, sev_sigma,
+         capital, treaties, chunk_size, acc_kwargs, dtype, timing_enabled())
+        for i in shards
+    ]
+
+    def merged(shards) -> Tuple[LossAccumulator, List[LossAccumulator]]:
+        # Merge in shard order as results arrive, reporting progress as we go
+        gross_acc = net_accs = None
+        for g, nets, phases in shards:
+            record_phases(phases)
+            if gross_acc is None:
+                gross_acc, net_accs = g, nets
+            else:
+                gross_acc.merge(g)
+                for acc, other in zip(net_accs, nets):
+                    acc.merge(other)
+            if progress is not None:
+                progress(gross_acc.count, net_accs[0].interim_metrics)
+        return gross_acc, net_accs
+
+    if workers == 1 or len(tasks) == 1:
+        gross_acc, net_accs = merged(_simulate_shard(t) for t in tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            gross_acc, net_accs = merged(pool.map(_simulate_shard, tasks))
+    return gross_acc, net_accs
+
+
+def simulate_gross_net_parallel(
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    capital: float,
+    reinsurance: ReinsuranceConfig | None = None,
+    seed: int | None = None,
+    workers: int | None = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    chunk_size: int | None = None,
+    tail_mode: TailMode = "exact",
+    hist_edges: Sequence[float] | None = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+    loss_sink: Dict[str, np.ndarray] | None = None,
+    progress: ProgressFn | None = None,
+    dtype: DTypeLike = np.float64,
+    precision_tolerance: float = DEFAULT_PRECISION_TOLERANCE,
+) -> Dict[str, Any]:
+    """
+    simulate_gross_net split across a process pool.
+
+    The years are cut into fixed-size shards, shard i drawing from
+    SeedSequence(seed).spawn(...)[i]. Shard results are merged in shard order,
+    so the output depends on seed and shard_size but not on the worker count.
+    """
+    dtype, precision = select_dtype(
+        dtype, precision_tolerance, n_sims, freq_lambda, sev_mu, sev_sigma,
+        [reinsurance], quantiles, seed,
+    )
+    acc_kwargs = _accumulator_kwargs(
+        freq_lambda, sev_mu, sev_sigma, tail_mode, hist_edges, quantiles, capital_levels
+    )
+    gross_acc, (net_acc,) = _run_shards(
+        n_sims, freq_lambda, sev_mu, sev_sigma, capital, [reinsurance],
+        seed, workers, shard_size, chunk_size, acc_kwargs, progress, dtype,
+    )
+    collect_losses(loss_sink, gross_acc, [net_acc])
+    out = {
+        "gross": gross_acc.result(),
+        "net": net_acc.result(),
+        "reinsurance": reinsurance or {"type": "none"},
+    }
+    if precision is not None:
+        out["precision"] = precision
+    return out
+
+
+def simulate_gross_net_batch_parallel(
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    capital: float,
+    treaties: List[ReinsuranceConfig | None],
+    seed: int | None = None,
+    workers: int | None = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    chunk_size: int | None = None,
+    tail_mode: TailMode = "exact",
+    hist_edges: Sequence[float] | None = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+    loss_sink: Dict[str, np.ndarray] | None = None,
+    progress: ProgressFn | None = None,
+    dtype: DTypeLike = np.float64,
+    precision_tolerance: float = DEFAULT_PRECISION_TOLERANCE,
+) -> Dict[str, Any]:
+    """simulate_gross_net_batch on the sharded process-pool backend."""
+    if not treaties:
+        raise ValueError("Batch run needs at least one reinsurance config")
+
+    dtype, precision = select_dtype(
+        dtype, precision_tolerance, n_sims, freq_lambda, sev_mu, sev_sigma,
+        treaties, quantiles, seed,
+    )
+    acc_kwargs = _accumulator_kwargs(
+        freq_lambda, sev_mu, sev_sigma, tail_mode, hist_edges, quantiles, capital_levels
+    )
+    gross_acc, net_accs = _run_shards(
+        n_sims, freq_lambda, sev_mu, sev_sigma, capital, treaties,
+        seed, workers, shard_size, chunk_size, acc_kwargs, progress, dtype,
+    )
+    collect_losses(loss_sink, gross_acc, net_accs, batch=True)
+    return batch_result(gross_acc, net_accs, treaties, precision)
+
+
+def task_shards(n_sims: int, shard_size: int, task_index: int, task_count: int) -> range:
+    """The contiguous run of shards that task `task_index` of `task_count` simulates."""
+    if not 0 <= task_index < task_count:
+        raise ValueError(f"Task index {task_index} out of range for {task_count} tasks")
+    n_shards = len(shard_bounds(n_sims, max(int(shard_size), 1)))
+    return range(n_shards * task_index // task_count, n_shards * (task_index + 1) // task_count)
+
+
+def task_precision(
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    treaties: List[ReinsuranceConfig | None],
+    seed: int | None = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    dtype: DTypeLike = np.float64,
+    precision_tolerance: float = DEFAULT_PRECISION_TOLERANCE,
+) -> Dict[str, Any] | None:
+    """
+    The select_dtype() report for a sharded run, or None for float64. Every
+    task and the reduce must use the same dtype, so the float32 check runs
+    once per run (at dispatch) rather than in each of them.
+    """
+    _, precision = select_dtype(
+        dtype, precision_tolerance, n_sims, freq_lambda, sev_mu, sev_sigma,
+        treaties, quantiles, seed,
+    )
+    return precision
+
+
+def simulate_task(
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    capital: float,
+    treaties: List[ReinsuranceConfig | None],
+    task_index: int,
+    task_count: int,
+    seed: int | None = None,
+    workers: int | None = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    chunk_size: int | None = None,
+    tail_mode: TailMode = "exact",
+    hist_edges: Sequence[float] | None = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+    progress: ProgressFn | None = None,
+    precision: Dict[str, Any] | None = None,
+) -> Dict[str, np.ndarray]:
+    """
+    One task's share of a run split over `task_count` independent processes
+    (e.g. Cloud Run Job tasks): the task_shards() slice of the shards, as a
+    mergeable partial of plain arrays ({"gross/...", "net/<i>/..."}
+    accumulator states). reduce_tasks() combines the partials of every task.
+
+    `precision` is the run's select_dtype() report, resolved once for all
+    tasks (task_precision()); None simulates in float64.
+    """
+    dtype = np.dtype(precision["dtype"] if precision else np.float64)
+    acc_kwargs = _accumulator_kwargs(
+        freq_lambda, sev_mu, sev_sigma, tail_mode, hist_edges, quantiles, capital_levels
+    )
+    gross_acc, net_accs = _run_shards(
+        n_sims, freq_lambda, sev_mu, sev_sigma, capital, treaties,
+        seed, workers, shard_size, chunk_size, acc_kwargs, progress, dtype,
+        shards=task_shards(n_sims, shard_size, task_index, task_count),
+    )
+    partial = {f"gross/{k}": v for k, v in gross_acc.state().items()}
+    for i, acc in enumerate(net_accs):
+        partial.update({f"net/{i}/{k}": v for k, v in acc.state().items()})
+    return partial
+
+
+def reduce_tasks(
+    partials: List[Dict[str, np.ndarray]],
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    capital: float,
+    treaties: List[ReinsuranceConfig | None],
+    batch: bool = False,
+    seed: int | None = None,
+    tail_mode: TailMode = "exact",
+    hist_edges: Sequence[float] | None = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+    loss_sink: Dict[str, np.ndarray] | None = None,
+    precision: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """
+    Results of a run from the simulate_task() partials of all its tasks, in
+    task order. Partials hold whole shards merged in shard order, so in exact
+    tail mode this is identical to the *_parallel functions with the same
+    seed and shard_size. `precision`, the report the tasks simulated with,
+    is attached to the results.
+    """
+    acc_kwargs = _accumulator_kwargs(
+        freq_lambda, sev_mu, sev_sigma, tail_mode, hist_edges, quantiles, capital_levels
+    )
+
+    def restore(partial: Dict[str, np.ndarray], prefix: str) -> LossAccumulator:
+        state = {k[len(prefix):]: v for k, v in partial.items() if k.startswith(prefix)}
+        return LossAccumulator(capital, n_sims, **acc_kwargs).load_state(state)
+
+    gross_acc = LossAccumulator(capital, n_sims, **acc_kwargs)
+    net_accs = [LossAccumulator(capital, n_sims, **acc_kwargs) for _ in treaties]
+    for partial in partials:
+        gross_acc.merge(restore(partial, "gross/"))
+        for i, acc in enumerate(net_accs):
+            acc.merge(restore(partial, f"net/{i}/"))
+
+    collect_losses(loss_sink, gross_acc, net_accs, batch=batch)
+    if batch:
+        return batch_result(gross_acc, net_accs, treaties, precision)
+    out = {
+        "gross": gross_acc.result(),
+        "net": net_accs[0].result(),
+        "reinsurance": treaties[0] or {"type": "none"},
+    }
+    if precision is not None:
+        out["precision"] = precision
+    return out
@@ -0,0 +1,281 @@
+import numpy as np
+from typing import Any, Dict, List, Literal, Sequence, TypedDict
+
+from app.core.accumulate import LossAccumulator, ProgressFn, TailMode
+from app.core.metrics import DEFAULT_QUANTILES, _sorted_quantile, level_label, tail_size
+from app.core.reinsurance import (
+    apply_annual_terms,
+    apply_reinsurance_to_severities,
+    ReinsuranceConfig,
+)
+from app.core.sampling import poisson_cdf_table, poisson_from_table
+from app.core.simulate import aggregate_claims, default_hist_edges
+from app.core.timing import phase
+
+CopulaKind = Literal["gaussian", "t"]
+
+# Years per chunk unless the caller picks one: keeps the (years x lines)
+# buffers and the claims of one chunk to a few tens of MB for 50 lines
+DEFAULT_PORTFOLIO_CHUNK = 10_000
+
+
+class LineConfig(TypedDict, total=False):
+    name: str
+    freq_lambda: float
+    sev_mu: float
+    sev_sigma: float
+    reinsurance: ReinsuranceConfig | None
+
+
+def correlation_matrix(correlation: float | Sequence[Sequence[float]] | None, n_lines: int) -> np.ndarray:
+    """
+    Line-by-line correlation of the copula: None (independent lines), one
+    number (the same correlation between every pair) or a full matrix.
+    """
+    if correlation is None:
+        return np.eye(n_lines)
+    if np.isscalar(correlation):
+        rho = float(correlation)
+        corr = np.full((n_lines, n_lines), rho)
+        np.fill_diagonal(corr, 1.0)
+    else:
+        corr = np.asarray(correlation, dtype=float)
+        if corr.shape != (n_lines, n_lines):
+            raise ValueError(f"Correlation matrix must be {n_lines}x{n_lines}, got {corr.shape}")
+        if not np.allclose(corr, corr.T) or not np.allclose(np.diag(corr), 1.0):
+            raise ValueError("Correlation matrix must be symmetric with a unit diagonal")
+    if np.any(np.abs(corr) > 1):
+        raise ValueError("Correlations must be in [-1, 1]")
+    return corr
+
+
+def _copula_uniforms(
+    normal_rng: np.random.Generator,
+    chi2_rng: np.random.Generator,
+    n_years: int,
+    chol: np.ndarray,
+    copula: CopulaKind,
+    df: float,
+) -> np.ndarray:
+    """(n_years x lines) uniforms with the copula's dependence between lines."""
+    from scipy.stats import norm, t as student_t
+
+    Z = normal_rng.standard_normal((n_years, chol.shape[0])) @ chol.T
+    if copula == "gaussian":
+        return norm.cdf(Z)
+    # t copula: one chi-square mixing variable per year scales every line
+    W = np.sqrt(chi2_rng.chisquare(df, n_years) / df)
+    return student_t.cdf(Z / W[:, None], df)
+
+
+class _TailRows:
+    """
+    The `size` largest portfolio losses (plus ties with the smallest kept one)
+    together with every line's loss in the same year, for allocating the
+    portfolio's VaR/TVaR to lines.
+    """
+
+    def __init__(self, size: int, n_lines: int):
+        self.size = size
+        self.S = np.empty(0)
+        self.X = np.empty((0, n_lines))
+
+    def add(self, S: np.ndarray, X: np.ndarray) -> None:
+        if self.S.size >= self.size:
+            keep = S >= self.S[0]
+            S, X = S[keep], X[keep]
+        if S.size == 0:
+            return
+
+        S = np.concatenate([self.S, S])
+        X = np.concatenate([self.X, X])
+        if S.size > self.size:
+            cutoff = np.partition(S, S.size - self.size)[S.size - self.size]
+            keep = S >= cutoff
+            S, X = S[keep], X[keep]
+        order = np.argsort(S, kind="stable")
+        self.S, self.X = S[order], X[order]
+
+    def contributions(self, n: int, quantiles: Sequence[float], window: int) -> Dict[str, List[float]]:
+        """
+        Euler allocations per line: VaR as E[X_j | S near VaR] over the
+        2 * window + 1 years ranked around the VaR (rescaled to add up to
+        it), TVaR as E[X_j | S >= VaR], which adds up exactly.
+        """
+        offset = n - self.S.size
+        out: Dict[str, List[float]] = {}
+        for q in quantiles:
+            var = _sorted_quantile(self.S, n, q)
+            rank = int(np.floor((n - 1) * q)) - offset
+            near = self.X[max(rank - window, 0) : rank + window + 1].mean(axis=0)
+            total = near.sum()
+            out[f"VaR{level_label(q)}"] = (near * (var / total) if total > 0 else near).tolist()
+
+            i = int(np.searchsorted(self.S, var, side="left"))
+            out[f"TVaR{level_label(q)}"] = self.X[i:].mean(axis=0).tolist()
+        return out
+
+
+def _portfolio_hist_edges(
+    lambdas: np.ndarray, mus: np.ndarray, sigmas: np.ndarray, bins: int = 60
+) -> np.ndarray:
+    """
+    default_hist_edges for the sum of the lines: the sum of the lines'
+    standard deviations bounds sd(S) whatever the dependence between them.
+    """
+    mean_S = lambdas * np.exp(mus + 0.5 * sigmas**2)
+    sd_S = np.sqrt(lambdas * np.exp(2 * mus + 2 * sigmas**2))
+    return np.linspace(0.0, mean_S.sum() + 10 * sd_S.sum(), bins + 1)
+
+
+def simulate_portfolio(
+    n_sims: int,
+    lines: List[LineConfig],
+    capital: float,
+    correlation: float | Sequence[Sequence[float]] | None = None,
+    copula: CopulaKind = "gaussian",
+    df: float = 4.0,
+    seed: int | None = None,
+    chunk_size: int | None = None,
+    tail_mode: TailMode = "exact",
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+    contribution_window: float = 0.001,
+    loss_sink: Dict[str, np.ndarray] | None = None,
+    progress: ProgressFn | None = None,
+) -> Dict[str, Any]:
+    """
+    Gross and net annual losses of a multi-line portfolio with dependent
+    claim counts.
+
+    Each line has its own Poisson frequency, lognormal severity and
+    reinsurance. Claim counts are coupled through a Gaussian or t copula
+    (`df` degrees of freedom) with the given line correlation, and every
+    chunk of years is simulated as one (years x lines) array: claims are laid
+    out line by line so each line's reinsurance runs over a contiguous slice,
+    and all lines are aggregated in a single pass. Severities come from one
+    random stream per line, consumed in order, so the draws do not depend on
+    chunk_size.
+
+    Returns portfolio metrics (plus the diversification benefit against the
+    sum of standalone VaRs), per-line metrics and each line's Euler
+    contribution to the portfolio VaR/TVaR. Buffers are bounded by
+    `chunk_size`; "sketch" tail mode also drops the annual loss vectors.
+    """
+    if not lines:
+        raise ValueError("Portfolio run needs at least one line")
+    if copula not in ("gaussian", "t"):
+        raise ValueError(f"Unsupported copula: {copula}")
+    if copula == "t" and df <= 0:
+        raise ValueError("t copula needs positive degrees of freedom")
+
+    n_lines = len(lines)
+    corr = correlation_matrix(correlation, n_lines)
+    try:
+        chol = np.linalg.cholesky(corr)
+    except np.linalg.LinAlgError:
+        raise ValueError("Correlation matrix must be positive definite")
+
+    lambdas = np.array([float(line["freq_lambda"]) for line in lines])
+    mus = np.array([float(line["sev_mu"]) for line in lines])
+    sigmas = np.array([float(line["sev_sigma"]) for line in lines])
+    cdf_tables = [poisson_cdf_table(lam) for lam in lambdas]
+    treaties = [line.get("reinsurance") for line in lines]
+    names = [line.get("name") or f"line_{j}" for j, line in enumerate(lines)]
+
+    # Independent streams for the copula normals, the t mixing variable and
+    # each line's severities
+    streams = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2 + n_lines)]
+    normal_rng, chi2_rng, sev_rngs = streams[0], streams[1], streams[2:]
+
+    def accumulator(edges: np.ndarray | None) -> LossAccumulator:
+        return LossAccumulator(
+            capital, n_sims, mode=tail_mode, hist_edges=edges,
+            quantiles=quantiles, capital_levels=capital_levels,
+        )
+
+    sketch = tail_mode == "sketch"
+    line_edges = [
+        default_hist_edges(lam, mu, sigma) if sketch else None
+        for lam, mu, sigma in zip(lambdas, mus, sigmas)
+    ]
+    port_edges = _portfolio_hist_edges(lambdas, mus, sigmas) if sketch else None
+    port_accs = {key: accumulator(port_edges) for key in ("gross", "net")}
+    line_accs = {key: [accumulator(e) for e in line_edges] for key in ("gross", "net")}
+
+    window = max(int(contribution_window * n_sims), 1)
+    tails = {key: _TailRows(tail_size(n_sims, quantiles) + window, n_lines) for key in ("gross", "net")}
+
+    chunk_size = DEFAULT_PORTFOLIO_CHUNK if chunk_size is None else max(int(chunk_size), 1)
+    for start in range(0, n_sims, chunk_size):
+        n_years = min(chunk_size, n_sims - start)
+
+        # 1) Correlated claim counts per (year, line)
+        with phase("copula", items=n_years * n_lines):
+            U = _copula_uniforms(normal_rng, chi2_rng, n_years, chol, copula, df)
+        with phase("poisson", items=n_years * n_lines):
+            N = np.column_stack(
+                [poisson_from_table(U[:, j], cdf) for j, cdf in enumerate(cdf_tables)]
+            )
+
+        # 2) Severities, line by line: line j's claims fill one contiguous slice
+        per_line = N.sum(axis=0)
+        bounds = np.concatenate([[0], np.cumsum(per_line)])
+        n_claims = int(bounds[-1])
+        with phase("lognormal", items=n_claims):
+            z = np.concatenate([rng.standard_normal(int(k)) for rng, k in zip(sev_rngs, per_line)])
+            gross_sev = np.exp(np.repeat(mus, per_line) + np.repeat(sigmas, per_line) * z)
+
+        # 3) Each line's reinsurance on its own slice
+        net_sev = gross_sev.copy()
+        for j, treaty in enumerate(treaties):
+            part = net_sev[bounds[j] : bounds[j + 1]]
+            apply_reinsurance_to_severities(part, treaty, out=part)
+
+        # 4) Aggregate every (line, year) at once, then each line's annual terms
+        with phase("aggregate", items=n_claims):
+            G, Nt = aggregate_claims(N.T.ravel(), gross_sev, net_sev)
+        G = G.reshape(n_lines, n_years)
+        Nt = Nt.reshape(n_lines, n_years)
+        for j, treaty in enumerate(treaties):
+            apply_annual_terms(G[j], Nt[j], treaty)
+
+        for key, X in (("gross", G), ("net", Nt)):
+            S = X.sum(axis=0)
+            port_accs[key].add(S)
+            tails[key].add(S, X.T)
+            for acc, S_line in zip(line_accs[key], X):
+                acc.add(S_line)
+        if progress is not None:
+            progress(port_accs["net"].count, port_accs["net"].interim_metrics)
+
+    if loss_sink is not None:
+        for key in ("gross", "net"):
+            loss_sink[f"portfolio/{key}"] = port_accs[key].sorted_losses()
+            for j, acc in enumerate(line_accs[key]):
+                loss_sink[f"lines/{j}/{key}"] = acc.sorted_losses()
+
+    portfolio: Dict[str, Any] = {key: acc.result() for key, acc in port_accs.items()}
+    line_results = [
+        {"name": name, "reinsurance": treaty or {"type": "none"}}
+        for name, treaty in zip(names, treaties)
+    ]
+    diversification: Dict[str, Dict[str, float]] = {}
+    for key in ("gross", "net"):
+        contrib = tails[key].contributions(n_sims, quantiles, window)
+        for j, entry in enumerate(line_results):
+            entry[key] = line_accs[key][j].result()
+            entry.setdefault("contributions", {})[key] = {m: v[j] for m, v in contrib.items()}
+
+        # Sum of standalone VaRs less the portfolio VaR
+        diversification[key] = {}
+        for q in quantiles:
+            label = f"VaR{level_label(q)}"
+            standalone = sum(entry[key]["metrics"][label] for entry in line_results)
+            diversification[key][label] = standalone - portfolio[key]["metrics"][label]
+    portfolio["diversification_benefit"] = diversification
+
+    dependence: Dict[str, Any] = {"copula": copula, "correlation": corr.tolist()}
+    if copula == "t":
+        dependence["df"] = df
+    return {"portfolio": portfolio, "lines": line_results, "dependence": dependence}
@@ -1,25 +1,186 @@
 import numpy as np
-from typing import TypedDict, Literal
+from typing import List, TypedDict, Literal
+
+from app.core.timing import phase
+
+# Claims are processed in cache-sized blocks through fixed scratch buffers, so
+# the memory overhead of a program does not grow with its number of treaties.
+_BLOCK = 1 << 15
+
+
+class XolLayer(TypedDict):
+    retention: float
+    limit: float
+
+
+class RiskProfile(TypedDict, total=False):
+    # Sums insured of the portfolio's risk bands and the share of claims
+    # coming from each band (equal when omitted)
+    sum_insured: List[float]
+    weights: List[float]
+
+
+class TreatyConfig(TypedDict, total=False):
+    type: Literal["xol", "quota_share", "surplus"]
+    # xol: a single layer (retention/limit) or a tower of `layers` on the same loss
+    retention: float
+    limit: float
+    layers: List[XolLayer]
+    # quota_share: share of each loss ceded
+    cession: float
+    # surplus: retained line (`retention`), number of lines and the risk profile
+    lines: float
+    risk_profile: RiskProfile
+
 
 class ReinsuranceConfig(TypedDict, total=False):
-    type: Literal["none", "xol"]
+    type: Literal["none", "xol", "program"]
     retention: float
     limit: float
+    # program: per-loss treaties applied in order, each to the loss retained
+    # by the previous ones, then annual aggregate terms on the total recovery
+    treaties: List[TreatyConfig]
+    aggregate_deductible: float
+    aggregate_limit: float
+
+
+def _xol_block(x: np.ndarray, tmp: np.ndarray, r: float, L: float) -> None:
+    # x <- min(x, r) + max(x - (r + L), 0), in place
+    np.subtract(x, r + L, out=tmp)
+    np.maximum(tmp, 0.0, out=tmp)
+    np.minimum(x, r, out=x)
+    x += tmp
+
+
+def _tower_block(x: np.ndarray, tmp: np.ndarray, ceded: np.ndarray, layers: List[tuple]) -> None:
+    # Every layer attaches to the same loss: x <- x - sum(clip(x - r_i, 0, L_i))
+    ceded.fill(0.0)
+    for r, L in layers:
+        np.subtract(x, r, out=tmp)
+        np.clip(tmp, 0.0, L, out=tmp)
+        ceded += tmp
+    x -= ceded
+
+
+def _quota_share_retained(treaty: TreatyConfig) -> float:
+    cession = min(max(float(treaty.get("cession", 0.0)), 0.0), 1.0)
+    return 1.0 - cession
+
+
+def _surplus_table(treaty: TreatyConfig) -> tuple:
+    """
+    Surplus on a risk profile as (sorted sums insured, retained share of a
+    loss by band). A risk of sum insured SI retains
+    1 - min(max(SI - line, 0), lines * line) / SI of each of its losses; a
+    loss x can only come from a risk with SI >= x, so it keeps the
+    claim-weighted share of those bands (the largest band's beyond it).
+    Which risk a claim hits is not simulated: its expectation given the loss
+    is used instead.
+    """
+    if "sum_insured" in treaty:
+        raise ValueError(
+            "Surplus treaty needs a per-risk risk_profile; on one uniform "
+            "sum_insured it is a quota share"
+        )
+    profile = treaty.get("risk_profile") or {}
+    si = np.asarray(profile.get("sum_insured") or [], dtype=float)
+    if si.size == 0 or np.any(si <= 0):
+        raise ValueError("Surplus risk_profile needs positive sum_insured values")
+    weights = profile.get("weights")
+    w = np.ones_like(si) if weights is None else np.asarray(weights, dtype=float)
+    if w.shape != si.shape or np.any(w < 0) or w.sum() <= 0:
+        raise ValueError("Surplus risk_profile weights must be non-negative, one per sum_insured")
 
-def apply_xol_per_loss(sev: np.ndarray, retention: float, limit: float) -> np.ndarray:
+    line = max(float(treaty.get("retention", 0.0)), 0.0)
+    lines = max(float(treaty.get("lines", 0.0)), 0.0)
+    order = np.argsort(si)
+    si, w = si[order], w[order]
+    retained = 1.0 - np.minimum(np.maximum(si - line, 0.0), lines * line) / si
+
+    # Claim-weighted retained share over the bands with SI >= SI_k
+    num = np.cumsum((w * retained)[::-1])[::-1]
+    den = np.cumsum(w[::-1])[::-1]
+    share = np.divide(num, den, out=np.ones_like(num), where=den > 0)
+    return si, share
+
+
+def _compile_treaties(treaties: List[TreatyConfig]) -> List[tuple]:
+    """Validate a program once and turn it into (kind, params) steps."""
+    steps = []
+    for treaty in treaties:
+        kind = treaty.get("type")
+        if kind == "quota_share":
+            steps.append(("scale", _quota_share_retained(treaty)))
+        elif kind == "surplus":
+            steps.append(("surplus", _surplus_table(treaty)))
+        elif kind == "xol":
+            layers = treaty.get("layers") or [treaty]
+            layers = [
+                (max(float(l.get("retention", 0.0)), 0.0), max(float(l.get("limit", 0.0)), 0.0))
+                for l in layers
+            ]
+            if len(layers) == 1:
+                steps.append(("xol", layers[0]))
+            else:
+                steps.append(("tower", layers))
+        else:
+            raise ValueError(f"Unsupported treaty type: {kind}")
+    return steps
+
+
+def _apply_steps(sev: np.ndarray, steps: List[tuple], out: np.ndarray | None) -> np.ndarray:
+    with phase("reinsurance", items=sev.size):
+        return _apply_steps_blocked(sev, steps, out)
+
+
+def _apply_steps_blocked(sev: np.ndarray, steps: List[tuple], out: np.ndarray | None) -> np.ndarray:
+    out = np.copy(sev) if out is None else out
+    if out is not sev:
+        np.copyto(out, sev)
+
+    n = out.size
+    tmp = np.empty(min(n, _BLOCK), dtype=out.dtype)
+    ceded = np.empty_like(tmp) if any(kind == "tower" for kind, _ in steps) else None
+
+    # One fused pass: every treaty is applied to a block while it is in cache
+    for start in range(0, n, _BLOCK):
+        x = out[start : start + _BLOCK]
+        t = tmp[: x.size]
+        for kind, params in steps:
+            if kind == "scale":
+                x *= params
+            elif kind == "xol":
+                _xol_block(x, t, *params)
+            elif kind == "surplus":
+                si, share = params
+                x *= share[np.minimum(np.searchsorted(si, x), si.size - 1)]
+            else:
+                _tower_block(x, t, ceded[: x.size], params)
+    return out
+
+
+def apply_xol_per_loss(
+    sev: np.ndarray,
+    retention: float,
+    limit: float,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
     """
     Per-loss XoL net severity (insurer portion).
     Insurer pays: min(X, r) + max(0, X - (r + L))
+
+    Written into `out` (may be `sev` itself) block by block, without
+    full-size temporaries.
     """
     r = max(float(retention), 0.0)
     L = max(float(limit), 0.0)
-    below = np.minimum(sev, r)
-    above = np.maximum(sev - (r + L), 0.0)
-    return below + above
+    return _apply_steps(sev, [("xol", (r, L))], out)
+
 
 def apply_reinsurance_to_severities(
     severities: np.ndarray,
     rein: ReinsuranceConfig | None,
+    out: np.ndarray | None = None,
 ) -> np.ndarray:
     if rein is None or rein.get("type", "none") == "none":
         return severities
@@ -29,6 +190,39 @@ def apply_reinsurance_to_severities(
             severities,
             retention=float(rein.get("retention", 0.0)),
             limit=float(rein.get("limit", 0.0)),
+            out=out,
         )
 
+    if rein.get("type") == "program":
+        return _apply_steps(severities, _compile_treaties(rein.get("treaties", [])), out)
+
     raise ValueError(f"Unsupported reinsurance type: {rein.get('type')}")
+
+
+def apply_annual_terms(
+    S_gross: np.ndarray,
+    S_net: np.ndarray,
+    rein: ReinsuranceConfig | None,
+) -> np.ndarray:
+    """
+    Apply a program's annual aggregate deductible/limit to each simulated year,
+    in place on S_net: recovery = clip(S_gross - S_net - AAD, 0, AAL).
+    """
+    if rein is None or rein.get("type") != "program":
+        return S_net
+
+    aad = rein.get("aggregate_deductible")
+    aal = rein.get("aggregate_limit")
+    if aad is None and aal is None:
+        return S_net
+
+    aad = max(float(aad or 0.0), 0.0)
+    aal = np.inf if aal is None else max(float(aal), 0.0)
+
+    # S_net holds the recovery while the terms are applied
+    with phase("annual_terms", items=S_net.size):
+        np.subtract(S_gross, S_net, out=S_net)
+        S_net -= aad
+        np.clip(S_net, 0.0, aal, out=S_net)
+        np.subtract(S_gross, S_net, out=S_net)
+    return S_net
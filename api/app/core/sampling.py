@@ -0,0 +1,213 @@
+import numpy as np
+from typing import Dict, Any, Literal, Sequence, Tuple
+
+from app.core.metrics import DEFAULT_QUANTILES, _metrics_and_hist, batch_stderr
+from app.core.reinsurance import (
+    apply_annual_terms,
+    apply_reinsurance_to_severities,
+    ReinsuranceConfig,
+)
+from app.core.simulate import aggregate_claims
+
+SamplingMethod = Literal["mc", "antithetic", "sobol", "importance"]
+
+# Sobol dimensions used for severities (claims beyond this fall back to
+# pseudo-random normals), and clipping that keeps inverse CDFs finite.
+_SOBOL_MAX_CLAIM_DIMS = 16
+_U_EPS = 1e-12
+
+
+def segment_positions(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Flat indices starts[i] + 0..counts[i]-1 for every segment, back to back."""
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.arange(int(counts.sum())) - np.repeat(offsets - starts, counts)
+
+
+def poisson_cdf_table(lam: float) -> np.ndarray:
+    """Poisson(lam) CDF at 0..k, up to the count the largest (clipped) uniform can reach."""
+    # scipy.stats takes ~0.5 s to import; only the paths that need it pay for it
+    from scipy.stats import poisson
+
+    return poisson.cdf(np.arange(int(poisson.ppf(1 - _U_EPS, lam)) + 1), lam)
+
+
+def poisson_from_table(u: np.ndarray, cdf_table: np.ndarray) -> np.ndarray:
+    """
+    Inverse-CDF Poisson counts: the smallest k with cdf(k) >= u, by binary
+    search in a poisson_cdf_table. Same counts as scipy's poisson.ppf at a
+    fraction of its per-element cost.
+    """
+    return np.searchsorted(cdf_table, np.clip(u, _U_EPS, 1 - _U_EPS), side="left")
+
+
+def _draw_antithetic(
+    rng: np.random.Generator, n_sims: int, freq_lambda: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Years 2k and 2k+1 are antithetic: frequency from u and 1 - u, and claim j
+    of both years from +z_j and -z_j (z shared up to the larger count).
+    """
+    n_pairs = (n_sims + 1) // 2
+    u = rng.random(n_pairs)
+    N = np.empty(2 * n_pairs, dtype=np.int64)
+    cdf_table = poisson_cdf_table(freq_lambda)
+    N[0::2] = poisson_from_table(u, cdf_table)
+    N[1::2] = poisson_from_table(1 - u, cdf_table)
+
+    M = np.maximum(N[0::2], N[1::2])
+    z_pair = rng.standard_normal(int(M.sum()))
+    pair_starts = np.cumsum(M) - M
+
+    starts = np.repeat(pair_starts, 2)
+    sign = np.tile([1.0, -1.0], n_pairs)
+    idx = segment_positions(starts, N)
+    z = z_pair[idx] * np.repeat(sign, N)
+
+    N = N[:n_sims]
+    return N, z[: int(N.sum())]
+
+
+def _is_power_of_two(n: int) -> bool:
+    return n >= 1 and n & (n - 1) == 0
+
+
+def _draw_sobol(
+    rng: np.random.Generator, n_sims: int, freq_lambda: float, replicates: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `replicates` independently scrambled Sobol nets of n_sims / replicates
+    points each, laid out one after the other: dimension 0 drives the
+    frequency, dimension 1 + j the j-th claim's severity normal (for
+    j < _SOBOL_MAX_CLAIM_DIMS). Each net is a full power of two, so keeps its
+    balance; the replicates give an honest standard error.
+    """
+    from scipy.stats import norm, poisson, qmc
+
+    if not _is_power_of_two(replicates) or replicates < 2:
+        raise ValueError(f"Sobol replicates must be a power of two >= 2, got {replicates}")
+    if not _is_power_of_two(n_sims) or n_sims < 2 * replicates:
+        raise ValueError(
+            f"Sobol sampling needs n_sims to be a power of two >= {2 * replicates}, got {n_sims}"
+        )
+    n_points = n_sims // replicates
+    m = n_points.bit_length() - 1
+
+    k = int(min(poisson.ppf(1 - 1e-6, freq_lambda), _SOBOL_MAX_CLAIM_DIMS))
+    cdf_table = poisson_cdf_table(freq_lambda)
+    N_parts, z_parts = [], []
+    for child in rng.spawn(replicates):
+        points = qmc.Sobol(d=1 + max(k, 1), scramble=True, seed=child).random_base2(m)
+
+        N = poisson_from_table(points[:, 0], cdf_table)
+        year = np.repeat(np.arange(n_points), N)
+        claim = segment_positions(np.zeros(n_points, dtype=np.int64), N)
+
+        z = np.empty(int(N.sum()))
+        quasi = claim < k
+        u = np.clip(points[year[quasi], 1 + claim[quasi]], _U_EPS, 1 - _U_EPS)
+        z[quasi] = norm.ppf(u)
+        z[~quasi] = child.standard_normal(int((~quasi).sum()))
+        N_parts.append(N)
+        z_parts.append(z)
+    return np.concatenate(N_parts), np.concatenate(z_parts)
+
+
+def _draw_importance(
+    rng: np.random.Generator,
+    n_sims: int,
+    freq_lambda: float,
+    freq_scale: float,
+    sev_shift: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tilted sampling toward large losses: N ~ Poisson(freq_scale * lambda) and
+    log-severities shifted by sev_shift * sigma. Returns the per-year
+    likelihood ratio p/q as weights.
+    """
+    tilted_lambda = freq_lambda * freq_scale
+    N = rng.poisson(lam=tilted_lambda, size=n_sims)
+    z = rng.standard_normal(int(N.sum()))
+
+    # log p/q = N log(1/scale) + lambda (scale - 1) + sum_j (-shift^2/2 - shift z_j)
+    (z_sum,) = aggregate_claims(N, z)
+    log_w = (
+        N * (-np.log(freq_scale) - 0.5 * sev_shift**2)
+        + (tilted_lambda - freq_lambda)
+        - sev_shift * z_sum
+    )
+    return N, z + sev_shift, np.exp(log_w)
+
+
+def simulate_gross_net_vr(
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    capital: float,
+    reinsurance: ReinsuranceConfig | None = None,
+    seed: int | None = None,
+    method: SamplingMethod = "antithetic",
+    freq_scale: float = 1.5,
+    sev_shift: float = 0.5,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+    stderr_batches: int = 20,
+    sobol_replicates: int = 16,
+) -> Dict[str, Any]:
+    """
+    simulate_gross_net with a variance-reduction sampling method:
+
+    - antithetic: paired years from mirrored uniforms/normals
+    - sobol: scrambled Sobol quasi-random frequency and severity draws, as
+      `sobol_replicates` independent scramblings (n_sims a power of two)
+    - importance: frequency and severity tilted toward large losses,
+      reweighted by the likelihood ratio (weighted VaR/TVaR)
+
+    Same result shape as simulate_gross_net plus a batch-means "stderr" per
+    metric, so accuracy can be compared at equal sims (for sobol, the spread
+    of the replicates: batches of one QMC sequence are not independent). The
+    whole run is drawn at once (no chunking).
+    """
+    rng = np.random.default_rng(seed)
+    weights = None
+    block = 1
+
+    if method == "antithetic":
+        N, z = _draw_antithetic(rng, n_sims, freq_lambda)
+        block = 2
+    elif method == "sobol":
+        N, z = _draw_sobol(rng, n_sims, freq_lambda, sobol_replicates)
+        # One batch per replicate
+        stderr_batches, block = sobol_replicates, n_sims // sobol_replicates
+    elif method == "importance":
+        if freq_scale <= 0:
+            raise ValueError("freq_scale must be positive")
+        N, z, weights = _draw_importance(rng, n_sims, freq_lambda, freq_scale, sev_shift)
+    else:
+        raise ValueError(f"Unsupported sampling method: {method}")
+
+    gross_sev = np.exp(sev_mu + sev_sigma * z)
+    net_sev = apply_reinsurance_to_severities(gross_sev, reinsurance)
+    S_gross, S_net = aggregate_claims(N, gross_sev, net_sev)
+    apply_annual_terms(S_gross, S_net, reinsurance)
+
+    out: Dict[str, Any] = {}
+    for key, S in (("gross", S_gross), ("net", S_net)):
+        out[key] = _metrics_and_hist(
+            S, capital, quantiles=quantiles, capital_levels=capital_levels, weights=weights
+        )
+        out[key]["stderr"] = batch_stderr(
+            S, capital, quantiles, weights=weights, n_batches=stderr_batches, block=block
+        )
+    out["reinsurance"] = reinsurance or {"type": "none"}
+    out["sampling"] = {"method": method}
+    if method == "sobol":
+        out["sampling"]["replicates"] = sobol_replicates
+    if method == "importance":
+        out["sampling"].update(
+            freq_scale=freq_scale,
+            sev_shift=sev_shift,
+            effective_sims=float(weights.sum() ** 2 / np.dot(weights, weights)),
+        )
+    return out
@@ -1,5 +1,217 @@
 import numpy as np
-from typing import Dict, Any
+from numpy.typing import DTypeLike
+from typing import Dict, Any, Iterator, List, Sequence, Tuple
+from app.core.reinsurance import (
+    apply_annual_terms,
+    apply_reinsurance_to_severities,
+    ReinsuranceConfig,
+)
+from app.core.metrics import DEFAULT_QUANTILES, _metrics_and_hist, _tail_metrics
+from app.core.accumulate import LossAccumulator, ProgressFn, TailMode
+from app.core.timing import phase
+
+# numpy's float reductions use an unrolled pairwise summation (see
+# loops_utils.h.src). The segment kernel below reproduces it exactly so the
+# vectorized aggregation is bit-identical to summing each year's slice.
+_PW_UNROLL = 8
+_PW_BLOCKSIZE = 128
+
+
+def _pairwise_segment_sum(
+    arrays: Tuple[np.ndarray, ...],
+    starts: np.ndarray,
+    counts: np.ndarray,
+) -> Tuple[np.ndarray, ...]:
+    """
+    Sum arrays[k][starts[i] : starts[i] + counts[i]] for every segment i (counts > 0),
+    in the same order `ndarray.sum` would. The gather indices are computed once and
+    shared by every array, so gross and net are aggregated in a single pass. Sums
+    are always accumulated in float64, whatever the dtype of the arrays.
+    """
+    out = tuple(np.empty(counts.size) for _ in arrays)
+    if counts.size == 0:
+        return out
+
+    # Short segments: plain sequential accumulation
+    small = np.flatnonzero(counts < _PW_UNROLL)
+    if small.size:
+        s, c = starts[small], counts[small]
+        acc = [a[s].astype(np.float64, copy=False) for a in arrays]
+        for j in range(1, int(c.max())):
+            m = np.flatnonzero(c > j)
+            pos = s[m] + j
+            for k, a in enumerate(arrays):
+                acc[k][m] += a[pos]
+        for k in range(len(arrays)):
+            out[k][small] = acc[k]
+
+    # Medium segments: 8 partial sums over whole blocks, then the remainder
+    block = np.flatnonzero((counts >= _PW_UNROLL) & (counts <= _PW_BLOCKSIZE))
+    if block.size:
+        s, c = starts[block], counts[block]
+        full = c - c % _PW_UNROLL
+        r = [[a[s + j].astype(np.float64, copy=False) for j in range(_PW_UNROLL)] for a in arrays]
+        for i in range(_PW_UNROLL, int(full.max()), _PW_UNROLL):
+            m = np.flatnonzero(full > i)
+            pos = s[m] + i
+            for k, a in enumerate(arrays):
+                for j in range(_PW_UNROLL):
+                    r[k][j][m] += a[pos + j]
+        acc = [
+            ((rk[0] + rk[1]) + (rk[2] + rk[3])) + ((rk[4] + rk[5]) + (rk[6] + rk[7]))
+            for rk in r
+        ]
+        for i in range(int(full.min()), int(c.max())):
+            m = np.flatnonzero((i >= full) & (i < c))
+            pos = s[m] + i
+            for k, a in enumerate(arrays):
+                acc[k][m] += a[pos]
+        for k in range(len(arrays)):
+            out[k][block] = acc[k]
+
+    # Long segments: split in two (on a multiple of 8) and recurse
+    big = np.flatnonzero(counts > _PW_BLOCKSIZE)
+    if big.size:
+        s, c = starts[big], counts[big]
+        n2 = c // 2
+        n2 -= n2 % _PW_UNROLL
+        left = _pairwise_segment_sum(arrays, s, n2)
+        right = _pairwise_segment_sum(arrays, s + n2, c - n2)
+        for k in range(len(arrays)):
+            out[k][big] = left[k] + right[k]
+
+    return out
+
+
+def aggregate_claims(counts: np.ndarray, *severities: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Aggregate flattened per-claim severities into annual losses.
+
+    `counts[i]` is the number of claims in year i; each severity array holds the
+    claims of all years back to back. Returns one array of annual losses per
+    severity array, bit-identical to summing each year's slice in a loop.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    has_claims = np.flatnonzero(counts)
+
+    sums = _pairwise_segment_sum(severities, offsets[has_claims], counts[has_claims])
+
+    out = []
+    for seg in sums:
+        S = np.zeros(counts.size)
+        S[has_claims] = seg
+        out.append(S)
+    return tuple(out)
+
+
+# Claim buffers may be float32 to halve their memory traffic; annual sums
+# and metrics stay float64
+SUPPORTED_DTYPES = ("float64", "float32")
+
+# Largest relative VaR/TVaR deviation from float64 accepted for a reduced
+# precision run, and how many years the check simulates
+DEFAULT_PRECISION_TOLERANCE = 1e-4
+PRECISION_CHECK_SIMS = 20_000
+
+
+def lognormal_from_normals(z: np.ndarray, sev_mu: float, sev_sigma: float) -> np.ndarray:
+    """exp(mu + sigma * z), in place in z's buffer and dtype."""
+    z *= sev_sigma
+    z += sev_mu
+    return np.exp(z, out=z)
+
+
+def draw_lognormal(
+    rng: np.random.Generator,
+    size: int,
+    sev_mu: float,
+    sev_sigma: float,
+    dtype: DTypeLike = np.float64,
+) -> np.ndarray:
+    """
+    Lognormal severities in `dtype`. float64 is rng.lognormal itself; float32
+    draws float32 normals and exponentiates them in place, so no float64
+    buffer of the claims is allocated.
+    """
+    if np.dtype(dtype) == np.float64:
+        return rng.lognormal(mean=sev_mu, sigma=sev_sigma, size=size)
+    return lognormal_from_normals(rng.standard_normal(size, dtype=dtype), sev_mu, sev_sigma)
+
+
+def precision_deviation(
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    treaties: List[ReinsuranceConfig | None],
+    quantiles: Sequence[float],
+    dtype: DTypeLike,
+    seed: int | None = None,
+) -> float:
+    """
+    Largest relative deviation of the gross and net VaR/TVaR levels computed
+    with `dtype` claim buffers from the same draws carried in float64.
+    """
+    rng = np.random.default_rng(seed)
+    N = rng.poisson(lam=freq_lambda, size=n_sims)
+    z = rng.standard_normal(int(N.sum()), dtype=dtype)
+
+    metrics = []
+    for d in (dtype, np.float64):
+        gross_sev = lognormal_from_normals(z.astype(d), sev_mu, sev_sigma)
+        net_sevs = [
+            apply_reinsurance_to_severities(gross_sev, treaty, out=np.empty_like(gross_sev))
+            for treaty in treaties
+        ]
+        S_gross, *S_nets = aggregate_claims(N, gross_sev, *net_sevs)
+        for S_net, treaty in zip(S_nets, treaties):
+            apply_annual_terms(S_gross, S_net, treaty)
+        metrics.append([_tail_metrics(np.sort(S), n_sims, quantiles) for S in (S_gross, *S_nets)])
+
+    deviation = 0.0
+    for low, ref in zip(*metrics):
+        for key, value in ref.items():
+            if value != 0:
+                deviation = max(deviation, abs(low[key] - value) / abs(value))
+    return deviation
+
+
+def select_dtype(
+    dtype: DTypeLike,
+    tolerance: float,
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    treaties: List[ReinsuranceConfig | None],
+    quantiles: Sequence[float],
+    seed: int | None = None,
+) -> Tuple[np.dtype, Dict[str, Any] | None]:
+    """
+    The claim dtype to simulate with, plus a "precision" report for the
+    result when reduced precision was requested: float32 is checked against
+    float64 on a subsample of years and falls back to float64 when a tail
+    metric deviates by more than `tolerance`.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.name not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported dtype: {dtype.name}")
+    if dtype == np.float64:
+        return dtype, None
+
+    check_sims = min(n_sims, PRECISION_CHECK_SIMS)
+    deviation = precision_deviation(
+        check_sims, freq_lambda, sev_mu, sev_sigma, treaties, quantiles, dtype, seed
+    )
+    used = dtype if deviation <= tolerance else np.dtype(np.float64)
+    return used, {
+        "requested": dtype.name,
+        "dtype": used.name,
+        "deviation": deviation,
+        "tolerance": tolerance,
+        "check_sims": check_sims,
+    }
 
 
 def simulate_aggregate_loss(
@@ -19,71 +231,157 @@ def simulate_aggregate_loss(
     rng = np.random.default_rng(seed)
 
     # 1) Simulate frequency
-    N = rng.poisson(lam=freq_lambda, size=n_sims)
+    with phase("poisson", items=n_sims):
+        N = rng.poisson(lam=freq_lambda, size=n_sims)
 
     # 2) Simulate severities (flattened)
-    total_claims = N.sum()
-    severities = rng.lognormal(mean=sev_mu, sigma=sev_sigma, size=total_claims)
+    total_claims = int(N.sum())
+    with phase("lognormal", items=total_claims):
+        severities = rng.lognormal(mean=sev_mu, sigma=sev_sigma, size=total_claims)
 
     # 3) Aggregate losses
-    S = np.zeros(n_sims)
-    idx = 0
-    for i, n in enumerate(N):
-        if n > 0:
-            S[i] = severities[idx : idx + n].sum()
-            idx += n
-
-    # 4) Risk metrics
-    mean_loss = float(S.mean())
-    var_95 = float(np.quantile(S, 0.95))
-    var_99 = float(np.quantile(S, 0.99))
-
-    tvar_95 = float(S[S >= var_95].mean())
-    tvar_99 = float(S[S >= var_99].mean())
-
-    ruin_prob = float((S > capital).mean())
-
-    # 5) Histogram for plotting
-    hist, bin_edges = np.histogram(S, bins=50)
-
-    return {
-        "metrics": {
-            "mean": mean_loss,
-            "VaR95": var_95,
-            "VaR99": var_99,
-            "TVaR95": tvar_95,
-            "TVaR99": tvar_99,
-            "ruinProb": ruin_prob,
-        },
-        "histogram": {
-            "counts": hist.tolist(),
-            "bins": bin_edges.tolist(),
-        },
-    }
-import numpy as np
-from typing import Dict, Any
-from app.core.reinsurance import apply_reinsurance_to_severities, ReinsuranceConfig
-
-def _metrics_and_hist(S: np.ndarray, capital: float, bins: int = 60) -> Dict[str, Any]:
-    mean_loss = float(S.mean())
-    var_95 = float(np.quantile(S, 0.95))
-    var_99 = float(np.quantile(S, 0.99))
-    tvar_95 = float(S[S >= var_95].mean())
-    tvar_99 = float(S[S >= var_99].mean())
-    ruin_prob = float((S > capital).mean())
-
-    hist, edges = np.histogram(S, bins=bins)
-    return {
-        "metrics": {
-            "mean": mean_loss,
-            "VaR95": var_95,
-            "VaR99": var_99,
-            "TVaR95": tvar_95,
-            "TVaR99": tvar_99,
-            "ruinProb": ruin_prob,
-        },
-        "histogram": {"counts": hist.tolist(), "bins": edges.tolist()},
-    }
+    with phase("aggregate", items=total_claims):
+        (S,) = aggregate_claims(N, severities)
+
+    # 4) Risk metrics and histogram for plotting
+    return _metrics_and_hist(S, capital, bins=50)
+
+
+def default_hist_edges(
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    bins: int = 60,
+) -> np.ndarray:
+    """
+    Histogram edges that can be agreed before simulating: [0, E[S] + 10 sd(S)]
+    for the compound Poisson-lognormal annual loss S.
+    """
+    mean_sev = np.exp(sev_mu + 0.5 * sev_sigma**2)
+    second_moment_sev = np.exp(2 * sev_mu + 2 * sev_sigma**2)
+    mean_S = freq_lambda * mean_sev
+    sd_S = np.sqrt(freq_lambda * second_moment_sev)
+    return np.linspace(0.0, mean_S + 10 * sd_S, bins + 1)
+
+
+def iter_annual_losses_batch(
+    rng: np.random.Generator,
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    treaties: List[ReinsuranceConfig | None],
+    chunk_size: int | None = None,
+    dtype: DTypeLike = np.float64,
+) -> Iterator[Tuple[np.ndarray, List[np.ndarray]]]:
+    """
+    Yield (S_gross, [S_net per treaty]) annual losses `chunk_size` years at a time.
+
+    Every treaty is applied to the same gross claims (common random numbers),
+    one at a time through a shared net buffer. Claim counts are drawn up front
+    and severities consumed from the same stream in order, so the concatenated
+    output does not depend on chunk_size. Claim buffers are held in `dtype`;
+    annual losses are always float64.
+    """
+    chunk_size = n_sims if chunk_size is None else max(int(chunk_size), 1)
+
+    # 1) Frequency
+    with phase("poisson", items=n_sims):
+        N = rng.poisson(lam=freq_lambda, size=n_sims)
+
+    for start in range(0, n_sims, chunk_size):
+        N_chunk = N[start : start + chunk_size]
+        n_claims = int(N_chunk.sum())
+
+        # 2) Severities (gross per claim)
+        with phase("lognormal", items=n_claims):
+            gross_sev = draw_lognormal(rng, n_claims, sev_mu, sev_sigma, dtype)
+        net_buf = np.empty_like(gross_sev)
+
+        S_gross = None
+        S_nets = []
+        for treaty in treaties:
+            # 3) Apply the reinsurance program to each claim to get insurer-paid net severities
+            net_sev = apply_reinsurance_to_severities(gross_sev, treaty, out=net_buf)
+
+            # 4) Aggregate using the same claim counts (gross only once), then annual terms
+            with phase("aggregate", items=n_claims):
+                if S_gross is None:
+                    S_gross, S_net = aggregate_claims(N_chunk, gross_sev, net_sev)
+                else:
+                    (S_net,) = aggregate_claims(N_chunk, net_sev)
+            apply_annual_terms(S_gross, S_net, treaty)
+            S_nets.append(S_net)
+
+        yield S_gross, S_nets
+
+
+def iter_annual_losses(
+    rng: np.random.Generator,
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    reinsurance: ReinsuranceConfig | None = None,
+    chunk_size: int | None = None,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield (S_gross, S_net) annual losses `chunk_size` years at a time."""
+    for S_gross, (S_net,) in iter_annual_losses_batch(
+        rng, n_sims, freq_lambda, sev_mu, sev_sigma, [reinsurance], chunk_size
+    ):
+        yield S_gross, S_net
+
+
+def accumulate_gross_net(
+    rng: np.random.Generator,
+    n_sims: int,
+    n_total: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    capital: float,
+    treaties: List[ReinsuranceConfig | None],
+    chunk_size: int | None = None,
+    acc_kwargs: Dict[str, Any] | None = None,
+    progress: ProgressFn | None = None,
+    dtype: DTypeLike = np.float64,
+) -> Tuple[LossAccumulator, List[LossAccumulator]]:
+    """
+    Simulate n_sims years into a gross accumulator and one net accumulator
+    per treaty. n_total is the size of the whole run when this is one shard.
+    `progress` is called after every chunk with interim estimates for the
+    first treaty's net losses.
+    """
+    acc_kwargs = acc_kwargs or {}
+    gross_acc = LossAccumulator(capital, n_total, **acc_kwargs)
+    net_accs = [LossAccumulator(capital, n_total, **acc_kwargs) for _ in treaties]
+
+    for S_gross, S_nets in iter_annual_losses_batch(
+        rng, n_sims, freq_lambda, sev_mu, sev_sigma, treaties, chunk_size, dtype
+    ):
+        gross_acc.add(S_gross)
+        for acc, S_net in zip(net_accs, S_nets):
+            acc.add(S_net)
+        if progress is not None:
+            progress(gross_acc.count, net_accs[0].interim_metrics)
+    return gross_acc, net_accs
+
+
+def _accumulator_kwargs(
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    tail_mode: TailMode,
+    hist_edges: Sequence[float] | None,
+    quantiles: Sequence[float],
+    capital_levels: Sequence[float] | None,
+) -> Dict[str, Any]:
+    if tail_mode == "sketch" and hist_edges is None:
+        hist_edges = default_hist_edges(freq_lambda, sev_mu, sev_sigma)
+    return dict(
+        mode=tail_mode, hist_edges=hist_edges, quantiles=quantiles, capital_levels=capital_levels
+    )
+
 
 def simulate_gross_net(
     n_sims: int,
@@ -93,34 +391,133 @@ def simulate_gross_net(
     capital: float,
     reinsurance: ReinsuranceConfig | None = None,
     seed: int | None = None,
+    chunk_size: int | None = None,
+    tail_mode: TailMode = "exact",
+    hist_edges: Sequence[float] | None = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+    loss_sink: Dict[str, np.ndarray] | None = None,
+    progress: ProgressFn | None = None,
+    dtype: DTypeLike = np.float64,
+    precision_tolerance: float = DEFAULT_PRECISION_TOLERANCE,
 ) -> Dict[str, Any]:
+    """
+    Gross and net (after per-claim reinsurance) annual loss metrics.
+
+    Claims are generated and aggregated `chunk_size` years at a time, so the
+    severity buffers never exceed one chunk; the "exact" tail mode is
+    bit-identical for any chunk size. "sketch" mode also drops the annual
+    loss vectors, see LossAccumulator. VaR/TVaR are reported at every level
+    in `quantiles` and ruin probabilities at `capital` plus `capital_levels`.
+    Pass a dict as `loss_sink` to also get the sorted loss vectors back, and
+    a `progress` callback to hear about every completed chunk.
+
+    dtype="float32" halves the claim buffers (generation, reinsurance and
+    the aggregation gathers); annual sums are still accumulated in float64.
+    It is checked against float64 first, see select_dtype, and the outcome
+    is reported under "precision".
+    """
+    dtype, precision = select_dtype(
+        dtype, precision_tolerance, n_sims, freq_lambda, sev_mu, sev_sigma,
+        [reinsurance], quantiles, seed,
+    )
     rng = np.random.default_rng(seed)
+    acc_kwargs = _accumulator_kwargs(
+        freq_lambda, sev_mu, sev_sigma, tail_mode, hist_edges, quantiles, capital_levels
+    )
 
-    # 1) Frequency
-    N = rng.poisson(lam=freq_lambda, size=n_sims)
-    total_claims = int(N.sum())
+    gross_acc, (net_acc,) = accumulate_gross_net(
+        rng, n_sims, n_sims, freq_lambda, sev_mu, sev_sigma, capital,
+        [reinsurance], chunk_size, acc_kwargs, progress, dtype,
+    )
+    collect_losses(loss_sink, gross_acc, [net_acc])
 
-    # 2) Severities (gross per claim)
-    gross_sev = rng.lognormal(mean=sev_mu, sigma=sev_sigma, size=total_claims)
+    out = {
+        "gross": gross_acc.result(),
+        "net": net_acc.result(),
+        "reinsurance": reinsurance or {"type": "none"},
+    }
+    if precision is not None:
+        out["precision"] = precision
+    return out
 
-    # 3) Apply XoL to each claim to get insurer-paid net severities
-    net_sev = apply_reinsurance_to_severities(gross_sev, reinsurance)
 
-    # 4) Aggregate both using the same claim counts
-    S_gross = np.zeros(n_sims)
-    S_net = np.zeros(n_sims)
+def collect_losses(
+    loss_sink: Dict[str, np.ndarray] | None,
+    gross_acc: LossAccumulator,
+    net_accs: List[LossAccumulator],
+    batch: bool = False,
+) -> None:
+    """
+    Put the sorted annual losses into loss_sink (if given) under the path of
+    their metrics in the result: "gross", "net" or "treaties/<i>/net".
+    """
+    if loss_sink is None:
+        return
+    loss_sink["gross"] = gross_acc.sorted_losses()
+    for i, acc in enumerate(net_accs):
+        loss_sink[f"treaties/{i}/net" if batch else "net"] = acc.sorted_losses()
 
-    idx = 0
-    for i, n in enumerate(N):
-        if n > 0:
-            sl = slice(idx, idx + n)
-            S_gross[i] = gross_sev[sl].sum()
-            S_net[i] = net_sev[sl].sum()
-            idx += n
 
-    return {
-        "gross": _metrics_and_hist(S_gross, capital),
-        "net": _metrics_and_hist(S_net, capital),
-        "reinsurance": reinsurance or {"type": "none"},
+def batch_result(
+    gross_acc: LossAccumulator,
+    net_accs: List[LossAccumulator],
+    treaties: List[ReinsuranceConfig | None],
+    precision: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    out = {
+        "gross": gross_acc.result(),
+        "treaties": [
+            {"reinsurance": treaty or {"type": "none"}, "net": acc.result()}
+            for treaty, acc in zip(treaties, net_accs)
+        ],
     }
+    if precision is not None:
+        out["precision"] = precision
+    return out
+
+
+def simulate_gross_net_batch(
+    n_sims: int,
+    freq_lambda: float,
+    sev_mu: float,
+    sev_sigma: float,
+    capital: float,
+    treaties: List[ReinsuranceConfig | None],
+    seed: int | None = None,
+    chunk_size: int | None = None,
+    tail_mode: TailMode = "exact",
+    hist_edges: Sequence[float] | None = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+    loss_sink: Dict[str, np.ndarray] | None = None,
+    progress: ProgressFn | None = None,
+    dtype: DTypeLike = np.float64,
+    precision_tolerance: float = DEFAULT_PRECISION_TOLERANCE,
+) -> Dict[str, Any]:
+    """
+    What-if comparison of many reinsurance structures on one set of gross losses.
+
+    Frequencies and gross severities are simulated once and every treaty is
+    applied to that shared buffer, so each treaty's net metrics match a
+    single simulate_gross_net run with the same seed. Returns gross metrics
+    once plus net metrics per treaty. `dtype` as in simulate_gross_net.
+    """
+    if not treaties:
+        raise ValueError("Batch run needs at least one reinsurance config")
+
+    dtype, precision = select_dtype(
+        dtype, precision_tolerance, n_sims, freq_lambda, sev_mu, sev_sigma,
+        treaties, quantiles, seed,
+    )
+    rng = np.random.default_rng(seed)
+    acc_kwargs = _accumulator_kwargs(
+        freq_lambda, sev_mu, sev_sigma, tail_mode, hist_edges, quantiles, capital_levels
+    )
 
+    gross_acc, net_accs = accumulate_gross_net(
+        rng, n_sims, n_sims, freq_lambda, sev_mu, sev_sigma, capital,
+        treaties, chunk_size, acc_kwargs, progress, dtype,
+    )
+    collect_losses(loss_sink, gross_acc, net_accs, batch=True)
+    return batch_result(gross_acc, net_accs, treaties, precision)
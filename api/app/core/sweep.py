@@ -0,0 +1,131 @@
+import itertools
+import numpy as np
+from typing import Any, Dict, List, Sequence
+
+from app.core.metrics import DEFAULT_QUANTILES, _metrics_and_hist
+from app.core.reinsurance import (
+    apply_annual_terms,
+    apply_reinsurance_to_severities,
+    ReinsuranceConfig,
+)
+from app.core.sampling import poisson_cdf_table, poisson_from_table, segment_positions
+from app.core.simulate import aggregate_claims
+from app.core.timing import phase
+
+# Grid axes, in the order of the surface's dimensions
+SWEEP_PARAMS = ("freq_lambda", "sev_mu", "sev_sigma")
+
+
+def sweep_grid(base: Dict[str, float], axes: Dict[str, Sequence[float]]) -> Dict[str, List[float]]:
+    """Sorted, distinct values per parameter; axes left out hold the base value."""
+    unknown = set(axes) - set(SWEEP_PARAMS)
+    if unknown:
+        raise ValueError(f"Cannot sweep {sorted(unknown)}; sweepable: {list(SWEEP_PARAMS)}")
+    grid = {}
+    for name in SWEEP_PARAMS:
+        values = axes.get(name) or [base[name]]
+        grid[name] = sorted({float(v) for v in values})
+    if grid["freq_lambda"][0] < 0 or grid["sev_sigma"][0] < 0:
+        raise ValueError("freq_lambda and sev_sigma must be non-negative")
+    return grid
+
+
+def _sensitivities(surface: np.ndarray, grid: Dict[str, List[float]]) -> Dict[str, np.ndarray]:
+    """
+    d(metric)/d(param) at every grid point: central differences inside the
+    grid, one-sided at its edges (np.gradient). Axes with one value are skipped.
+    """
+    return {
+        name: np.gradient(surface, grid[name], axis=k)
+        for k, name in enumerate(SWEEP_PARAMS)
+        if len(grid[name]) > 1
+    }
+
+
+def simulate_sweep(
+    n_sims: int,
+    grid: Dict[str, List[float]],
+    capital: float,
+    reinsurance: ReinsuranceConfig | None = None,
+    seed: int | None = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    capital_levels: Sequence[float] | None = None,
+) -> Dict[str, Any]:
+    """
+    Gross and net metrics at every point of a freq_lambda x sev_mu x
+    sev_sigma grid from one set of common random numbers.
+
+    One uniform per year drives the frequency at every lambda (inverse CDF,
+    so counts grow monotonically with lambda), and one standard normal per
+    claim slot drives the severity at every (mu, sigma) by shift and scale.
+    Each year has slots for its count at the largest lambda; a smaller
+    lambda uses the first ones. Differences between points are then
+    differences in the parameters rather than in the noise, which is what
+    makes the finite-difference sensitivities usable.
+
+    Returns the grid, one entry per point (row-major over SWEEP_PARAMS) with
+    its metrics and d(metric)/d(param) along each swept axis. The whole
+    run is drawn at once (no chunking).
+    """
+    rng = np.random.default_rng(seed)
+
+    # 1) Common random numbers: a uniform per year, a normal per claim slot
+    with phase("poisson", items=n_sims):
+        u = rng.random(n_sims)
+        counts = {lam: poisson_from_table(u, poisson_cdf_table(lam)) for lam in grid["freq_lambda"]}
+    N_max = counts[grid["freq_lambda"][-1]]
+    slot_starts = np.cumsum(N_max) - N_max
+    with phase("lognormal", items=int(N_max.sum())):
+        z_slots = rng.standard_normal(int(N_max.sum()))
+
+    shape = tuple(len(grid[name]) for name in SWEEP_PARAMS)
+    metrics: Dict[str, List[Dict[str, Any]]] = {"gross": [], "net": []}
+    for lam in grid["freq_lambda"]:
+        N = counts[lam]
+        z = z_slots[segment_positions(slot_starts, N)]
+        for mu, sigma in itertools.product(grid["sev_mu"], grid["sev_sigma"]):
+            # 2) The same normals shifted and scaled into this point's severities
+            with phase("lognormal", items=z.size):
+                gross_sev = np.exp(mu + sigma * z)
+            net_sev = apply_reinsurance_to_severities(
+                gross_sev, reinsurance, out=np.empty_like(gross_sev)
+            )
+            with phase("aggregate", items=z.size):
+                S_gross, S_net = aggregate_claims(N, gross_sev, net_sev)
+            apply_annual_terms(S_gross, S_net, reinsurance)
+
+            for key, S in (("gross", S_gross), ("net", S_net)):
+                metrics[key].append(
+                    _metrics_and_hist(
+                        S, capital, bins=1, quantiles=quantiles, capital_levels=capital_levels
+                    )["metrics"]
+                )
+
+    # 3) Finite differences over the metrics surface of every scalar metric
+    sensitivities: Dict[str, Dict[str, Dict[str, np.ndarray]]] = {}
+    for key, points in metrics.items():
+        names = [m for m, v in points[0].items() if isinstance(v, float)]
+        for m in names:
+            surface = np.array([p[m] for p in points]).reshape(shape)
+            for param, grad in _sensitivities(surface, grid).items():
+                sensitivities.setdefault(key, {}).setdefault(param, {})[m] = grad.ravel()
+
+    out_points = []
+    for i, values in enumerate(itertools.product(*(grid[name] for name in SWEEP_PARAMS))):
+        point: Dict[str, Any] = dict(zip(SWEEP_PARAMS, values))
+        point.update({key: metrics[key][i] for key in ("gross", "net")})
+        point["sensitivities"] = {
+            key: {
+                param: {m: float(grad[i]) for m, grad in per_metric.items()}
+                for param, per_metric in per_param.items()
+            }
+            for key, per_param in sensitivities.items()
+        }
+        out_points.append(point)
+
+    return {
+        "grid": grid,
+        "points": out_points,
+        "reinsurance": reinsurance or {"type": "none"},
+        "sampling": {"method": "crn"},
+    }
@@ -0,0 +1,105 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator
+
+
+class PhaseTimer:
+    """Accumulated wall time, call count and array sizes per named phase."""
+
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, seconds: float, items: int = 0) -> None:
+        p = self.phases.get(name)
+        if p is None:
+            p = self.phases[name] = {"seconds": 0.0, "calls": 0, "items": 0}
+        p["seconds"] += seconds
+        p["calls"] += 1
+        p["items"] += int(items)
+
+    def merge(self, phases: Dict[str, Dict[str, float]]) -> None:
+        for name, other in phases.items():
+            p = self.phases.setdefault(name, {"seconds": 0.0, "calls": 0, "items": 0})
+            for key in p:
+                p[key] += other[key]
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"seconds": round(p["seconds"], 6), "calls": int(p["calls"]), "items": int(p["items"])}
+            for name, p in self.phases.items()
+        }
+
+
+_current: ContextVar[PhaseTimer | None] = ContextVar("phase_timer", default=None)
+
+
+class _Phase:
+    __slots__ = ("timer", "name", "items", "t0")
+
+    def __init__(self, timer: PhaseTimer, name: str, items: int):
+        self.timer = timer
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.t0, self.items)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name: str, items: int = 0):
+    """
+    Time a block into the active PhaseTimer, if any:
+
+        with phase("lognormal", items=n_claims):
+            ...
+
+    Without collect_phases() this is a shared no-op context manager, so
+    instrumented hot paths cost one ContextVar lookup per block.
+    """
+    timer = _current.get()
+    if timer is None:
+        return _NULL_PHASE
+    return _Phase(timer, name, items)
+
+
+def timing_enabled() -> bool:
+    return _current.get() is not None
+
+
+def record_phases(phases: Dict[str, Dict[str, float]] | None) -> None:
+    """Fold phases timed elsewhere (e.g. in a shard's process) into the active timer."""
+    timer = _current.get()
+    if timer is not None and phases:
+        timer.merge(phases)
+
+
+@contextmanager
+def collect_phases(enabled: bool = True) -> Iterator[PhaseTimer | None]:
+    """Collect phase() timings inside the block (yields None when disabled)."""
+    if not enabled:
+        yield None
+        return
+    timer = PhaseTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
@@ -1,10 +1,88 @@
-from fastapi import FastAPI
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from app.routes.runs import router as runs_router
+from app.routes.quote import router as quote_router
+from app.services.model_store import load_models
+from app.services.run_executor import get_run_executor
+from app.services.clients import get_client_pool
+from app.services.result_cache import get_result_cache
+from app.services.run_events import get_event_hub
+from app.services.telemetry import HTTP_REQUEST_SECONDS, REGISTRY
+
+
+def warm_up() -> None:
+    """Open the shared Firestore client and load the surrogates (and their SDKs)."""
+    log = logging.getLogger(__name__)
+    try:
+        get_client_pool().db()
+    except Exception as e:
+        log.warning("Firestore client not created at startup: %s", e)
+
+    # Load the surrogates ahead of the first /quote so it never pays the download
+    try:
+        load_models()
+    except Exception as e:
+        log.warning("Surrogate models not loaded at startup: %s", e)
+
 
-app = FastAPI(title="Risk Lab API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # STARTUP_WARMUP: "background" (default) serves /health while the clients
+    # and models load in a thread, "blocking" loads them before serving,
+    # "off" leaves them to the first request that needs them
+    mode = os.environ.get("STARTUP_WARMUP", "background")
+    if mode == "blocking":
+        warm_up()
+    elif mode == "background":
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    elif mode != "off":
+        raise ValueError(f"Unsupported STARTUP_WARMUP: {mode}")
+    yield
+    get_event_hub().close()
+    get_run_executor().shutdown()
+    get_client_pool().close()
+
+
+app = FastAPI(title="Risk Lab API", lifespan=lifespan)
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not raw path, so run ids don't explode the series
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - t0,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code,
+    )
+    return response
 
 @app.get("/health")
 def health():
     return {"ok": True}
 
+@app.get("/diagnostics")
+def diagnostics():
+    """Shared client pool, in-process executor and result cache stats."""
+    return {
+        "clients": get_client_pool().stats(),
+        "executor": get_run_executor().stats(),
+        "result_cache": get_result_cache().stats(),
+        "run_events": get_event_hub().stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition: request, dispatch and run phase latencies."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(runs_router)
+app.include_router(quote_router)
@@ -1,6 +1,8 @@
 import os
 import json
-from dataclasses import dataclass
+import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
 import numpy as np
 import pandas as pd
 from joblib import dump
@@ -14,6 +16,7 @@ except Exception:  # pragma: no cover - optional dependency in local dev
     service_account = None  # type: ignore
 
 from app.core.simulate import simulate_gross_net
+from app.services.model_store import FEATURES
 
 @dataclass
 class TrainConfig:
@@ -22,6 +25,9 @@ class TrainConfig:
     seed: int = 123
     bucket: str = ""
     model_prefix: str = "models"
+    workers: int = 1
+    checkpoint_dir: str = "/tmp/train_checkpoint"
+    checkpoint_every: int = 20
 
 def get_storage_client():
     """Return a `google.cloud.storage.Client`, using service-account env fallbacks.
@@ -58,6 +64,139 @@ def upload_to_gcs(bucket_name: str, local_path: str, gcs_path: str) -> None:
     blob = bucket.blob(gcs_path)
     blob.upload_from_filename(local_path)
 
+def sample_scenarios(n_scenarios: int, seed: int) -> pd.DataFrame:
+    """
+    Draw every scenario's parameters up front, vectorized from `seed`, so the
+    dataset does not depend on how scenarios are later spread over workers.
+    """
+    rng = np.random.default_rng(seed)
+    freq_lambda = rng.uniform(0.05, 0.6, size=n_scenarios)
+    sev_mu = rng.uniform(9.5, 10.8, size=n_scenarios)
+    sev_sigma = rng.uniform(0.6, 1.4, size=n_scenarios)
+
+    # XoL parameters (sometimes none)
+    no_rein = rng.random(size=n_scenarios) < 0.3
+    retention = rng.choice([5000, 10000, 20000, 30000, 50000], size=n_scenarios).astype(float)
+    limit = rng.choice([25000, 50000, 100000, 200000], size=n_scenarios).astype(float)
+    retention[no_rein] = 0.0
+    limit[no_rein] = 0.0
+
+    return pd.DataFrame({
+        "scenario": np.arange(n_scenarios),
+        "freq_lambda": freq_lambda,
+        "sev_mu": sev_mu,
+        "sev_sigma": sev_sigma,
+        "retention": retention,
+        "limit": limit,
+        "sim_seed": seed + np.arange(n_scenarios),
+    })
+
+
+def run_scenario(params: dict, n_sims: int) -> dict:
+    if params["retention"] == 0.0 and params["limit"] == 0.0:
+        rein = {"type": "none"}
+    else:
+        rein = {"type": "xol", "retention": params["retention"], "limit": params["limit"]}
+
+    # Capital not needed for VaR, but you can include if you want ruin model later
+    capital = 200000.0
+
+    out = simulate_gross_net(
+        n_sims=n_sims,
+        freq_lambda=params["freq_lambda"],
+        sev_mu=params["sev_mu"],
+        sev_sigma=params["sev_sigma"],
+        capital=capital,
+        reinsurance=rein,
+        seed=int(params["sim_seed"]),
+    )
+
+    return {
+        "scenario": int(params["scenario"]),
+        **{k: params[k] for k in FEATURES},
+        "gross_VaR99": out["gross"]["metrics"]["VaR99"],
+        "net_VaR99": out["net"]["metrics"]["VaR99"],
+    }
+
+
+def _checkpoint_manifest(cfg: TrainConfig) -> dict:
+    # Only the fields that determine the rows; workers/batching may change on resume
+    return {k: v for k, v in asdict(cfg).items() if k in ("n_scenarios", "n_sims_per_scenario", "seed")}
+
+
+def _sync_checkpoint_from_gcs(cfg: TrainConfig) -> None:
+    client = get_storage_client()
+    prefix = f"{cfg.model_prefix}/train_checkpoint/"
+    for blob in client.list_blobs(cfg.bucket, prefix=prefix):
+        local = os.path.join(cfg.checkpoint_dir, os.path.basename(blob.name))
+        if not os.path.exists(local):
+            blob.download_to_filename(local)
+
+
+def load_checkpoint(cfg: TrainConfig) -> pd.DataFrame:
+    """Rows already computed by an earlier (interrupted) run with the same config."""
+    os.makedirs(cfg.checkpoint_dir, exist_ok=True)
+    if cfg.bucket:
+        _sync_checkpoint_from_gcs(cfg)
+
+    manifest_path = os.path.join(cfg.checkpoint_dir, "manifest.json")
+    manifest = _checkpoint_manifest(cfg)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) != manifest:
+                raise RuntimeError(
+                    f"Checkpoint in {cfg.checkpoint_dir} was written for a different config"
+                )
+    else:
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+        if cfg.bucket:
+            upload_to_gcs(cfg.bucket, manifest_path, f"{cfg.model_prefix}/train_checkpoint/manifest.json")
+
+    parts = sorted(glob.glob(os.path.join(cfg.checkpoint_dir, "part-*.parquet")))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+
+
+def write_checkpoint_part(cfg: TrainConfig, rows: list) -> None:
+    first = min(r["scenario"] for r in rows)
+    name = f"part-{first:06d}-{len(rows):04d}.parquet"
+    path = os.path.join(cfg.checkpoint_dir, name)
+    tmp = f"{path}.tmp"
+    pd.DataFrame(rows).to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    if cfg.bucket:
+        upload_to_gcs(cfg.bucket, path, f"{cfg.model_prefix}/train_checkpoint/{name}")
+
+
+def generate_dataset(cfg: TrainConfig) -> pd.DataFrame:
+    """
+    Simulate every scenario on a process pool, checkpointing finished rows
+    every `checkpoint_every` scenarios so an interrupted job resumes where it
+    stopped. Rows are returned in scenario order.
+    """
+    scenarios = sample_scenarios(cfg.n_scenarios, cfg.seed)
+    done = load_checkpoint(cfg)
+    done_ids = set(done["scenario"]) if len(done) else set()
+    pending = scenarios[~scenarios["scenario"].isin(done_ids)].to_dict("records")
+    print(f"{len(done_ids)} scenarios restored from checkpoint, {len(pending)} to simulate.")
+
+    buffer = []
+    with ProcessPoolExecutor(max_workers=cfg.workers) as pool:
+        futures = [pool.submit(run_scenario, p, cfg.n_sims_per_scenario) for p in pending]
+        for fut in as_completed(futures):
+            buffer.append(fut.result())
+            if len(buffer) >= cfg.checkpoint_every:
+                write_checkpoint_part(cfg, buffer)
+                buffer = []
+    if buffer:
+        write_checkpoint_part(cfg, buffer)
+
+    df = load_checkpoint(cfg)
+    return df.drop_duplicates("scenario").sort_values("scenario").reset_index(drop=True)
+
+
 def main():
     cfg = TrainConfig(
         n_scenarios=int(os.environ.get("N_SCENARIOS", "400")),
@@ -65,53 +204,14 @@ def main():
         seed=int(os.environ.get("SEED", "123")),
         bucket=os.environ["ARTIFACT_BUCKET"],
         model_prefix=os.environ.get("MODEL_PREFIX", "models"),
+        workers=int(os.environ.get("TRAIN_WORKERS", os.cpu_count() or 1)),
+        checkpoint_dir=os.environ.get("CHECKPOINT_DIR", "/tmp/train_checkpoint"),
+        checkpoint_every=int(os.environ.get("CHECKPOINT_EVERY", "20")),
     )
 
-    rng = np.random.default_rng(cfg.seed)
-
-    rows = []
-    # Sample scenarios
-    for i in range(cfg.n_scenarios):
-        freq_lambda = float(rng.uniform(0.05, 0.6))
-        sev_mu = float(rng.uniform(9.5, 10.8))
-        sev_sigma = float(rng.uniform(0.6, 1.4))
-
-        # XoL parameters (sometimes none)
-        if rng.random() < 0.3:
-            rein = {"type": "none"}
-            retention = 0.0
-            limit = 0.0
-        else:
-            retention = float(rng.choice([5000, 10000, 20000, 30000, 50000]))
-            limit = float(rng.choice([25000, 50000, 100000, 200000]))
-            rein = {"type": "xol", "retention": retention, "limit": limit}
-
-        # Capital not needed for VaR, but you can include if you want ruin model later
-        capital = 200000.0
-
-        out = simulate_gross_net(
-            n_sims=cfg.n_sims_per_scenario,
-            freq_lambda=freq_lambda,
-            sev_mu=sev_mu,
-            sev_sigma=sev_sigma,
-            capital=capital,
-            reinsurance=rein,
-            seed=int(cfg.seed + i),
-        )
-
-        rows.append({
-            "freq_lambda": freq_lambda,
-            "sev_mu": sev_mu,
-            "sev_sigma": sev_sigma,
-            "retention": retention,
-            "limit": limit,
-            "gross_VaR99": out["gross"]["metrics"]["VaR99"],
-            "net_VaR99": out["net"]["metrics"]["VaR99"],
-        })
-
-    df = pd.DataFrame(rows)
-
-    X = df[["freq_lambda", "sev_mu", "sev_sigma", "retention", "limit"]]
+    df = generate_dataset(cfg)
+
+    X = df[FEATURES]
     y_gross = df["gross_VaR99"]
     y_net = df["net_VaR99"]
 
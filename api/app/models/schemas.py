@@ -1,15 +1,73 @@
-from pydantic import BaseModel, Field
-from typing import Literal, Optional, Dict, Any
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional, Dict, Any, List
+
+# Simulation parameters the worker assumes when the request config omits them
+SIM_CONFIG_DEFAULTS: Dict[str, Any] = {
+    "freq_lambda": 0.3,
+    "sev_mu": 10.2,
+    "sev_sigma": 1.1,
+    "seed": 42,
+    "reinsurance": {"type": "none"},
+}
+
+# Years one job task can simulate within its timeout; larger runs must be
+# sharded over config.shards tasks
+MAX_SIMS_PER_TASK = 500_000
+MAX_SHARDS = 100
+
+# A sweep runs in one task and draws the whole run at once (no chunking):
+# grid points x n_sims years, and n_sims x the largest freq_lambda claims
+MAX_SWEEP_CLAIMS = 20_000_000
 
 class RunCreateRequest(BaseModel):
-    n_sims: int = Field(default=50000, ge=1000, le=500000)
+    n_sims: int = Field(default=50000, ge=1000, le=MAX_SIMS_PER_TASK * MAX_SHARDS)
     capital: float = Field(default=1_000_000, gt=0)
     # Keep config flexible for now; you’ll firm this up Day 2
     config: Dict[str, Any] = Field(default_factory=dict)
 
+    @model_validator(mode="after")
+    def check_shards(self):
+        shards = self.config.get("shards") or 1
+        if not isinstance(shards, int) or not 1 <= shards <= MAX_SHARDS:
+            raise ValueError(f"config.shards must be an integer from 1 to {MAX_SHARDS}")
+        if self.n_sims > MAX_SIMS_PER_TASK * shards:
+            needed = -(-self.n_sims // MAX_SIMS_PER_TASK)
+            raise ValueError(
+                f"n_sims above {MAX_SIMS_PER_TASK} per task needs config.shards >= {needed}"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_sweep(self):
+        sweep = self.config.get("sweep")
+        if not isinstance(sweep, dict):
+            return self
+        points = 1
+        for values in sweep.values():
+            if isinstance(values, list) and values:
+                points *= len(values)
+        if points * self.n_sims > MAX_SIMS_PER_TASK:
+            raise ValueError(
+                f"A sweep simulates grid points x n_sims years in one task: "
+                f"{points} points x {self.n_sims} is above {MAX_SIMS_PER_TASK}"
+            )
+        base_lambda = self.config.get("freq_lambda", SIM_CONFIG_DEFAULTS["freq_lambda"])
+        lambdas = sweep.get("freq_lambda") or [base_lambda]
+        try:
+            max_lambda = max(float(lam) for lam in lambdas)
+        except (TypeError, ValueError):
+            return self
+        if max_lambda * self.n_sims > MAX_SWEEP_CLAIMS:
+            raise ValueError(
+                f"A sweep draws n_sims x the largest freq_lambda claims at once: "
+                f"above {MAX_SWEEP_CLAIMS}, lower n_sims or freq_lambda"
+            )
+        return self
+
 class RunResponse(BaseModel):
     run_id: str
     status: Literal["queued", "running", "done", "failed"]
+    cache_hit: bool = False
 
 class RunDoc(BaseModel):
     run_id: str
@@ -18,3 +76,31 @@ class RunDoc(BaseModel):
     request: RunCreateRequest
     results: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    cache_hit: bool = False
+
+
+class RunListResponse(BaseModel):
+    runs: List[Dict[str, Any]]
+    # Pass as `cursor` to get the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class QuoteRow(BaseModel):
+    freq_lambda: float = Field(gt=0)
+    sev_mu: float
+    sev_sigma: float = Field(gt=0)
+    # XoL layer; 0/0 means no reinsurance
+    retention: float = Field(default=0.0, ge=0)
+    limit: float = Field(default=0.0, ge=0)
+
+class QuoteRequest(BaseModel):
+    rows: List[QuoteRow] = Field(min_length=1, max_length=10000)
+
+class Quote(BaseModel):
+    gross_VaR99: float
+    net_VaR99: float
+
+class QuoteResponse(BaseModel):
+    quotes: List[Quote]
+    versions: Dict[str, Any]
+    predict_ms: float
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException
+import logging
+import time
+
+from app.models.schemas import QuoteRequest, QuoteResponse, Quote
+from app.services.model_store import load_models, predict_var99
+
+router = APIRouter(prefix="/quote", tags=["quote"])
+
+@router.post("", response_model=QuoteResponse)
+def create_quote(req: QuoteRequest):
+    logger = logging.getLogger(__name__)
+    try:
+        versions = load_models()["versions"]
+    except Exception as e:
+        logger.error("Surrogate models unavailable: %s", e)
+        raise HTTPException(status_code=503, detail=f"Surrogate models unavailable: {e}")
+
+    t0 = time.perf_counter()
+    preds = predict_var99([row.model_dump() for row in req.rows])
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    quotes = [
+        Quote(gross_VaR99=float(g), net_VaR99=float(n))
+        for g, n in zip(preds["gross"], preds["net"])
+    ]
+    return QuoteResponse(quotes=quotes, versions=versions, predict_ms=elapsed_ms)
@@ -1,18 +1,43 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 import logging
+import time
 import traceback
 from datetime import datetime, timezone
-from google.cloud import firestore
 from pydantic import BaseModel
-from typing import Literal
+from typing import List, Literal
 from app.services.run_jobs import run_job
+from app.services.run_executor import get_run_executor
+from app.services.run_events import TERMINAL_STATUSES, get_event_hub
+from app.services.telemetry import DISPATCH_SECONDS, RUNS_DISPATCHED
 import os
 
-from app.models.schemas import RunCreateRequest, RunResponse, RunDoc
-from app.services.firestore import get_db, runs_collection
+from app.models.schemas import RunCreateRequest, RunResponse, RunDoc, RunListResponse
+from app.services.firestore import DESCENDING, field_filter, get_db, runs_collection
+from app.services.result_cache import get_result_cache, is_cacheable, run_cache_key
+from app.services.artifact_store import get_blob_store, open_loss_vector
+from app.core.metrics import query_sorted_losses
 
 router = APIRouter(prefix="/runs", tags=["runs"])
 
+# Fields GET /runs returns unless `fields` asks for others: everything but the
+# heavy result payloads (histograms, per-treaty outputs, loss pointers)
+DEFAULT_LIST_FIELDS = [
+    "run_id",
+    "status",
+    "created_at",
+    "started_at",
+    "finished_at",
+    "error",
+    "cache_hit",
+    "tier",
+    "request",
+    "results.gross.metrics",
+    "results.net.metrics",
+]
+
 @router.post("", response_model=RunResponse)
 def create_run(req: RunCreateRequest):
     logger = logging.getLogger(__name__)
@@ -23,20 +48,71 @@ def create_run(req: RunCreateRequest):
         doc_ref = col.document()  # auto-id
         run_id = doc_ref.id
 
+        request = req.model_dump()
+        # Time-budgeted runs are not reproducible: neither served from nor stored in the cache
+        cache_key = run_cache_key(request) if is_cacheable(request) else None
         payload = {
             "run_id": run_id,
             "status": "queued",
             "created_at": datetime.now(timezone.utc).isoformat(),
-            "request": req.model_dump(),
+            "request": request,
             "results": None,
             "error": None,
+            "cache_key": cache_key,
         }
 
+        # Identical inputs give identical results: complete from the cache
+        cached = get_result_cache().get(cache_key) if cache_key else None
+        if cached is not None:
+            payload.update({
+                "status": "done",
+                "finished_at": payload["created_at"],
+                "results": cached,
+                "cache_hit": True,
+            })
+            doc_ref.set(payload)
+            RUNS_DISPATCHED.inc(tier="cache")
+            return RunResponse(run_id=run_id, status="done", cache_hit=True)
+
+        # Small runs execute in the API's own process pool, the rest as a job
+        executor = get_run_executor()
+        if executor.accepts(request):
+            if not executor.reserve():
+                RUNS_DISPATCHED.inc(tier="rejected")
+                raise HTTPException(
+                    status_code=503,
+                    detail="In-process run queue is full, retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            try:
+                payload["tier"] = "inproc"
+                doc_ref.set(payload)
+                t0 = time.perf_counter()
+                executor.submit(run_id, payload)
+                DISPATCH_SECONDS.observe(time.perf_counter() - t0, tier="inproc")
+            except Exception:
+                executor.release()
+                raise
+            RUNS_DISPATCHED.inc(tier="inproc")
+            return RunResponse(run_id=run_id, status="queued")
+
+        payload["tier"] = "job"
+        shards = int(request["config"].get("shards") or 1)
+        if shards > 1:
+            from app.worker import run_precision
+
+            # Decided once here so every task simulates in the same dtype
+            payload["precision"] = run_precision(request)
         doc_ref.set(payload)
         job_name = os.environ.get("WORKER_JOB_NAME", "risk-lab-worker")
         region = os.environ.get("REGION", "us-central1")
-        run_job(job_name=job_name, region=region, run_id=run_id)
+        t0 = time.perf_counter()
+        run_job(job_name=job_name, region=region, run_id=run_id, task_count=shards)
+        DISPATCH_SECONDS.observe(time.perf_counter() - t0, tier="job")
+        RUNS_DISPATCHED.inc(tier="job")
         return RunResponse(run_id=run_id, status="queued")
+    except HTTPException:
+        raise
     except Exception as e:
         # Log full traceback to server logs for debugging
         logger.error("Failed to create run: %s", e)
@@ -44,6 +120,60 @@ def create_run(req: RunCreateRequest):
         # Return a sanitized error to the client
         raise HTTPException(status_code=500, detail=f"Failed to create run: {str(e)}")
 
+@router.get("", response_model=RunListResponse)
+def list_runs(
+    status: List[Literal["queued", "running", "done", "failed"]] = Query(default=[]),
+    created_after: str | None = None,
+    created_before: str | None = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = None,
+    fields: str | None = None,
+):
+    """
+    Runs newest first, `limit` per page. Filter by status (repeatable) and a
+    created_at range (ISO timestamps, after inclusive / before exclusive).
+    `fields` is a comma-separated list of field paths ("*" for whole
+    documents); pass the returned next_cursor to continue.
+    """
+    db = get_db()
+    col = runs_collection(db)
+    query = col
+
+    if len(status) == 1:
+        query = query.where(filter=field_filter(db, "status", "==", status[0]))
+    elif status:
+        query = query.where(filter=field_filter(db, "status", "in", list(status)))
+    if created_after:
+        query = query.where(filter=field_filter(db, "created_at", ">=", created_after))
+    if created_before:
+        query = query.where(filter=field_filter(db, "created_at", "<", created_before))
+    query = query.order_by("created_at", direction=DESCENDING)
+
+    if cursor:
+        last = col.document(cursor).get()
+        if not last.exists:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.start_after(last)
+
+    if fields != "*":
+        projection = [f.strip() for f in fields.split(",") if f.strip()] if fields else DEFAULT_LIST_FIELDS
+        query = query.select(projection)
+
+    # One extra document tells whether there is a next page
+    snaps = list(query.limit(limit + 1).stream())
+    page = snaps[:limit]
+    runs = [{**(snap.to_dict() or {}), "run_id": snap.id} for snap in page]
+    next_cursor = page[-1].id if len(snaps) > limit else None
+    return RunListResponse(runs=runs, next_cursor=next_cursor)
+
+@router.get("/cache/stats")
+def cache_stats():
+    return get_result_cache().stats()
+
+@router.get("/executor/stats")
+def executor_stats():
+    return get_run_executor().stats()
+
 @router.get("/{run_id}", response_model=RunDoc)
 def get_run(run_id: str):
     logger = logging.getLogger(__name__)
@@ -60,6 +190,9 @@ def get_run(run_id: str):
 
     data = doc.to_dict()
 
+    if data.get("status") == "done" and data.get("results") and data.get("cache_key"):
+        get_result_cache().warm(data["cache_key"], data["results"])
+
     # Basic shape validation
     try:
         return RunDoc(
@@ -69,12 +202,113 @@ def get_run(run_id: str):
             request=RunCreateRequest(**data["request"]),
             results=data.get("results"),
             error=data.get("error"),
+            cache_hit=bool(data.get("cache_hit", False)),
         )
     except Exception as e:
         logger.error("Invalid run document shape: %s", e)
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Invalid run document: {e}")
 
+@router.get("/{run_id}/artifact")
+def get_run_artifact(run_id: str):
+    """Stream the run's binary result arrays (npz, see results.artifact.arrays)."""
+    db = get_db()
+    doc = runs_collection(db).document(run_id).get()
+    if not doc.exists:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    pointer = (doc.to_dict().get("results") or {}).get("artifact")
+    store = get_blob_store()
+    if not pointer or store is None:
+        raise HTTPException(status_code=404, detail="Run has no artifact")
+
+    try:
+        f = store.open(pointer["key"])
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    def chunks():
+        with f:
+            while chunk := f.read(1 << 20):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{pointer["key"]}"'},
+    )
+
+@router.get("/{run_id}/metrics")
+def query_run_metrics(
+    run_id: str,
+    capital: List[float] = Query(default=[]),
+    q: List[float] = Query(default=[]),
+    series: str | None = None,
+):
+    """
+    Ruin probability at any `capital` and VaR/TVaR at any level `q` from the
+    run's persisted sorted losses (config.persist_losses), without
+    re-simulating. `series` restricts the answer to e.g. "net".
+    """
+    db = get_db()
+    doc = runs_collection(db).document(run_id).get()
+    if not doc.exists:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    losses = (doc.to_dict().get("results") or {}).get("losses")
+    store = get_blob_store()
+    if not losses or store is None:
+        raise HTTPException(status_code=404, detail="Run has no persisted loss vectors")
+    if series is not None:
+        if series not in losses:
+            raise HTTPException(status_code=404, detail=f"Unknown series: {series}")
+        losses = {series: losses[series]}
+
+    out = {"run_id": run_id}
+    try:
+        for path, entry in losses.items():
+            S_sorted, prefix_sum = open_loss_vector(store, entry)
+            out[path] = query_sorted_losses(S_sorted, prefix_sum, q, capital)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return out
+
+@router.get("/{run_id}/events")
+async def run_events(run_id: str, request: Request):
+    """
+    Server-Sent Events stream of the run's status and progress: one "status"
+    event per change, ending after done/failed. Clients then fetch the
+    results once with GET /runs/{run_id} instead of polling.
+    """
+    queue = get_event_hub().subscribe(get_db(), run_id)
+
+    async def stream():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    yield f"event: error\ndata: {json.dumps({'detail': 'Run not found'})}\n\n"
+                    return
+                yield f"event: status\ndata: {json.dumps(event)}\n\n"
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+        finally:
+            get_event_hub().unsubscribe(run_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 class StatusUpdateRequest(BaseModel):
     status: Literal["queued", "running", "done", "failed"]
     error: str | None = None
@@ -0,0 +1,225 @@
+import copy
+import io
+import os
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Tuple
+
+import numpy as np
+
+# Result arrays moved out of the run document into the binary artifact, by
+# the key of the dict holding them. Anything else (config echoes such as
+# quantiles or capital_levels, per-line contributions) stays inline as is;
+# loss vectors never reach the document (write_loss_vectors).
+ARRAY_FIELDS = {"histogram": ("counts", "bins")}
+
+
+class LocalBlobStore:
+    """Run artifacts as files under a local directory (development)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def uri(self, key: str) -> str:
+        return f"file://{os.path.abspath(self._path(key))}"
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def open(self, key: str) -> BinaryIO:
+        path = self._path(key)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Artifact not found: {key}")
+        return open(path, "rb")
+
+    def local_path(self, key: str) -> str:
+        path = self._path(key)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Artifact not found: {key}")
+        return path
+
+
+class GCSBlobStore:
+    """Run artifacts as objects in gs://bucket/prefix."""
+
+    def __init__(self, bucket: str, prefix: str = "runs", cache_dir: str = "/tmp/run_artifacts"):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache_dir = cache_dir
+
+    def _blob(self, key: str):
+        from google.cloud import storage
+
+        return storage.Client().bucket(self.bucket).blob(f"{self.prefix}/{key}")
+
+    def uri(self, key: str) -> str:
+        return f"gs://{self.bucket}/{self.prefix}/{key}"
+
+    def put(self, key: str, data: bytes) -> None:
+        self._blob(key).upload_from_string(data, content_type="application/octet-stream")
+
+    def open(self, key: str) -> BinaryIO:
+        blob = self._blob(key)
+        if not blob.exists():
+            raise FileNotFoundError(f"Artifact not found: {key}")
+        return blob.open("rb")
+
+    def local_path(self, key: str) -> str:
+        # Artifacts are immutable once written, so a local copy never goes stale
+        path = os.path.join(self.cache_dir, key)
+        if not os.path.exists(path):
+            blob = self._blob(key)
+            if not blob.exists():
+                raise FileNotFoundError(f"Artifact not found: {key}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            blob.download_to_filename(tmp)
+            os.replace(tmp, path)
+        return path
+
+
+@lru_cache(maxsize=1)
+def get_blob_store():
+    """
+    RUN_ARTIFACT_BACKEND: local (default, RUN_ARTIFACT_DIR), gcs
+    (RUN_ARTIFACT_BUCKET / RUN_ARTIFACT_PREFIX, mirrored into
+    RUN_ARTIFACT_CACHE_DIR for memory-mapping) or none to keep results inline.
+    """
+    backend = os.environ.get("RUN_ARTIFACT_BACKEND", "local").lower()
+    if backend == "none":
+        return None
+    if backend == "local":
+        return LocalBlobStore(os.environ.get("RUN_ARTIFACT_DIR", "/tmp/run_artifacts"))
+    if backend == "gcs":
+        return GCSBlobStore(
+            bucket=os.environ["RUN_ARTIFACT_BUCKET"],
+            prefix=os.environ.get("RUN_ARTIFACT_PREFIX", "runs"),
+            cache_dir=os.environ.get("RUN_ARTIFACT_CACHE_DIR", "/tmp/run_artifacts"),
+        )
+    raise ValueError(f"Unsupported RUN_ARTIFACT_BACKEND: {backend}")
+
+
+def split_arrays(results: Any, path: str = "") -> Tuple[Any, Dict[str, np.ndarray]]:
+    """
+    Separate the ARRAY_FIELDS lists from a results dict. Returns the summary
+    with those lists removed and {"gross/histogram/counts": array, ...}.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    if isinstance(results, dict):
+        summary = {}
+        fields = ARRAY_FIELDS.get(path.rsplit("/", 1)[-1], ())
+        for key, value in results.items():
+            sub = f"{path}/{key}" if path else str(key)
+            if key in fields and isinstance(value, list):
+                arrays[sub] = np.asarray(value)
+            else:
+                summary[key], nested = split_arrays(value, sub)
+                arrays.update(nested)
+        return summary, arrays
+    if isinstance(results, list):
+        summary = []
+        for i, value in enumerate(results):
+            item, nested = split_arrays(value, f"{path}/{i}")
+            summary.append(item)
+            arrays.update(nested)
+        return summary, arrays
+    return results, arrays
+
+
+def join_arrays(summary: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Inverse of split_arrays: put every array back at its path as a list."""
+    results = copy.deepcopy(summary)
+    for path, array in arrays.items():
+        *parents, leaf = path.split("/")
+        node = results
+        for part in parents:
+            node = node[int(part)] if isinstance(node, list) else node[part]
+        node[leaf] = array.tolist()
+    return results
+
+
+def write_run_artifact(store, run_id: str, results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Move the arrays of `results` into a compressed npz stored as <run_id>.npz
+    and return the summary with an "artifact" pointer to it.
+    """
+    summary, arrays = split_arrays(results)
+    if not arrays:
+        return results
+
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    data = buf.getvalue()
+
+    key = f"{run_id}.npz"
+    store.put(key, data)
+    summary["artifact"] = {
+        "key": key,
+        "uri": store.uri(key),
+        "format": "npz",
+        "bytes": len(data),
+        "arrays": sorted(arrays),
+    }
+    return summary
+
+
+def read_run_artifact(store, summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Full results (summary plus arrays) of a run written by write_run_artifact."""
+    pointer = summary.get("artifact")
+    if not pointer:
+        return summary
+    with store.open(pointer["key"]) as f:
+        with np.load(io.BytesIO(f.read())) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+    results = join_arrays(summary, arrays)
+    results.pop("artifact", None)
+    return results
+
+
+def write_loss_vectors(store, run_id: str, losses: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    Persist sorted loss vectors as <run_id>/<path>.npy plus their prefix sums
+    (<path>.prefix.npy) and return {path: {key, prefix_key, n}} pointers.
+    """
+    pointers = {}
+    for path, S_sorted in losses.items():
+        prefix = np.concatenate([[0.0], np.cumsum(S_sorted)])
+        entry = {"n": int(S_sorted.size)}
+        for field, array in (("key", S_sorted), ("prefix_key", prefix)):
+            buf = io.BytesIO()
+            np.save(buf, np.ascontiguousarray(array, dtype=np.float64))
+            key = f"{run_id}/{path}.npy" if field == "key" else f"{run_id}/{path}.prefix.npy"
+            store.put(key, buf.getvalue())
+            entry[field] = key
+        pointers[path] = entry
+    return pointers
+
+
+def put_arrays(store, key: str, arrays: Dict[str, np.ndarray]) -> None:
+    """Store named arrays as an (uncompressed) npz, e.g. a sharded run's partial."""
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    store.put(key, buf.getvalue())
+
+
+def get_arrays(store, key: str) -> Dict[str, np.ndarray]:
+    with store.open(key) as f:
+        with np.load(io.BytesIO(f.read())) as npz:
+            return {name: npz[name] for name in npz.files}
+
+
+@lru_cache(maxsize=64)
+def _mmap(path: str) -> np.ndarray:
+    return np.load(path, mmap_mode="r")
+
+
+def open_loss_vector(store, entry: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Memory-mapped (sorted losses, prefix sums) of one persisted vector."""
+    return _mmap(store.local_path(entry["key"])), _mmap(store.local_path(entry["prefix_key"]))
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict
+
+# requests and google.auth are imported on first use, not at startup
+if TYPE_CHECKING:
+    import requests
+
+# Refresh cached access tokens this long before they expire
+TOKEN_REFRESH_MARGIN_S = 300
+
+CLOUD_PLATFORM_SCOPE = "https://www.googleapis.com/auth/cloud-platform"
+
+
+class ClientPool:
+    """
+    Long-lived clients shared by every request of the API process: one
+    Firestore client, one set of Google credentials whose token is refreshed
+    only near expiry, and one pooled HTTP session (keep-alive connections)
+    for Google REST APIs. Created lazily, closed at shutdown.
+    """
+
+    def __init__(self, http_pool_size: int = 10):
+        self.http_pool_size = http_pool_size
+        self._lock = threading.Lock()
+        self._db = None
+        self._creds = None
+        self._session: "requests.Session | None" = None
+        self._created: Dict[str, float] = {}
+        self.db_requests = 0
+        self.token_requests = 0
+        self.token_refreshes = 0
+
+    def db(self) -> Any:
+        with self._lock:
+            self.db_requests += 1
+            if self._db is None:
+                from app.services.firestore import create_db
+
+                self._db = create_db()
+                self._created["db"] = time.time()
+            return self._db
+
+    def session(self) -> "requests.Session":
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.http_pool_size, pool_maxsize=self.http_pool_size
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+                self._created["session"] = time.time()
+            return self._session
+
+    def _token_expires_in(self) -> float | None:
+        expiry = getattr(self._creds, "expiry", None)
+        if expiry is None:
+            return None
+        # google-auth keeps expiry as a naive UTC datetime
+        return (expiry.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)).total_seconds()
+
+    def access_token(self) -> str:
+        """Bearer token for Google APIs, refreshed only when close to expiry."""
+        session = self.session()
+        with self._lock:
+            self.token_requests += 1
+            if self._creds is None:
+                from google.auth import default
+
+                self._creds, _ = default(scopes=[CLOUD_PLATFORM_SCOPE])
+                self._created["credentials"] = time.time()
+
+            expires_in = self._token_expires_in()
+            if self._creds.token is None or expires_in is None or expires_in < TOKEN_REFRESH_MARGIN_S:
+                from google.auth.transport.requests import Request
+
+                self._creds.refresh(Request(session=session))
+                self.token_refreshes += 1
+            return self._creds.token
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            http = {"pool_size": self.http_pool_size, "hosts": []}
+            if self._session is not None:
+                for adapter in set(self._session.adapters.values()):
+                    for key in adapter.poolmanager.pools.keys():
+                        pool = adapter.poolmanager.pools[key]
+                        http["hosts"].append({
+                            "host": f"{key.key_scheme}://{key.key_host}",
+                            "connections_opened": pool.num_connections,
+                            "requests": pool.num_requests,
+                            "idle": pool.pool.qsize() if pool.pool is not None else 0,
+                        })
+            expires_in = self._token_expires_in()
+            return {
+                "db": {"open": self._db is not None, "requests": self.db_requests},
+                "credentials": {
+                    "loaded": self._creds is not None,
+                    "token_requests": self.token_requests,
+                    "refreshes": self.token_refreshes,
+                    "expires_in_s": None if expires_in is None else round(expires_in),
+                },
+                "http": http,
+                "created_at": dict(self._created),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            db, self._db = self._db, None
+            session, self._session = self._session, None
+            self._creds = None
+        if session is not None:
+            session.close()
+        if db is not None and hasattr(db, "close"):
+            db.close()
+
+
+@lru_cache(maxsize=1)
+def get_client_pool() -> ClientPool:
+    """HTTP_POOL_SIZE sets the keep-alive connections per host (default 10)."""
+    return ClientPool(http_pool_size=int(os.environ.get("HTTP_POOL_SIZE", "10")))
@@ -2,79 +2,45 @@ import os
 import json
 from typing import Any
 from typing import Optional
-from google.cloud.firestore import Client
+from typing import Sequence
 
-try:
-    from google.cloud import firestore  # type: ignore
-except Exception:  # pragma: no cover - optional dependency in local dev
-    firestore = None  # type: ignore
+# DESCENDING has the same value as google.cloud.firestore.Query.DESCENDING,
+# so callers can order either backend without importing the SDK
+from app.services.local_store import DESCENDING, LocalClient, LocalFieldFilter  # noqa: F401
 
-try:
-    from google.oauth2 import service_account  # type: ignore
-except Exception:  # pragma: no cover - optional dependency in local dev
-    service_account = None  # type: ignore
 
+def get_db() -> Any:
+    """The process-wide client from create_db(), built on first use."""
+    from app.services.clients import get_client_pool
 
-class _LocalDocumentSnapshot:
-    def __init__(self, data: Any):
-        self._data = data
-        self.exists = data is not None
-
-    def to_dict(self):
-        return self._data
-
-
-class _LocalDocumentRef:
-    def __init__(self, collection: "_LocalCollection", doc_id: str):
-        self.collection = collection
-        self.id = doc_id
-
-    def set(self, payload: dict):
-        self.collection._store[self.id] = payload
-
-    def get(self):
-        data = self.collection._store.get(self.id)
-        return _LocalDocumentSnapshot(data)
-
-
-class _LocalCollection:
-    def __init__(self, name: str, root_store: dict):
-        self.name = name
-        # store is a dict: doc_id -> payload
-        self._store = root_store.setdefault(name, {})
-
-    def document(self, doc_id: str | None = None) -> _LocalDocumentRef:
-        import uuid
-
-        if doc_id is None:
-            doc_id = uuid.uuid4().hex
-        return _LocalDocumentRef(self, doc_id)
-
-
-class _LocalClient:
-    def __init__(self):
-        # root: collection_name -> {doc_id: payload}
-        self._root: dict = {}
-
-    def collection(self, name: str) -> _LocalCollection:
-        return _LocalCollection(name, self._root)
+    return get_client_pool().db()
 
 
-def get_db() -> Any:
-    """Return a Firestore client or a lightweight local in-memory client.
+def create_db() -> Any:
+    """Return a Firestore client or a local SQLite-backed client.
 
-    To force local in-memory mode set the env var `RISK_ASSER_LOCAL=1`.
+    To force local mode set the env var `RISK_ASSER_LOCAL=1`; the database
+    file is RISK_ASSER_LOCAL_DB (default /tmp/risk-lab-local.db).
     """
     # Prefer the standard Google env var, but allow a project-specific fallback.
     project_id = os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("RISK_ASSER_PROJECT")
 
     # If the user explicitly asked for local mode, return the local client.
     if os.environ.get("RISK_ASSER_LOCAL", "").lower() in ("1", "true", "yes"):
-        return _LocalClient()
+        return LocalClient(os.environ.get("RISK_ASSER_LOCAL_DB", "/tmp/risk-lab-local.db"))
 
-    if firestore is None:
+    # The SDKs are imported here, on first use, so processes on the local
+    # store (and cold starts before the first database call) never load them
+    try:
+        from google.cloud import firestore  # type: ignore
+    except Exception:  # pragma: no cover - optional dependency in local dev
         raise RuntimeError("google-cloud-firestore is not available in this environment")
 
+    try:
+        from google.oauth2 import service_account  # type: ignore
+    except Exception:  # pragma: no cover - optional dependency in local dev
+        service_account = None  # type: ignore
+
     try:
         # First, check for explicit service account credentials provided via
         # environment (either a file path or raw JSON). This allows local
@@ -112,7 +78,38 @@ def get_db() -> Any:
 def runs_collection(db: Any):
     return db.collection("runs")
 
-def update_run_status(db: Client, run_id: str, status: str, results: Optional[dict] = None, error: Optional[str] = None):
+
+def field_filter(db: Any, field_path: str, op_string: str, value: Any) -> Any:
+    """A where(filter=...) argument for the backend behind `db`."""
+    if isinstance(db, LocalClient):
+        return LocalFieldFilter(field_path, op_string, value)
+    from google.cloud.firestore_v1.base_query import FieldFilter
+
+    return FieldFilter(field_path, op_string, value)
+
+def update_if_status(db: Any, run_id: str, statuses: Sequence[str], patch: dict) -> bool:
+    """
+    Apply `patch` to a run only if its status is one of `statuses`, as one
+    atomic read-then-write (a transaction on Firestore). Returns whether it
+    was applied.
+    """
+    ref = runs_collection(db).document(run_id)
+    if isinstance(db, LocalClient):
+        return ref.update_if("status", tuple(statuses), patch)
+
+    from google.cloud import firestore
+
+    @firestore.transactional
+    def apply(transaction) -> bool:
+        snap = ref.get(transaction=transaction)
+        if (snap.to_dict() or {}).get("status") not in statuses:
+            return False
+        transaction.update(ref, patch)
+        return True
+
+    return apply(db.transaction())
+
+def update_run_status(db: Any, run_id: str, status: str, results: Optional[dict] = None, error: Optional[str] = None):
     """Update the status, results, and error fields of a run document."""
     update = {"status": status}
 
@@ -0,0 +1,421 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# Documents are JSON; status and created_at get expression indexes so run
+# listings by status / recency do not scan the table
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS documents_status
+    ON documents (collection, json_extract(data, '$.status'), json_extract(data, '$.created_at'));
+CREATE INDEX IF NOT EXISTS documents_created_at
+    ON documents (collection, json_extract(data, '$.created_at'));
+"""
+
+_OPERATORS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "in": "IN"}
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+
+class LocalFieldFilter:
+    """Stand-in for Firestore's FieldFilter in where(filter=...)."""
+
+    def __init__(self, field_path: str, op_string: str, value: Any):
+        self.field_path = field_path
+        self.op_string = op_string
+        self.value = value
+
+
+def _field_expr(field: str) -> str:
+    if not all(part.replace("_", "").isalnum() for part in field.split(".")):
+        raise ValueError(f"Unsupported field path: {field}")
+    return f"json_extract(data, '$.{field}')"
+
+
+def _set_path(data: Dict[str, Any], path: str, value: Any) -> None:
+    # Firestore update(): "a.b" addresses a nested field
+    *parents, leaf = path.split(".")
+    node = data
+    for part in parents:
+        child = node.get(part)
+        if not isinstance(child, dict):
+            child = node[part] = {}
+        node = child
+    node[leaf] = value
+
+
+def _deep_merge(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _deep_merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+class LocalDocumentSnapshot:
+    def __init__(self, reference: "LocalDocumentRef", data: Dict[str, Any] | None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self) -> Dict[str, Any] | None:
+        return self._data
+
+    def get(self, field: str) -> Any:
+        node: Any = self._data or {}
+        for part in field.split("."):
+            node = node.get(part) if isinstance(node, dict) else None
+        return node
+
+
+class LocalDocumentRef:
+    def __init__(self, collection: "LocalCollection", doc_id: str):
+        self.collection = collection
+        self.id = doc_id
+
+    def _read(self, conn: sqlite3.Connection) -> Dict[str, Any] | None:
+        row = conn.execute(
+            "SELECT data FROM documents WHERE collection = ? AND id = ?",
+            (self.collection.name, self.id),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _write(self, conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)",
+            (self.collection.name, self.id, json.dumps(data)),
+        )
+
+    def get(self) -> LocalDocumentSnapshot:
+        return LocalDocumentSnapshot(self, self._read(self.collection.client._conn()))
+
+    def set(self, payload: Dict[str, Any], merge: bool = False) -> None:
+        with self.collection.client._transaction() as conn:
+            data = payload
+            if merge:
+                data = _deep_merge(self._read(conn) or {}, payload)
+            self._write(conn, data)
+
+    def update(self, patch: Dict[str, Any]) -> None:
+        """Merge `patch` (dotted keys address nested fields); the doc must exist."""
+        with self.collection.client._transaction() as conn:
+            data = self._read(conn)
+            if data is None:
+                raise KeyError(f"No document to update: {self.collection.name}/{self.id}")
+            for path, value in patch.items():
+                _set_path(data, path, value)
+            self._write(conn, data)
+
+    def update_if(self, field: str, allowed: Tuple[Any, ...], patch: Dict[str, Any]) -> bool:
+        """update() only when `field` currently holds one of `allowed`, atomically."""
+        with self.collection.client._transaction() as conn:
+            data = self._read(conn)
+            if data is None:
+                raise KeyError(f"No document to update: {self.collection.name}/{self.id}")
+            if LocalDocumentSnapshot(self, data).get(field) not in allowed:
+                return False
+            for path, value in patch.items():
+                _set_path(data, path, value)
+            self._write(conn, data)
+            return True
+
+    def on_snapshot(self, callback: Callable) -> "LocalWatch":
+        """Firestore-style listener: callback([snapshot], changes, read_time) on every change."""
+        return self.collection.client._watcher().watch(self, callback)
+
+    def delete(self) -> None:
+        with self.collection.client._transaction() as conn:
+            conn.execute(
+                "DELETE FROM documents WHERE collection = ? AND id = ?",
+                (self.collection.name, self.id),
+            )
+
+
+def _project(data: Dict[str, Any], field_paths: Tuple[str, ...]) -> Dict[str, Any]:
+    # Firestore select(): keep only these (possibly nested) fields
+    out: Dict[str, Any] = {}
+    for path in field_paths:
+        node: Any = data
+        for part in path.split("."):
+            if not isinstance(node, dict) or part not in node:
+                break
+            node = node[part]
+        else:
+            _set_path(out, path, node)
+    return out
+
+
+class LocalQuery:
+    """
+    Immutable where/order_by/limit/start_after/select query over one
+    collection. Like Firestore, results are ordered by document id after the
+    explicit orderings, which makes start_after cursors stable.
+    """
+
+    def __init__(
+        self,
+        collection: "LocalCollection",
+        filters: Tuple = (),
+        orders: Tuple = (),
+        limit_count: int | None = None,
+        cursor: Tuple | None = None,
+        projection: Tuple[str, ...] | None = None,
+    ):
+        self.collection = collection
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit_count
+        self._cursor = cursor
+        self._projection = projection
+
+    def _copy(self, **changes) -> "LocalQuery":
+        state = dict(
+            filters=self._filters,
+            orders=self._orders,
+            limit_count=self._limit,
+            cursor=self._cursor,
+            projection=self._projection,
+        )
+        state.update(changes)
+        return LocalQuery(self.collection, **state)
+
+    def where(
+        self,
+        field_path: str | None = None,
+        op_string: str | None = None,
+        value: Any = None,
+        filter: Any = None,
+    ) -> "LocalQuery":
+        # Accepts where("status", "==", "done") and where(filter=FieldFilter(...))
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported operator: {op_string}")
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "LocalQuery":
+        if direction not in (ASCENDING, DESCENDING):
+            raise ValueError(f"Unsupported direction: {direction}")
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "LocalQuery":
+        return self._copy(limit_count=int(count))
+
+    def select(self, field_paths: List[str]) -> "LocalQuery":
+        return self._copy(projection=tuple(field_paths))
+
+    def start_after(self, document: "LocalDocumentSnapshot") -> "LocalQuery":
+        """Continue after `document` in the current ordering (set orderings first)."""
+        values = tuple(document.get(field) for field, _ in self._orders)
+        return self._copy(cursor=(values, document.id))
+
+    def _sql(self) -> Tuple[str, List[Any]]:
+        sql = "SELECT id, data FROM documents WHERE collection = ?"
+        params: List[Any] = [self.collection.name]
+        for field, op, value in self._filters:
+            if op == "in":
+                values = list(value)
+                sql += f" AND {_field_expr(field)} IN ({', '.join('?' * len(values))})"
+                params.extend(values)
+            else:
+                sql += f" AND {_field_expr(field)} {_OPERATORS[op]} ?"
+                params.append(value)
+        # Keyset pagination: (order fields..., id) strictly after the cursor
+        keys = [(_field_expr(field), d) for field, d in self._orders]
+        keys.append(("id", self._orders[-1][1] if self._orders else ASCENDING))
+        if self._cursor is not None:
+            values = list(self._cursor[0]) + [self._cursor[1]]
+            clauses = []
+            for i, (expr, d) in enumerate(keys):
+                equal = " AND ".join(f"{e} = ?" for e, _ in keys[:i])
+                after = f"{expr} {'<' if d == DESCENDING else '>'} ?"
+                clauses.append(f"({equal} AND {after})" if equal else f"({after})")
+                params.extend(values[:i] + [values[i]])
+            sql += " AND (" + " OR ".join(clauses) + ")"
+        sql += " ORDER BY " + ", ".join(
+            f"{expr} {'DESC' if d == DESCENDING else 'ASC'}" for expr, d in keys
+        )
+        if self._limit is not None:
+            sql += " LIMIT ?"
+            params.append(self._limit)
+        return sql, params
+
+    def stream(self) -> Iterator[LocalDocumentSnapshot]:
+        sql, params = self._sql()
+        rows = self.collection.client._conn().execute(sql, params).fetchall()
+        for doc_id, data in rows:
+            data = json.loads(data)
+            if self._projection is not None:
+                data = _project(data, self._projection)
+            yield LocalDocumentSnapshot(self.collection.document(doc_id), data)
+
+    def get(self) -> List[LocalDocumentSnapshot]:
+        return list(self.stream())
+
+
+class LocalCollection(LocalQuery):
+    def __init__(self, client: "LocalClient", name: str):
+        self.client = client
+        self.name = name
+        super().__init__(self)
+
+    def document(self, doc_id: str | None = None) -> LocalDocumentRef:
+        return LocalDocumentRef(self, doc_id or uuid.uuid4().hex)
+
+
+class LocalWatch:
+    def __init__(self, watcher: "_Watcher", key: Tuple[str, str], callback: Callable):
+        self._watcher = watcher
+        self.key = key
+        self.callback = callback
+        self.delivered = False
+
+    def unsubscribe(self) -> None:
+        self._watcher.remove(self)
+
+
+class _Watcher:
+    """
+    One polling thread per client for all document listeners. It checks
+    PRAGMA data_version (bumped by commits from any other connection, in any
+    process) and only re-reads the watched documents when it moved, so
+    listeners cost no reads while nothing changes.
+    """
+
+    def __init__(self, client: "LocalClient", poll_s: float):
+        self.client = client
+        self.poll_s = poll_s
+        self._lock = threading.Lock()
+        self._watches: List[LocalWatch] = []
+        self._last: Dict[Tuple[str, str], str | None] = {}
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="local-store-watcher", daemon=True)
+        self._thread.start()
+
+    def watch(self, ref: LocalDocumentRef, callback: Callable) -> LocalWatch:
+        w = LocalWatch(self, (ref.collection.name, ref.id), callback)
+        with self._lock:
+            self._watches.append(w)
+        self._wake.set()  # deliver the current state right away, like Firestore
+        return w
+
+    def remove(self, w: LocalWatch) -> None:
+        with self._lock:
+            if w in self._watches:
+                self._watches.remove(w)
+            if not any(other.key == w.key for other in self._watches):
+                self._last.pop(w.key, None)
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.client.path, timeout=30.0, isolation_level=None)
+        version = None
+        while True:
+            self._wake.wait(self.poll_s)
+            self._wake.clear()
+            with self._lock:
+                watches = list(self._watches)
+            if not watches:
+                continue
+
+            current = conn.execute("PRAGMA data_version").fetchone()[0]
+            fresh = [w for w in watches if not w.delivered]
+            if current == version and not fresh:
+                continue
+            version = current
+
+            keys = sorted({w.key for w in watches})
+            rows = {}
+            for collection, doc_id in keys:
+                row = conn.execute(
+                    "SELECT data FROM documents WHERE collection = ? AND id = ?",
+                    (collection, doc_id),
+                ).fetchone()
+                rows[(collection, doc_id)] = None if row is None else row[0]
+
+            for w in watches:
+                data = rows[w.key]
+                changed = self._last.get(w.key, "") != data
+                if not changed and w.delivered:
+                    continue
+                w.delivered = True
+                ref = self.client.collection(w.key[0]).document(w.key[1])
+                snap = LocalDocumentSnapshot(ref, None if data is None else json.loads(data))
+                try:
+                    w.callback([snap], [], None)
+                except Exception:
+                    pass
+            with self._lock:
+                for key in keys:
+                    self._last[key] = rows[key]
+
+
+class LocalClient:
+    """
+    Firestore-like document store in a SQLite database (WAL mode), for local
+    development and load tests without a cloud dependency.
+
+    Documents are JSON rows keyed by (collection, id); status and created_at
+    have expression indexes. Every process and thread opens its own
+    connection, writes run in IMMEDIATE transactions and readers never block
+    writers, so the API and any number of worker processes can share a file.
+    """
+
+    def __init__(self, path: str, poll_s: float = 0.2):
+        self.path = path
+        self.poll_s = poll_s
+        self._local = threading.local()
+        self._watcher_lock = threading.Lock()
+        self._watcher_thread: _Watcher | None = None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so read-modify-write
+        # updates from different processes never interleave
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def collection(self, name: str) -> LocalCollection:
+        return LocalCollection(self, name)
+
+    def _watcher(self) -> _Watcher:
+        with self._watcher_lock:
+            if self._watcher_thread is None:
+                self._watcher_thread = _Watcher(self, self.poll_s)
+            return self._watcher_thread
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -1,22 +1,116 @@
+import json
 import os
+import threading
 from functools import lru_cache
-from google.cloud import storage
-from joblib import load
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Column order the surrogates were trained on (see app/ml/train_surrogate.py)
+FEATURES = ["freq_lambda", "sev_mu", "sev_sigma", "retention", "limit"]
+
+MODEL_FILES = {"gross": "gross_var99.joblib", "net": "net_var99.joblib"}
+
+
+class GCSArtifactSource:
+    """
+    Model artifacts in gs://bucket/prefix, mirrored into a local cache dir.
+
+    Each local copy has a sidecar recording the blob generation and ETag, so a
+    cold start only re-downloads an artifact that changed in the bucket.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "models", cache_dir: str = "/tmp/models"):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache_dir = cache_dir
+
+    def fetch(self, name: str) -> Dict[str, Any]:
+        from google.cloud import storage
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        local_path = os.path.join(self.cache_dir, name)
+        meta_path = f"{local_path}.meta.json"
+
+        blob = storage.Client().bucket(self.bucket).blob(f"{self.prefix}/{name}")
+        blob.reload()  # metadata only
+        version = {"generation": blob.generation, "etag": blob.etag}
+
+        cached = None
+        if os.path.exists(local_path) and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                cached = json.load(f)
+
+        if cached != version:
+            tmp = f"{local_path}.{os.getpid()}.tmp"
+            blob.download_to_filename(tmp, if_generation_match=blob.generation)
+            os.replace(tmp, local_path)
+            with open(meta_path, "w") as f:
+                json.dump(version, f)
+
+        return {"path": local_path, "version": version, "downloaded": cached != version}
+
+
+class LocalArtifactSource:
+    """Model artifacts already on disk (offline / local development)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def fetch(self, name: str) -> Dict[str, Any]:
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model artifact not found: {path}")
+        return {"path": path, "version": {"mtime": os.path.getmtime(path)}, "downloaded": False}
+
+
+def get_artifact_source():
+    """MODEL_DIR selects a local directory; otherwise ARTIFACT_BUCKET on GCS."""
+    model_dir = os.environ.get("MODEL_DIR")
+    if model_dir:
+        return LocalArtifactSource(model_dir)
+    return GCSArtifactSource(
+        bucket=os.environ["ARTIFACT_BUCKET"],
+        prefix=os.environ.get("MODEL_PREFIX", "models"),
+        cache_dir=os.environ.get("MODEL_CACHE_DIR", "/tmp/models"),
+    )
+
+
+_load_lock = threading.Lock()
+
+
+def load_models() -> Dict[str, Any]:
+    """Load both VaR99 surrogates once per process."""
+    # The startup warm-up thread and the first /quote may race; the second
+    # caller waits for the first load instead of repeating it
+    with _load_lock:
+        return _load_models()
+
+
+@lru_cache(maxsize=1)
+def _load_models() -> Dict[str, Any]:
+    # joblib (and the sklearn models it unpickles) load here, not at import
+    from joblib import load
+
+    source = get_artifact_source()
+    models: Dict[str, Any] = {}
+    versions: Dict[str, Any] = {}
+    for key, name in MODEL_FILES.items():
+        artifact = source.fetch(name)
+        models[key] = load(artifact["path"])
+        versions[key] = artifact["version"]
+    return {"models": models, "versions": versions}
 
-def download_from_gcs(bucket_name: str, gcs_path: str, local_path: str) -> None:
-    client = storage.Client()
-    blob = client.bucket(bucket_name).blob(gcs_path)
-    blob.download_to_filename(local_path)
 
-@lru_cache(maxsize=2)
 def load_var99_models():
-    bucket = os.environ["ARTIFACT_BUCKET"]
-    os.makedirs("/tmp/models", exist_ok=True)
+    models = load_models()["models"]
+    return models["gross"], models["net"]
 
-    gross_local = "/tmp/models/gross_var99.joblib"
-    net_local = "/tmp/models/net_var99.joblib"
 
-    download_from_gcs(bucket, "models/gross_var99.joblib", gross_local)
-    download_from_gcs(bucket, "models/net_var99.joblib", net_local)
+def predict_var99(rows: List[Dict[str, float]]) -> Dict[str, np.ndarray]:
+    """Gross and net VaR99 for a batch of parameter rows, one predict call each."""
+    import pandas as pd
 
-    return load(gross_local), load(net_local)
+    gross_model, net_model = load_var99_models()
+    X = pd.DataFrame.from_records(rows, columns=FEATURES).astype(float)
+    return {"gross": gross_model.predict(X), "net": net_model.predict(X)}
@@ -0,0 +1,295 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.models.schemas import SIM_CONFIG_DEFAULTS
+from app.services.firestore import DESCENDING
+
+# Bump when the shape or meaning of `results` changes so old entries miss.
+CACHE_VERSION = 1
+
+# Config keys that do not change the simulated results
+_NON_SEMANTIC_KEYS = {"note", "workers"}
+
+
+def _canonical(value: Any) -> Any:
+    # 1000000 and 1e6 must hash the same
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return str(value)
+
+
+def run_cache_key(request: Dict[str, Any]) -> str:
+    """
+    Content hash of everything that determines a run's results: n_sims,
+    capital and the config (with the worker's defaults filled in).
+    """
+    cfg = {**SIM_CONFIG_DEFAULTS, **(request.get("config") or {})}
+    cfg = {k: v for k, v in cfg.items() if k not in _NON_SEMANTIC_KEYS}
+    body = {
+        "v": CACHE_VERSION,
+        "n_sims": request.get("n_sims"),
+        "capital": request.get("capital"),
+        "config": cfg,
+    }
+    blob = json.dumps(_canonical(body), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(request: Dict[str, Any]) -> bool:
+    """
+    Whether a run's results depend on its inputs alone. An adaptive run with
+    a max_seconds budget stops after however many batches fit in the wall
+    clock, so its results depend on machine load and must not be reused.
+    """
+    adaptive = (request.get("config") or {}).get("adaptive")
+    return not (isinstance(adaptive, dict) and adaptive.get("max_seconds") is not None)
+
+
+class ResultCache:
+    """Base class: subclasses implement _get/_put; counters live here."""
+
+    def __init__(self, ttl_s: float | None = None):
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key: str, results: Dict[str, Any]) -> None:
+        self._put(key, results)
+        with self._lock:
+            self.puts += 1
+
+    def warm(self, key: str, results: Dict[str, Any]) -> None:
+        """Opportunistically remember results seen elsewhere (e.g. on GET)."""
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "puts": self.puts,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_s is not None and time.time() - stored_at > self.ttl_s
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _put(self, key: str, results: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+
+class NullCache(ResultCache):
+    def _get(self, key):
+        return None
+
+    def _put(self, key, results):
+        pass
+
+
+class MemoryCache(ResultCache):
+    """In-process LRU with optional TTL."""
+
+    def __init__(self, max_entries: int = 256, ttl_s: float | None = None):
+        super().__init__(ttl_s)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if self._expired(stored_at):
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return results
+
+    def _put(self, key, results):
+        with self._lock:
+            self._entries[key] = (time.time(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def warm(self, key, results):
+        with self._lock:
+            known = key in self._entries
+        if not known:
+            self._put(key, results)
+
+
+class DiskCache(ResultCache):
+    """One JSON file per key; file mtime drives both TTL and LRU order."""
+
+    def __init__(self, directory: str, max_entries: int = 1024, ttl_s: float | None = None):
+        super().__init__(ttl_s)
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _get(self, key):
+        path = self._path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if self._expired(stored_at):
+                os.remove(path)
+                with self._lock:
+                    self.evictions += 1
+                return None
+            with open(path) as f:
+                results = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # Touch for LRU without extending the TTL past the original write
+        os.utime(path, (time.time(), stored_at))
+        return results
+
+    def _put(self, key, results):
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(results, f)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        files = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".json")
+        ]
+        if len(files) <= self.max_entries:
+            return
+        # Least recently used first (atime is refreshed on hits)
+        files.sort(key=lambda p: os.stat(p).st_atime)
+        for path in files[: len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+                with self._lock:
+                    self.evictions += 1
+            except FileNotFoundError:
+                pass
+
+    def warm(self, key, results):
+        if not os.path.exists(self._path(key)):
+            self._put(key, results)
+
+
+class FirestoreCache(ResultCache):
+    """
+    Entries in a Firestore collection, shared by the API and all workers.
+    Expired entries are skipped on read; configure a Firestore TTL policy on
+    `expires_at` to have them deleted server-side. Past max_entries the
+    oldest writes are deleted (first in, first out: hits do not write).
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        collection: str = "run_cache",
+        max_entries: int = 256,
+        ttl_s: float | None = None,
+    ):
+        super().__init__(ttl_s)
+        self.col = db.collection(collection)
+        self.max_entries = max_entries
+
+    def _get(self, key):
+        snap = self.col.document(key).get()
+        if not snap.exists:
+            return None
+        entry = snap.to_dict()
+        if self._expired(entry.get("stored_at", 0.0)):
+            return None
+        return entry.get("results")
+
+    def _put(self, key, results):
+        now = time.time()
+        entry = {"results": results, "stored_at": now}
+        if self.ttl_s is not None:
+            entry["expires_at"] = now + self.ttl_s
+        self.col.document(key).set(entry)
+        self._evict()
+
+    def _evict(self):
+        # Puts follow whole runs, so reading max_entries stored_at stamps per
+        # put is cheap next to the run itself
+        newest = self.col.order_by("stored_at", DESCENDING).select(["stored_at"])
+        kept = newest.limit(self.max_entries).get()
+        if len(kept) < self.max_entries:
+            return
+        for snap in newest.start_after(kept[-1]).stream():
+            snap.reference.delete()
+            with self._lock:
+                self.evictions += 1
+
+
+def _default_backend() -> str:
+    # Runs finish in other processes (job tasks, in-process pool children),
+    # so the default must be shared: a per-process memory cache would only
+    # ever see what GET /runs/{id} happened to warm
+    if os.environ.get("RISK_ASSER_LOCAL", "").lower() in ("1", "true", "yes"):
+        return "disk"
+    return "firestore"
+
+
+@lru_cache(maxsize=1)
+def get_result_cache() -> ResultCache:
+    """
+    Cache selected by RESULT_CACHE_BACKEND: none | memory | disk | firestore,
+    defaulting to disk in local mode (RISK_ASSER_LOCAL) and to firestore
+    otherwise. RESULT_CACHE_TTL_S, RESULT_CACHE_MAX_ENTRIES and
+    RESULT_CACHE_DIR tune it.
+    """
+    backend = (os.environ.get("RESULT_CACHE_BACKEND") or _default_backend()).lower()
+    ttl = os.environ.get("RESULT_CACHE_TTL_S")
+    ttl_s = float(ttl) if ttl else None
+    max_entries = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "256"))
+
+    if backend == "none":
+        return NullCache()
+    if backend == "memory":
+        return MemoryCache(max_entries=max_entries, ttl_s=ttl_s)
+    if backend == "disk":
+        directory = os.environ.get("RESULT_CACHE_DIR", "/tmp/risk-lab-cache")
+        return DiskCache(directory, max_entries=max_entries, ttl_s=ttl_s)
+    if backend == "firestore":
+        from app.services.firestore import get_db
+
+        return FirestoreCache(get_db(), max_entries=max_entries, ttl_s=ttl_s)
+    raise ValueError(f"Unsupported result cache backend: {backend}")
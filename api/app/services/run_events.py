@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Set, Tuple
+
+from app.services.firestore import runs_collection
+
+# Fields pushed to clients; results are fetched once with GET /runs/{run_id}
+EVENT_FIELDS = ("status", "progress", "error", "started_at", "finished_at")
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+class _RunWatch:
+    def __init__(self):
+        self.watch = None
+        self.subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self.last: Dict[str, Any] | None = None
+
+
+class RunEventHub:
+    """
+    Fans run document changes out to streaming clients.
+
+    Each watched run has exactly one snapshot listener (Firestore on_snapshot
+    or the local store's watcher) however many clients follow it, so read
+    load does not grow with the number of waiting clients. Subscribers get an
+    asyncio.Queue of events; None means the run does not exist.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._runs: Dict[str, _RunWatch] = {}
+
+    def subscribe(self, db: Any, run_id: str) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            entry = self._runs.get(run_id)
+            if entry is None:
+                entry = self._runs[run_id] = _RunWatch()
+                entry.watch = runs_collection(db).document(run_id).on_snapshot(
+                    lambda docs, changes, read_time: self._on_snapshot(run_id, docs)
+                )
+            elif entry.last is not None:
+                queue.put_nowait(entry.last)
+            entry.subscribers.add((loop, queue))
+        return queue
+
+    def unsubscribe(self, run_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            entry = self._runs.get(run_id)
+            if entry is None:
+                return
+            entry.subscribers = {(l, q) for l, q in entry.subscribers if q is not queue}
+            if not entry.subscribers:
+                del self._runs[run_id]
+                entry.watch.unsubscribe()
+
+    def _on_snapshot(self, run_id: str, docs: List[Any]) -> None:
+        # Called on the listener's thread
+        snap = docs[0] if docs else None
+        event = None
+        if snap is not None and snap.exists:
+            data = snap.to_dict() or {}
+            event = {"run_id": run_id, **{f: data.get(f) for f in EVENT_FIELDS}}
+
+        with self._lock:
+            entry = self._runs.get(run_id)
+            if entry is None or (event is not None and event == entry.last):
+                return
+            entry.last = event
+            subscribers = list(entry.subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "watched_runs": len(self._runs),
+                "subscribers": sum(len(e.subscribers) for e in self._runs.values()),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            entries = list(self._runs.values())
+            self._runs.clear()
+        for entry in entries:
+            entry.watch.unsubscribe()
+
+
+@lru_cache(maxsize=1)
+def get_event_hub() -> RunEventHub:
+    return RunEventHub()
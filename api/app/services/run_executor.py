@@ -0,0 +1,189 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict
+
+from app.models.schemas import SIM_CONFIG_DEFAULTS
+from app.services.telemetry import observe_run_timing
+
+logger = logging.getLogger(__name__)
+
+
+def run_work(request: Dict[str, Any]) -> float:
+    """
+    Expected number of simulated claims: n_sims x freq_lambda (x treaties),
+    or n_sims x the lines' summed freq_lambda for a portfolio (the grid
+    points' for a sweep).
+    """
+    cfg = {**SIM_CONFIG_DEFAULTS, **(request.get("config") or {})}
+    n_sims = int(request.get("n_sims", 50000))
+    adaptive = cfg.get("adaptive")
+    if isinstance(adaptive, dict) and adaptive.get("max_sims"):
+        n_sims = int(adaptive["max_sims"])
+    sweep = cfg.get("sweep")
+    if sweep:
+        # Every grid point aggregates its own claims
+        lambdas = sweep.get("freq_lambda") or [cfg["freq_lambda"]]
+        n_points = len(sweep.get("sev_mu") or [0]) * len(sweep.get("sev_sigma") or [0])
+        return n_sims * sum(float(lam) for lam in lambdas) * n_points
+    portfolio = cfg.get("portfolio")
+    if portfolio:
+        lines = portfolio.get("lines") or []
+        return n_sims * sum(float(line.get("freq_lambda", cfg["freq_lambda"])) for line in lines)
+    n_treaties = len(cfg.get("reinsurance_batch") or [None])
+    return n_sims * float(cfg["freq_lambda"]) * n_treaties
+
+
+def _fail_in_store(run_id: str, error: str) -> None:
+    """Mark a run failed from the API process, e.g. when its child died before it could."""
+    from app.services.firestore import get_db
+    from app.worker import update_run
+
+    try:
+        update_run(get_db(), run_id, {
+            "status": "failed",
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "error": error,
+        })
+    except Exception as e:
+        logger.error("Could not mark in-process run %s failed: %s", run_id, e)
+
+
+def _execute_in_child(run_id: str, run_doc: Dict[str, Any]) -> Dict[str, Any] | None:
+    from app.services.firestore import get_db
+    from app.worker import execute_run
+
+    # The run's phase timing, exported by the parent on /metrics
+    return execute_run(get_db(), run_id, run_doc)
+
+
+class InProcessExecutor:
+    """
+    Bounded process pool that runs small runs inside the API service.
+
+    At most `workers` runs execute at once and `max_queue` more wait; past
+    that reserve() fails so the caller can push back instead of queueing
+    without bound.
+    """
+
+    def __init__(self, workers: int, max_queue: int, max_work: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_work = max_work
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def accepts(self, request: Dict[str, Any]) -> bool:
+        """Whether a run is small enough for this tier (sharded runs always go to the job)."""
+        if int((request.get("config") or {}).get("shards") or 1) > 1:
+            return False
+        return self.max_work > 0 and run_work(request) <= self.max_work
+
+    def reserve(self) -> bool:
+        """Claim a pool slot without blocking; False when the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork the API process with its threads and clients
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool (a child crashed) so the next submit starts a fresh one."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, run_id: str, run_doc: Dict[str, Any]) -> Future:
+        """Execute a run in the pool; the caller must hold a reserved slot."""
+        pool = self._get_pool()
+        try:
+            future = pool.submit(_execute_in_child, run_id, run_doc)
+        except BrokenProcessPool:
+            # A child died (OOM, segfault, ...) and took the pool with it: retry once
+            logger.warning("In-process pool broken, starting a new one for run %s", run_id)
+            self._discard_pool(pool)
+            pool = self._get_pool()
+            future = pool.submit(_execute_in_child, run_id, run_doc)
+        future.add_done_callback(lambda f: self._done(run_id, f, pool))
+        return future
+
+    def _done(self, run_id: str, future: Future, pool: ProcessPoolExecutor) -> None:
+        if future.cancelled():
+            error: BaseException | None = RuntimeError("Run cancelled at shutdown")
+        else:
+            error = future.exception()
+        with self._lock:
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        if error is None:
+            observe_run_timing(future.result())
+        else:
+            logger.error("In-process run %s failed: %s", run_id, error)
+            if isinstance(error, BrokenProcessPool):
+                self._discard_pool(pool)
+            # A child that crashed never wrote its own failure; without this
+            # the run would stay queued/running forever
+            _fail_in_store(run_id, str(error) or type(error).__name__)
+        self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "max_work": self.max_work,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache(maxsize=1)
+def get_run_executor() -> InProcessExecutor:
+    """
+    INPROC_WORKERS processes (default 2) with INPROC_MAX_QUEUE waiting runs
+    (default 8) for runs of at most INPROC_MAX_WORK expected claims (default
+    2,000,000; 0 sends every run to the Cloud Run Job).
+    """
+    return InProcessExecutor(
+        workers=int(os.environ.get("INPROC_WORKERS", "2")),
+        max_queue=int(os.environ.get("INPROC_MAX_QUEUE", "8")),
+        max_work=float(os.environ.get("INPROC_MAX_WORK", "2000000")),
+    )
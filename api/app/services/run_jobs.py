@@ -1,13 +1,23 @@
 import os
-import requests
-from google.auth import default
-from google.auth.transport.requests import Request
+import subprocess
+import sys
 
+from app.services.clients import get_client_pool
 
-def run_job(job_name: str, region: str, run_id: str) -> None:
+
+def run_job(job_name: str, region: str, run_id: str, task_count: int = 1) -> None:
     """
     Triggers a Cloud Run Job execution and passes RUN_ID env var to the job container.
+    A sharded run executes as `task_count` parallel tasks. In local mode
+    (RISK_ASSER_LOCAL) the tasks are started as local worker processes instead.
     """
+    if os.environ.get("RISK_ASSER_LOCAL", "").lower() in ("1", "true", "yes"):
+        subprocess.Popen(
+            [sys.executable, "-m", "app.worker", "--local-tasks"],
+            env={**os.environ, "RUN_ID": run_id},
+        )
+        return
+
     project_id = os.environ["GOOGLE_CLOUD_PROJECT"]
 
     # Cloud Run Jobs REST endpoint
@@ -16,9 +26,10 @@ def run_job(job_name: str, region: str, run_id: str) -> None:
         f"namespaces/{project_id}/jobs/{job_name}:run"
     )
 
-    creds, _ = default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
-    creds.refresh(Request())
-    token = creds.token
+    # Shared credentials and keep-alive session: no token refresh or TLS
+    # handshake per submission
+    pool = get_client_pool()
+    token = pool.access_token()
 
     payload = {
         "overrides": {
@@ -28,11 +39,12 @@ def run_job(job_name: str, region: str, run_id: str) -> None:
                         {"name": "RUN_ID", "value": run_id}
                     ]
                 }
-            ]
+            ],
+            "taskCount": task_count,
         }
     }
 
-    resp = requests.post(
+    resp = pool.session().post(
         url,
         headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
         json=payload,
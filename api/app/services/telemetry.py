@@ -0,0 +1,129 @@
+import bisect
+import threading
+from typing import Any, Dict, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond API calls to long runs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_str(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels[k]) for k in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labelnames, key)} {value:g}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[Tuple[str, ...], Tuple[list, list]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels[k]) for k in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[i] += 1
+            total[0] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    le = _label_str(self.labelnames, key, f'le="{bound:g}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                cumulative += counts[-1]
+                le = _label_str(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+                lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {total[0]:g}")
+                lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {cumulative}")
+        return "\n".join(lines)
+
+
+class Registry:
+    """Minimal Prometheus text-format (0.0.4) registry; no client library needed."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "risklab_http_request_duration_seconds",
+    "API request latency by route template, method and status code.",
+    ("method", "route", "status"),
+))
+DISPATCH_SECONDS = REGISTRY.register(Histogram(
+    "risklab_run_dispatch_duration_seconds",
+    "Time to hand a new run to its execution tier (job launch or pool submit).",
+    ("tier",),
+))
+RUNS_DISPATCHED = REGISTRY.register(Counter(
+    "risklab_runs_dispatched_total",
+    "Runs created, by execution tier (cache, inproc, job, rejected).",
+    ("tier",),
+))
+PHASE_SECONDS = REGISTRY.register(Histogram(
+    "risklab_run_phase_duration_seconds",
+    "Per-run time spent in each simulation phase (in-process runs).",
+    ("phase",),
+))
+PHASE_ITEMS = REGISTRY.register(Counter(
+    "risklab_run_phase_items_total",
+    "Array elements processed per simulation phase (in-process runs).",
+    ("phase",),
+))
+
+
+def observe_run_timing(timing: Dict[str, Any] | None) -> None:
+    """Export the phase timings of one finished run (execute_run's return value)."""
+    for name, p in ((timing or {}).get("phases") or {}).items():
+        PHASE_SECONDS.observe(p["seconds"], phase=name)
+        PHASE_ITEMS.inc(p["items"], phase=name)
@@ -1,82 +1,581 @@
+import argparse
 import os
+import subprocess
 import sys
 import time
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
-from google.cloud import firestore
-from app.services.firestore import get_db, runs_collection
+from app.services.firestore import get_db, runs_collection, update_if_status
+from app.services.result_cache import get_result_cache, is_cacheable, run_cache_key
+from app.services.artifact_store import (
+    get_arrays,
+    get_blob_store,
+    put_arrays,
+    write_loss_vectors,
+    write_run_artifact,
+)
+from app.models.schemas import SIM_CONFIG_DEFAULTS
 
-from app.core.simulate import simulate_aggregate_loss
-from app.core.simulate import simulate_gross_net
+from app.core.simulate import (
+    DEFAULT_PRECISION_TOLERANCE,
+    simulate_gross_net,
+    simulate_gross_net_batch,
+)
+from app.core.parallel import (
+    DEFAULT_SHARD_SIZE,
+    reduce_tasks,
+    simulate_gross_net_batch_parallel,
+    simulate_gross_net_parallel,
+    simulate_task,
+    task_precision,
+)
+from app.core.accumulate import ProgressFn
+from app.core.metrics import DEFAULT_QUANTILES
+from app.core.sampling import simulate_gross_net_vr
+from app.core.adaptive import simulate_gross_net_adaptive
+from app.core.portfolio import simulate_portfolio
+from app.core.sweep import simulate_sweep, sweep_grid
+from app.core.timing import collect_phases, phase
 
 
-
-def update_run(db: firestore.Client, run_id: str, patch: Dict[str, Any]) -> None:
+def update_run(db: Any, run_id: str, patch: Dict[str, Any]) -> None:
     runs_collection(db).document(run_id).update(patch)
 
 
-def main() -> None:
-    # Cloud Run Jobs will pass RUN_ID as an env var
-    run_id = os.environ.get("RUN_ID")
-    if not run_id:
-        print("Missing RUN_ID env var", file=sys.stderr)
-        sys.exit(2)
+class ProgressReporter:
+    """
+    Progress callback for the simulate functions that writes sims completed
+    and interim VaR/TVaR into the run document, at most once per
+    `min_interval_s` (PROGRESS_INTERVAL_S, default 1s) so large runs do not
+    turn into a stream of document writes. Tasks of a sharded run report
+    into their own `field`.
+    """
 
-    db = get_db()
-    doc_ref = runs_collection(db).document(run_id)
-    snap = doc_ref.get()
+    def __init__(
+        self,
+        db: Any,
+        run_id: str,
+        n_sims: int,
+        min_interval_s: float | None = None,
+        field: str = "progress",
+    ):
+        self.db = db
+        self.run_id = run_id
+        self.n_sims = n_sims
+        self.field = field
+        if min_interval_s is None:
+            min_interval_s = float(os.environ.get("PROGRESS_INTERVAL_S", "1.0"))
+        self.min_interval_s = min_interval_s
+        self._last = time.monotonic()
 
-    if not snap.exists:
-        print(f"Run not found: {run_id}", file=sys.stderr)
-        sys.exit(3)
+    def __call__(self, sims_done: int, estimate) -> None:
+        now = time.monotonic()
+        if now - self._last < self.min_interval_s:
+            return
+        self._last = now
+        try:
+            update_run(self.db, self.run_id, {
+                self.field: {
+                    "sims_done": int(sims_done),
+                    "n_sims": self.n_sims,
+                    "fraction": min(sims_done / self.n_sims, 1.0) if self.n_sims else 1.0,
+                    "interim": estimate(),
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                },
+            })
+        except Exception as e:
+            print(f"Failed to report progress for {self.run_id}: {e}", file=sys.stderr)
 
-    run_doc = snap.to_dict()
-    req = run_doc.get("request", {})
-    n_sims = int(req.get("n_sims", 50000))
-    capital = float(req.get("capital", 1_000_000))
 
-    cfg = req.get("config", {}) or {}
-    freq_lambda = float(cfg.get("freq_lambda", 0.3))
-    sev_mu = float(cfg.get("sev_mu", 10.2))
-    sev_sigma = float(cfg.get("sev_sigma", 1.1))
-    seed = int(cfg.get("seed", 42))
+def run_simulation(
+    request: Dict[str, Any],
+    loss_sink: Dict[str, Any] | None = None,
+    progress: ProgressFn | None = None,
+    task: Tuple[int, int] | None = None,
+    partials: List[Dict[str, Any]] | None = None,
+    precision: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """
+    Results for a run request (RunCreateRequest.model_dump()). Pure: reads no
+    run document and writes nothing (progress goes to the optional callback),
+    so the job and the in-process tier share it.
 
-    reinsurance = cfg.get("reinsurance", {"type": "none"})
+    For a sharded run (config.shards), `task=(index, count)` returns that
+    task's mergeable partial instead, and `partials` (of every task, in
+    order) reduces them into the results; both simulate with `precision`,
+    the run's run_precision() report.
+    """
+    n_sims = int(request.get("n_sims", 50000))
+    capital = float(request.get("capital", 1_000_000))
 
-    # Mark running
-    update_run(db, run_id, {
-        "status": "running",
-        "started_at": datetime.now(timezone.utc).isoformat(),
-        "error": None,
-    })
+    cfg = {**SIM_CONFIG_DEFAULTS, **(request.get("config", {}) or {})}
+    freq_lambda = float(cfg["freq_lambda"])
+    sev_mu = float(cfg["sev_mu"])
+    sev_sigma = float(cfg["sev_sigma"])
+    seed = int(cfg["seed"])
 
-    try:
-        results = simulate_gross_net(
+    reinsurance = cfg["reinsurance"]
+
+    # What-if batch: many treaties applied to one set of gross simulations
+    reinsurance_batch = cfg.get("reinsurance_batch")
+
+    # Bounded-memory mode: simulate `chunk_size` years at a time
+    chunk_size = cfg.get("chunk_size") or os.environ.get("SIM_CHUNK_SIZE")
+    chunk_size = int(chunk_size) if chunk_size else None
+    tail_mode = cfg.get("tail_mode", "exact")
+    hist_edges = cfg.get("hist_edges")
+
+    # Extra risk levels: VaR/TVaR quantiles and ruin capital levels
+    quantiles = [float(q) for q in cfg.get("quantiles", DEFAULT_QUANTILES)]
+    capital_levels = [float(c) for c in cfg.get("capital_levels", [])]
+
+    # Variance reduction: mc (plain) | antithetic | sobol | importance
+    sampling = cfg.get("sampling", "mc")
+    if loss_sink is not None and sampling != "mc":
+        raise ValueError("persist_losses needs plain mc sampling")
+
+    # Adaptive mode: simulate in batches until the VaR/TVaR CIs are tight
+    # enough; n_sims becomes the sim budget
+    adaptive = cfg.get("adaptive")
+
+    # Multi-line portfolio: per-line parameters, copula-correlated frequencies
+    portfolio = cfg.get("portfolio")
+
+    # Parameter sweep: {"freq_lambda": [...], "sev_mu": [...], "sev_sigma": [...]}
+    # grid on common random numbers, with finite-difference sensitivities
+    sweep = cfg.get("sweep")
+
+    # "serial" runs in this process, "process" shards the years over a pool
+    backend = cfg.get("backend", "serial")
+    workers = cfg.get("workers") or os.environ.get("SIM_WORKERS")
+    workers = int(workers) if workers else None
+    shard_size = int(cfg.get("shard_size", DEFAULT_SHARD_SIZE))
+
+    # Sharded run: `shards` job tasks each simulate a contiguous slice of the shards
+    shards = int(cfg.get("shards") or 1)
+    if shards > 1:
+        if adaptive or sampling != "mc" or portfolio or sweep:
+            raise ValueError("Sharded runs support plain mc single and batch runs only")
+        # Same random streams as the process backend, whichever process runs it
+        backend = "process"
+    if (task is not None or partials is not None) and shards <= 1:
+        raise ValueError("Run is not sharded (config.shards)")
+    if task is not None and task[1] != shards:
+        raise ValueError(f"Run has {shards} shards but the job runs {task[1]} tasks")
+
+    # Claim buffer precision: float64, or float32 checked against float64
+    dtype = cfg.get("dtype", "float64")
+    precision_tolerance = float(cfg.get("precision_tolerance", DEFAULT_PRECISION_TOLERANCE))
+
+    sim_kwargs = dict(
         n_sims=n_sims,
         freq_lambda=freq_lambda,
         sev_mu=sev_mu,
         sev_sigma=sev_sigma,
         capital=capital,
-        reinsurance=reinsurance,
         seed=seed,
+        chunk_size=chunk_size,
+        tail_mode=tail_mode,
+        hist_edges=hist_edges,
+        quantiles=quantiles,
+        capital_levels=capital_levels,
+        loss_sink=loss_sink,
+        progress=progress,
+        dtype=dtype,
+        precision_tolerance=precision_tolerance,
+    )
+    if backend == "process":
+        sim_kwargs.update(workers=workers, shard_size=shard_size)
+    elif backend != "serial":
+        raise ValueError(f"Unsupported backend: {backend}")
+
+    if task is not None or partials is not None:
+        treaties = list(reinsurance_batch) if reinsurance_batch is not None else [reinsurance]
+        common = dict(
+            n_sims=n_sims,
+            freq_lambda=freq_lambda,
+            sev_mu=sev_mu,
+            sev_sigma=sev_sigma,
+            capital=capital,
+            treaties=treaties,
+            seed=seed,
+            tail_mode=tail_mode,
+            hist_edges=hist_edges,
+            quantiles=quantiles,
+            capital_levels=capital_levels,
+        )
+        # The float32 check runs once per run, at dispatch; only a run document
+        # stored without its report has the check re-run here
+        if precision is None and dtype != "float64":
+            precision = task_precision(
+                n_sims, freq_lambda, sev_mu, sev_sigma, treaties, seed, quantiles,
+                dtype, precision_tolerance,
+            )
+        if task is not None:
+            return simulate_task(
+                **common, task_index=task[0], task_count=task[1], workers=workers,
+                shard_size=shard_size, chunk_size=chunk_size, progress=progress,
+                precision=precision,
+            )
+        return reduce_tasks(
+            partials, **common, batch=reinsurance_batch is not None, loss_sink=loss_sink,
+            precision=precision,
+        )
+    if sweep:
+        if adaptive or sampling != "mc" or portfolio or reinsurance_batch is not None:
+            raise ValueError("Sweeps support neither adaptive, sampling, portfolio nor batch modes")
+        if loss_sink is not None:
+            raise ValueError("persist_losses is not supported for sweeps")
+        if dtype != "float64":
+            raise ValueError("Sweeps simulate in float64 only")
+        return simulate_sweep(
+            n_sims=n_sims,
+            grid=sweep_grid(cfg, sweep),
+            capital=capital,
+            reinsurance=reinsurance,
+            seed=seed,
+            quantiles=quantiles,
+            capital_levels=capital_levels,
+        )
+    if portfolio:
+        if adaptive or sampling != "mc" or reinsurance_batch is not None or backend != "serial":
+            raise ValueError("Portfolio runs support neither adaptive, sampling, batch nor process modes")
+        if dtype != "float64":
+            raise ValueError("Portfolio runs simulate in float64 only")
+        # Lines inherit the top-level frequency/severity/reinsurance they omit
+        line_defaults = {k: cfg[k] for k in ("freq_lambda", "sev_mu", "sev_sigma", "reinsurance")}
+        return simulate_portfolio(
+            n_sims=n_sims,
+            lines=[{**line_defaults, **line} for line in portfolio.get("lines", [])],
+            capital=capital,
+            correlation=portfolio.get("correlation"),
+            copula=portfolio.get("copula", "gaussian"),
+            df=float(portfolio.get("df", 4.0)),
+            seed=seed,
+            chunk_size=chunk_size,
+            tail_mode=tail_mode,
+            quantiles=quantiles,
+            capital_levels=capital_levels,
+            contribution_window=float(portfolio.get("contribution_window", 0.001)),
+            loss_sink=loss_sink,
+            progress=progress,
+        )
+    if adaptive:
+        if sampling != "mc" or reinsurance_batch is not None or backend != "serial":
+            raise ValueError("Adaptive runs support neither sampling, batch nor process modes")
+        # Batches are simulated whole with exact tails in float64; adaptive.batch_size
+        # (not chunk_size) bounds their memory
+        if dtype != "float64" or tail_mode != "exact" or cfg.get("chunk_size"):
+            raise ValueError(
+                "Adaptive runs need dtype float64 and exact tail_mode; "
+                "set adaptive.batch_size instead of chunk_size"
+            )
+        adaptive = adaptive if isinstance(adaptive, dict) else {}
+        max_seconds = adaptive.get("max_seconds")
+        return simulate_gross_net_adaptive(
+            freq_lambda=freq_lambda,
+            sev_mu=sev_mu,
+            sev_sigma=sev_sigma,
+            capital=capital,
+            reinsurance=reinsurance,
+            seed=seed,
+            tolerance=float(adaptive.get("tolerance", 0.01)),
+            confidence=float(adaptive.get("confidence", 0.95)),
+            batch_size=int(adaptive.get("batch_size", shard_size)),
+            min_sims=int(adaptive.get("min_sims", 2 * shard_size)),
+            max_sims=int(adaptive.get("max_sims", n_sims)),
+            max_seconds=float(max_seconds) if max_seconds is not None else None,
+            quantiles=quantiles,
+            capital_levels=capital_levels,
+            loss_sink=loss_sink,
+            progress=progress,
+        )
+    if sampling != "mc":
+        if reinsurance_batch is not None or backend != "serial":
+            raise ValueError(f"{sampling} sampling supports neither batch nor process modes")
+        # The variance-reduced draws are made (and kept) in one pass, in float64
+        if dtype != "float64" or tail_mode != "exact" or cfg.get("chunk_size"):
+            raise ValueError(
+                f"{sampling} sampling draws the whole run in one pass: it needs dtype "
+                "float64, exact tail_mode and no chunk_size"
+            )
+        return simulate_gross_net_vr(
+            n_sims=n_sims,
+            freq_lambda=freq_lambda,
+            sev_mu=sev_mu,
+            sev_sigma=sev_sigma,
+            capital=capital,
+            reinsurance=reinsurance,
+            seed=seed,
+            method=sampling,
+            freq_scale=float(cfg.get("is_freq_scale", 1.5)),
+            sev_shift=float(cfg.get("is_sev_shift", 0.5)),
+            sobol_replicates=int(cfg.get("sobol_replicates", 16)),
+            quantiles=quantiles,
+            capital_levels=capital_levels,
+        )
+    if reinsurance_batch is not None:
+        simulate = simulate_gross_net_batch if backend == "serial" else simulate_gross_net_batch_parallel
+        return simulate(**sim_kwargs, treaties=list(reinsurance_batch))
+
+    simulate = simulate_gross_net if backend == "serial" else simulate_gross_net_parallel
+    return simulate(**sim_kwargs, reinsurance=reinsurance)
+
+
+def run_precision(request: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    The float32 check of a sharded run (task_precision(), None for float64).
+    Run once when the run is dispatched and kept in its document, so its
+    tasks and the reduce all simulate with the same dtype.
+    """
+    cfg = {**SIM_CONFIG_DEFAULTS, **(request.get("config", {}) or {})}
+    reinsurance_batch = cfg.get("reinsurance_batch")
+    treaties = list(reinsurance_batch) if reinsurance_batch is not None else [cfg["reinsurance"]]
+    return task_precision(
+        n_sims=int(request.get("n_sims", 50000)),
+        freq_lambda=float(cfg["freq_lambda"]),
+        sev_mu=float(cfg["sev_mu"]),
+        sev_sigma=float(cfg["sev_sigma"]),
+        treaties=treaties,
+        seed=int(cfg["seed"]),
+        quantiles=[float(q) for q in cfg.get("quantiles", DEFAULT_QUANTILES)],
+        dtype=cfg.get("dtype", "float64"),
+        precision_tolerance=float(cfg.get("precision_tolerance", DEFAULT_PRECISION_TOLERANCE)),
     )
+
+
+def phase_timing_enabled() -> bool:
+    """PHASE_TIMING=0 turns off per-phase timing of runs (on by default)."""
+    return os.environ.get("PHASE_TIMING", "1") != "0"
+
+
+def _finish_run(
+    db: Any,
+    run_id: str,
+    run_doc: Dict[str, Any],
+    results: Dict[str, Any],
+    store: Any,
+    loss_sink: Dict[str, Any] | None,
+) -> Dict[str, Any]:
+    """Store a run's artifacts, mark it done and cache its results."""
+    with phase("artifact_write"):
+        if loss_sink:
+            results["losses"] = write_loss_vectors(store, run_id, loss_sink)
+
+        # Large arrays go to the blob store; the run doc keeps a summary + pointer
+        if store is not None:
+            results = write_run_artifact(store, run_id, results)
+
+    with phase("firestore_write"):
         update_run(db, run_id, {
             "status": "done",
             "finished_at": datetime.now(timezone.utc).isoformat(),
             "results": results,
         })
-        print(f"Run {run_id} completed.")
+    print(f"Run {run_id} completed.")
 
+    # Deterministic for its inputs, so later identical requests can reuse it
+    req = run_doc.get("request", {})
+    if not is_cacheable(req):
+        return results
+    try:
+        get_result_cache().put(run_doc.get("cache_key") or run_cache_key(req), results)
     except Exception as e:
+        print(f"Failed to cache results for {run_id}: {e}", file=sys.stderr)
+    return results
+
+
+def _fail_run(db: Any, run_id: str, error: str) -> None:
+    update_run(db, run_id, {
+        "status": "failed",
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "error": error,
+    })
+
+
+def _loss_sink(cfg: Dict[str, Any], store: Any) -> Dict[str, Any] | None:
+    # Keep the sorted annual losses so metrics can be re-queried later
+    persist_losses = bool(cfg.get("persist_losses", False))
+    if persist_losses and store is None:
+        raise ValueError("persist_losses needs an artifact store")
+    return {} if persist_losses else None
+
+
+def execute_run(db: Any, run_id: str, run_doc: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    Run one queued run document end to end: mark it running, simulate, store
+    artifacts, then mark it done (or failed, re-raising the error).
+
+    Returns the run's phase timing ({"phases": ..., "total_s": ...}), which is
+    also written to the run document's `timing` field; None when disabled.
+    """
+    req = run_doc.get("request", {})
+    cfg = req.get("config", {}) or {}
+
+    # Mark running
+    update_run(db, run_id, {
+        "status": "running",
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "error": None,
+    })
+
+    t0 = time.perf_counter()
+    try:
+        with collect_phases(phase_timing_enabled()) as timer:
+            store = get_blob_store()
+            loss_sink = _loss_sink(cfg, store)
+            n_sims = int(req.get("n_sims", 50000))
+            results = run_simulation(req, loss_sink, ProgressReporter(db, run_id, n_sims))
+            _finish_run(db, run_id, run_doc, results, store, loss_sink)
+
+        if timer is None:
+            return None
+        # Written after "done" so the timing includes the final results write
+        timing = {"phases": timer.to_dict(), "total_s": round(time.perf_counter() - t0, 6)}
+        try:
+            update_run(db, run_id, {"timing": timing})
+        except Exception as e:
+            print(f"Failed to record timing for {run_id}: {e}", file=sys.stderr)
+        return timing
+
+    except Exception as e:
+        _fail_run(db, run_id, str(e))
+        raise
+
+
+def execute_task(
+    db: Any, run_id: str, run_doc: Dict[str, Any], task_index: int, task_count: int
+) -> Dict[str, Any] | None:
+    """
+    One task of a sharded run: simulate this task's slice of the shards, store
+    it as a partial in the blob store and record it under shards.task_<i>.
+    The task that then finds every partial recorded reduces them into the
+    run's results (returned); the reduce is deterministic, so two tasks
+    finishing together just write the same results twice.
+    """
+    req = run_doc.get("request", {})
+    field = f"shards.task_{task_index}"
+    started_at = datetime.now(timezone.utc).isoformat()
+    update_run(db, run_id, {field: {"status": "running", "started_at": started_at}})
+    # Only the first task moves the run out of "queued": a later one must not
+    # revive a run a sibling already failed, or one the reduce has finished
+    update_if_status(db, run_id, ("queued",), {"status": "running", "started_at": started_at})
+
+    try:
+        store = get_blob_store()
+        if store is None:
+            raise ValueError("Sharded runs need an artifact store for their partials")
+
+        n_task_sims = int(req.get("n_sims", 50000)) // task_count
+        progress = ProgressReporter(db, run_id, n_task_sims, field=f"{field}.progress")
+        partial = run_simulation(
+            req, progress=progress, task=(task_index, task_count),
+            precision=run_doc.get("precision"),
+        )
+
+        key = f"{run_id}/partials/task_{task_index}.npz"
+        put_arrays(store, key, partial)
         update_run(db, run_id, {
-            "status": "failed",
-            "finished_at": datetime.now(timezone.utc).isoformat(),
-            "error": str(e),
+            f"{field}.status": "done",
+            f"{field}.partial_key": key,
+            f"{field}.finished_at": datetime.now(timezone.utc).isoformat(),
         })
+        print(f"Run {run_id} task {task_index + 1}/{task_count} completed.")
+    except Exception as e:
+        _fail_run(db, run_id, f"Task {task_index}: {e}")
         raise
 
-    
+    run_doc = runs_collection(db).document(run_id).get().to_dict()
+    tasks = run_doc.get("shards") or {}
+    if all((tasks.get(f"task_{i}") or {}).get("status") == "done" for i in range(task_count)):
+        return reduce_run(db, run_id, run_doc)
+    return None
+
+
+def reduce_run(db: Any, run_id: str, run_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine the stored partials of every task of a sharded run into its results."""
+    req = run_doc.get("request", {})
+    cfg = req.get("config", {}) or {}
+    try:
+        store = get_blob_store()
+        tasks = run_doc.get("shards") or {}
+        count = int(cfg.get("shards") or 1)
+        keys = [(tasks.get(f"task_{i}") or {}).get("partial_key") for i in range(count)]
+        missing = [i for i, key in enumerate(keys) if key is None]
+        if missing:
+            raise ValueError(f"Partials missing for tasks {missing}")
+
+        loss_sink = _loss_sink(cfg, store)
+        results = run_simulation(
+            req, loss_sink, partials=[get_arrays(store, key) for key in keys],
+            precision=run_doc.get("precision"),
+        )
+        return _finish_run(db, run_id, run_doc, results, store, loss_sink)
+    except Exception as e:
+        _fail_run(db, run_id, f"Reduce: {e}")
+        raise
+
+
+def launch_local_tasks(run_id: str, task_count: int) -> int:
+    """
+    Run every task of a sharded run as a local worker process, the way a
+    Cloud Run Job execution with `task_count` tasks would. Returns the number
+    of tasks that failed.
+    """
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "app.worker"],
+            env={
+                **os.environ,
+                "RUN_ID": run_id,
+                "CLOUD_RUN_TASK_INDEX": str(i),
+                "CLOUD_RUN_TASK_COUNT": str(task_count),
+            },
+        )
+        for i in range(task_count)
+    ]
+    return sum(p.wait() != 0 for p in procs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Execute the run named by the RUN_ID env var.")
+    parser.add_argument(
+        "--local-tasks", action="store_true",
+        help="run every task of a sharded run as local worker processes",
+    )
+    parser.add_argument(
+        "--reduce", action="store_true",
+        help="only combine the stored partials of a sharded run (e.g. after a failed reduce)",
+    )
+    args = parser.parse_args()
+
+    # Cloud Run Jobs will pass RUN_ID as an env var
+    run_id = os.environ.get("RUN_ID")
+    if not run_id:
+        print("Missing RUN_ID env var", file=sys.stderr)
+        sys.exit(2)
+
+    db = get_db()
+    snap = runs_collection(db).document(run_id).get()
+
+    if not snap.exists:
+        print(f"Run not found: {run_id}", file=sys.stderr)
+        sys.exit(3)
+
+    run_doc = snap.to_dict()
+    shards = int((run_doc.get("request", {}).get("config") or {}).get("shards") or 1)
+    if args.local_tasks:
+        sys.exit(1 if launch_local_tasks(run_id, shards) else 0)
+    if args.reduce:
+        reduce_run(db, run_id, run_doc)
+    elif shards > 1:
+        # Set by Cloud Run Jobs for each task of an execution
+        task_index = int(os.environ.get("CLOUD_RUN_TASK_INDEX", "0"))
+        task_count = int(os.environ.get("CLOUD_RUN_TASK_COUNT", "1"))
+        execute_task(db, run_id, run_doc, task_index, task_count)
+    else:
+        execute_run(db, run_id, run_doc)
 
 
 if __name__ == "__main__":
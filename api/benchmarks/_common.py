@@ -0,0 +1,96 @@
+"""Baseline handling shared by the benchmark scripts: CLI flags, comparison and reporting."""
+import argparse
+import json
+import os
+import platform
+import sys
+from typing import Any, Callable, Dict, List, Sequence
+
+
+def environment(**extra: Any) -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        **extra,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def add_baseline_arguments(
+    parser: argparse.ArgumentParser, baseline: str, output: str, min_delta_s: float
+) -> None:
+    parser.add_argument("--output", default=output)
+    parser.add_argument("--baseline", default=baseline)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--min-delta-s", type=float, default=min_delta_s)
+    parser.add_argument("--update-baseline", action="store_true")
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_delta_s: float,
+    case_id: Callable[[Dict[str, Any]], str],
+) -> List[str]:
+    """
+    Cases slower than baseline * (1 + threshold) and by more than min_delta_s
+    in absolute terms; cases missing from the baseline are skipped.
+    """
+    regressions = []
+    base = {case_id(r): r for r in baseline.get("results", [])}
+    for r in results:
+        ref = base.get(case_id(r))
+        if ref is None:
+            continue
+        ratio = r["wall_s"] / ref["wall_s"]
+        r["baseline_ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold and r["wall_s"] - ref["wall_s"] > min_delta_s:
+            regressions.append(
+                f"{case_id(r)}: {r['wall_s']:.4f}s vs baseline {ref['wall_s']:.4f}s ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def finish(
+    args: argparse.Namespace,
+    report: Dict[str, Any],
+    case_id: Callable[[Dict[str, Any]], str],
+    failures: Sequence[str] = (),
+) -> None:
+    """
+    Record the baseline (--update-baseline) or compare against it, write the
+    report and exit with status 1 on regressions. `failures` are hard
+    failures found by the caller; they also block recording a baseline.
+    """
+    failures = list(failures)
+    if args.update_baseline:
+        if failures:
+            print("Not recording a baseline with failures:")
+            for line in failures:
+                print(f"  {line}")
+            sys.exit(1)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            failures += compare(
+                report["results"], json.load(f), args.threshold, args.min_delta_s, case_id
+            )
+    else:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+
+    report["regressions"] = failures
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if failures:
+        print("Regressions beyond threshold:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
@@ -0,0 +1,153 @@
+"""
+Cold-start benchmark for the API service and the worker.
+
+Every sample runs in a fresh interpreter on the local store
+(RISK_ASSER_LOCAL=1), so nothing is cached in sys.modules. Records:
+
+- import time of app.main and app.worker (best of --repeats)
+- time from launching uvicorn to the first 200 from /health (best of --repeats)
+- which heavy SDKs (Firestore, google-auth, requests, GCS, joblib, pandas,
+  scipy, sklearn) the imports pulled in: those must load on first use only
+
+Run from the api/ directory:
+    python -m benchmarks.startup                      # measure, check baseline
+    python -m benchmarks.startup --update-baseline    # record a new baseline
+
+Exits with status 1 when an import loads a heavy SDK, or when any case is
+slower than its baseline by more than --threshold (default 25%) and
+--min-delta-s. Baselines are machine-specific: record them on the same
+machine class that runs the check.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Any, Dict, List
+
+from benchmarks._common import add_baseline_arguments, environment, finish
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "startup_baseline.json")
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_CASES = ["app.main", "app.worker"]
+
+# Modules that must not be loaded by importing the service or the worker
+HEAVY_MODULES = [
+    "google.cloud.firestore",
+    "google.auth",
+    "requests",
+    "google.cloud.storage",
+    "joblib",
+    "pandas",
+    "scipy",
+    "sklearn",
+]
+
+HEALTH_TIMEOUT_S = 30.0
+
+_IMPORT_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _env(db_path: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "RISK_ASSER_LOCAL": "1",
+        "RISK_ASSER_LOCAL_DB": db_path,
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    return env
+
+
+def measure_import(module: str, env: Dict[str, str]) -> Dict[str, Any]:
+    """Import `module` in a fresh interpreter: seconds and heavy modules it loaded."""
+    probe = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", probe], cwd=API_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_health(env: Dict[str, str]) -> float:
+    """Seconds from launching uvicorn to the first 200 from /health."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - t0 < HEALTH_TIMEOUT_S:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - t0
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"/health did not answer within {HEALTH_TIMEOUT_S:g}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run_suite(repeats: int) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(os.path.join(tmp, "startup.db"))
+        for module in IMPORT_CASES:
+            samples = [measure_import(module, env) for _ in range(repeats)]
+            heavy = sorted({m for s in samples for m in s["heavy"]})
+            results.append({
+                "case": f"import {module}",
+                "wall_s": min(s["seconds"] for s in samples),
+                "heavy_modules": heavy,
+            })
+        results.append({
+            "case": "first /health",
+            "wall_s": min(measure_first_health(env) for _ in range(repeats)),
+        })
+    for r in results:
+        heavy = r.get("heavy_modules")
+        print(f"{r['case']:<20} {r['wall_s']:>8.3f}s" + (f"  heavy: {', '.join(heavy)}" if heavy else ""))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    add_baseline_arguments(parser, BASELINE_PATH, "startup_results.json", min_delta_s=0.05)
+    args = parser.parse_args()
+
+    results = run_suite(args.repeats)
+    report = {"environment": environment(), "threshold": args.threshold, "results": results}
+
+    # Eager SDK imports fail the check outright, whatever the timings say
+    failures = [
+        f"{r['case']} loads {', '.join(r['heavy_modules'])}"
+        for r in results if r.get("heavy_modules")
+    ]
+    finish(args, report, lambda r: r["case"], failures)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Offline benchmark suite for the simulation, reinsurance and metrics hot paths.
+
+Every (function, n_sims, freq_lambda) case runs in a fresh process, so the
+reported peak RSS belongs to that case alone. Records wall time (best of
+--repeats samples, per call), throughput in simulated years/sec and peak RSS, writes them as
+JSON and compares wall times with a stored baseline.
+
+Run from the api/ directory:
+    python -m benchmarks.suite                      # full grid, check baseline
+    python -m benchmarks.suite --quick              # small grid
+    python -m benchmarks.suite --update-baseline    # record a new baseline
+
+Exits with status 1 when any case is slower than its baseline by more than
+--threshold (default 25%) and --min-delta-s. Baselines are machine-specific: record them on
+the same machine class that runs the check.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks._common import add_baseline_arguments, environment, finish
+
+SIM_SIZES = [10_000, 100_000, 500_000]
+FREQ_LAMBDAS = [0.3, 3.0]
+QUICK_SIM_SIZES = [10_000, 100_000]
+QUICK_FREQ_LAMBDAS = [0.3]
+
+SEV_MU = 10.2
+SEV_SIGMA = 1.1
+CAPITAL = 1_000_000.0
+REINSURANCE = {"type": "xol", "retention": 20_000.0, "limit": 100_000.0}
+SEED = 42
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+CASES = ["simulate_aggregate_loss", "simulate_gross_net", "apply_xol_per_loss", "_metrics_and_hist"]
+
+
+def _prepare(case: str, n_sims: int, freq_lambda: float) -> Callable[[], Any]:
+    """The timed call for one case; inputs it does not own are built here, untimed."""
+    from app.core.metrics import _metrics_and_hist
+    from app.core.reinsurance import apply_xol_per_loss
+    from app.core.simulate import simulate_aggregate_loss, simulate_gross_net
+
+    if case == "simulate_aggregate_loss":
+        return lambda: simulate_aggregate_loss(n_sims, freq_lambda, SEV_MU, SEV_SIGMA, CAPITAL, seed=SEED)
+    if case == "simulate_gross_net":
+        return lambda: simulate_gross_net(
+            n_sims, freq_lambda, SEV_MU, SEV_SIGMA, CAPITAL, reinsurance=REINSURANCE, seed=SEED
+        )
+
+    rng = np.random.default_rng(SEED)
+    N = rng.poisson(lam=freq_lambda, size=n_sims)
+    sev = rng.lognormal(mean=SEV_MU, sigma=SEV_SIGMA, size=int(N.sum()))
+    if case == "apply_xol_per_loss":
+        return lambda: apply_xol_per_loss(sev, REINSURANCE["retention"], REINSURANCE["limit"])
+    if case == "_metrics_and_hist":
+        from app.core.simulate import aggregate_claims
+
+        (S,) = aggregate_claims(N, sev)
+        return lambda: _metrics_and_hist(S, CAPITAL)
+    raise ValueError(f"Unknown case: {case}")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+# Each timing sample repeats a call until at least this long, so sub-millisecond
+# cases are not dominated by timer and scheduler noise
+MIN_SAMPLE_S = 0.05
+
+
+def _run_case(args: Tuple[str, int, float, int]) -> Dict[str, Any]:
+    case, n_sims, freq_lambda, repeats = args
+    fn = _prepare(case, n_sims, freq_lambda)
+    rss_before = _peak_rss_mb()
+
+    t0 = time.perf_counter()
+    fn()  # warm-up, also sizes the samples
+    calls = max(1, int(MIN_SAMPLE_S / max(time.perf_counter() - t0, 1e-9)))
+
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / calls)
+
+    peak = _peak_rss_mb()
+    return {
+        "case": case,
+        "n_sims": n_sims,
+        "freq_lambda": freq_lambda,
+        "wall_s": best,
+        "years_per_s": n_sims / best if best > 0 else float("inf"),
+        "peak_rss_mb": round(peak, 1),
+        "rss_growth_mb": round(peak - rss_before, 1),
+    }
+
+
+def case_id(result: Dict[str, Any]) -> str:
+    return f"{result['case']}/n={result['n_sims']}/lam={result['freq_lambda']:g}"
+
+
+def run_suite(sim_sizes: List[int], freq_lambdas: List[float], repeats: int) -> List[Dict[str, Any]]:
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for case in CASES:
+        for freq_lambda in freq_lambdas:
+            for n_sims in sim_sizes:
+                # A fresh process per case keeps peak RSS attributable
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    result = pool.submit(_run_case, (case, n_sims, freq_lambda, repeats)).result()
+                results.append(result)
+                print(
+                    f"{case_id(result):<45} {result['wall_s']:>9.4f}s "
+                    f"{result['years_per_s']:>14,.0f} yr/s {result['peak_rss_mb']:>8.1f} MB"
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="small grid for a fast check")
+    parser.add_argument("--repeats", type=int, default=5)
+    add_baseline_arguments(parser, BASELINE_PATH, "benchmark_results.json", min_delta_s=0.0002)
+    args = parser.parse_args()
+
+    sizes, lambdas = (QUICK_SIM_SIZES, QUICK_FREQ_LAMBDAS) if args.quick else (SIM_SIZES, FREQ_LAMBDAS)
+    results = run_suite(sizes, lambdas, args.repeats)
+    report = {"environment": environment(numpy=np.__version__), "threshold": args.threshold, "results": results}
+    finish(args, report, case_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import subprocess
+import json
 import time, requests
 
 #service_url = "https://risk-lab-api-lkqbrgzs6a-uc.a.run.app"
@@ -87,6 +88,23 @@ def poll_until_done(run_id, timeout=300, interval=2):
         time.sleep(interval)
     raise TimeoutError("Timed out waiting for run to finish")
 
+def stream_until_done(run_id, timeout=300):
+    """Follow /runs/{run_id}/events (SSE) instead of polling, then fetch the run once."""
+    url = f"{API_URL}/runs/{run_id}/events"
+    with requests.get(url, stream=True, timeout=(10, timeout)) as r:
+        r.raise_for_status()
+        for line in r.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: "):])
+            progress = event.get("progress") or {}
+            print("status =", event.get("status"), "progress =", progress.get("fraction"))
+            if event.get("status") in ("done", "failed"):
+                break
+    r = requests.get(f"{API_URL}/runs/{run_id}", timeout=10)
+    r.raise_for_status()
+    return r.json()
+
 def check_run_completion(run_id):
     url = f"{API_URL}/runs/{run_id}"
     try:
@@ -108,7 +126,7 @@ if __name__ == "__main__":
         print(f"Run ID: {run_id}")
         check_poll = input("Would you like to poll for completion? (y/n): ")
         if check_poll.lower() == 'y' and run_id:
-            final = poll_until_done(run_id, timeout=600)
+            final = stream_until_done(run_id, timeout=600)
             check_completion = input("Would you like tyo check run completion details? (y/n): ")
             if check_completion.lower() == 'y':
                 check_run_completion(run_id)
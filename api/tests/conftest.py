@@ -0,0 +1,22 @@
+import pytest
+
+from app.services.artifact_store import get_blob_store
+from app.services.clients import get_client_pool
+from app.services.result_cache import get_result_cache
+
+
+@pytest.fixture
+def local_db(monkeypatch, tmp_path):
+    """The app on a fresh SQLite store, disk result cache and blob store under tmp_path."""
+    monkeypatch.setenv("RISK_ASSER_LOCAL", "1")
+    monkeypatch.setenv("RISK_ASSER_LOCAL_DB", str(tmp_path / "local.db"))
+    monkeypatch.setenv("RESULT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("RUN_ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.delenv("RESULT_CACHE_BACKEND", raising=False)
+    monkeypatch.delenv("RUN_ARTIFACT_BACKEND", raising=False)
+    for cached in (get_client_pool, get_result_cache, get_blob_store):
+        cached.cache_clear()
+    yield get_client_pool().db()
+    get_client_pool().close()
+    for cached in (get_client_pool, get_result_cache, get_blob_store):
+        cached.cache_clear()
@@ -0,0 +1,30 @@
+import pytest
+
+from app.services.result_cache import is_cacheable
+from app.worker import run_simulation
+
+
+def test_time_budgeted_adaptive_runs_are_not_cacheable():
+    assert is_cacheable({"config": {"adaptive": {"tolerance": 0.01, "max_sims": 10**6}}})
+    assert not is_cacheable({"config": {"adaptive": {"max_seconds": 30}}})
+
+
+@pytest.mark.parametrize("config", [
+    {"sampling": "antithetic"},
+    {"reinsurance_batch": [None]},
+    {"backend": "process"},
+    {"dtype": "float32"},
+    {"tail_mode": "sketch"},
+    {"chunk_size": 1_000},
+])
+def test_adaptive_rejects_options_it_cannot_honour(config):
+    request = {"n_sims": 20_000, "capital": 1e6, "config": {"adaptive": {"tolerance": 0.05}, **config}}
+    with pytest.raises(ValueError):
+        run_simulation(request)
+
+
+def test_adaptive_run_stops_within_budget():
+    request = {"n_sims": 40_000, "capital": 1e6, "config": {"adaptive": {"tolerance": 0.5, "batch_size": 5_000}}}
+    convergence = run_simulation(request)["convergence"]
+    assert convergence["converged"]
+    assert convergence["n_sims"] < 40_000 and convergence["n_sims"] % 5_000 == 0
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from app.core.simulate import aggregate_claims
+
+
+def _loop_sums(counts: np.ndarray, sev: np.ndarray) -> np.ndarray:
+    # The per-year loop aggregate_claims replaced: numpy's (pairwise) sum per slice
+    offsets = np.cumsum(counts) - counts
+    return np.array([sev[o : o + n].sum() for o, n in zip(offsets, counts)])
+
+
+@pytest.mark.parametrize("freq_lambda", [0.3, 3.0, 200.0])
+def test_aggregate_claims_bit_identical_to_loop(freq_lambda):
+    # Large lambdas give segments long enough for numpy's pairwise blocking
+    rng = np.random.default_rng(7)
+    counts = rng.poisson(freq_lambda, size=2_000)
+    sev = rng.lognormal(10.0, 2.0, size=int(counts.sum()))
+
+    (S,) = aggregate_claims(counts, sev)
+    np.testing.assert_array_equal(S, _loop_sums(counts, sev))
+
+
+def test_aggregate_claims_several_arrays_and_empty_years():
+    counts = np.array([0, 3, 0, 0, 1, 2])
+    gross = np.arange(1.0, 7.0)
+    net = gross / 2
+    S_gross, S_net = aggregate_claims(counts, gross, net)
+    np.testing.assert_array_equal(S_gross, [0.0, 6.0, 0.0, 0.0, 4.0, 11.0])
+    np.testing.assert_array_equal(S_net, S_gross / 2)
@@ -0,0 +1,25 @@
+from app.core.simulate import simulate_gross_net
+from app.services.artifact_store import LocalBlobStore, read_run_artifact, write_run_artifact
+
+
+def test_run_artifact_round_trip(tmp_path):
+    results = simulate_gross_net(
+        n_sims=5_000, freq_lambda=1.0, sev_mu=10.0, sev_sigma=1.0, capital=200_000.0, seed=4,
+        reinsurance={"type": "xol", "retention": 20_000.0, "limit": 100_000.0},
+        quantiles=[0.9, 0.95, 0.99, 0.995, 0.999, 0.9995, 0.9999, 0.99999],
+        capital_levels=[1e5, 2e5, 3e5, 4e5, 5e5, 6e5, 7e5, 8e5],
+    )
+    results["config"] = {"hist_edges": [0, 1, 2, 3, 4, 5, 6, 7, 8], "quantiles": [0.9] * 8}
+    store = LocalBlobStore(str(tmp_path))
+
+    summary = write_run_artifact(store, "run1", results)
+    assert summary["artifact"]["arrays"] == [
+        "gross/histogram/bins", "gross/histogram/counts", "net/histogram/bins", "net/histogram/counts",
+    ]
+    # Config echoes stay inline, ints as ints
+    assert summary["config"] == results["config"]
+    assert "histogram" in summary["gross"] and "counts" not in summary["gross"]["histogram"]
+
+    restored = read_run_artifact(store, summary)
+    assert restored == results
+    assert all(type(c) is int for c in restored["gross"]["histogram"]["counts"])
@@ -0,0 +1,44 @@
+import pytest
+
+from app.core.parallel import simulate_gross_net_batch_parallel, simulate_gross_net_parallel
+from app.core.simulate import simulate_gross_net, simulate_gross_net_batch
+
+PARAMS = dict(n_sims=20_000, freq_lambda=1.5, sev_mu=10.0, sev_sigma=1.2, capital=300_000.0, seed=9)
+TREATIES = [
+    None,
+    {"type": "xol", "retention": 20_000.0, "limit": 100_000.0},
+    {
+        "type": "program",
+        "treaties": [
+            {"type": "quota_share", "cession": 0.4},
+            {"type": "xol", "retention": 50_000.0, "limit": 200_000.0},
+        ],
+        "aggregate_deductible": 10_000.0,
+    },
+]
+
+
+def _check_treaties(batch, single):
+    for i, treaty in enumerate(TREATIES):
+        one = single(treaty)
+        assert batch["treaties"][i]["net"] == one["net"]
+        assert batch["treaties"][i]["reinsurance"] == one["reinsurance"]
+        assert batch["gross"] == one["gross"]
+
+
+def test_serial_batch_matches_single_runs():
+    batch = simulate_gross_net_batch(treaties=TREATIES, chunk_size=3_000, **PARAMS)
+    _check_treaties(batch, lambda treaty: simulate_gross_net(reinsurance=treaty, **PARAMS))
+
+
+def test_process_batch_matches_single_runs():
+    shards = dict(workers=2, shard_size=6_000)
+    batch = simulate_gross_net_batch_parallel(treaties=TREATIES, **shards, **PARAMS)
+    _check_treaties(
+        batch, lambda treaty: simulate_gross_net_parallel(reinsurance=treaty, **shards, **PARAMS)
+    )
+
+
+def test_batch_needs_a_treaty():
+    with pytest.raises(ValueError):
+        simulate_gross_net_batch(treaties=[], **PARAMS)
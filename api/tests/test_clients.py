@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import google.auth
+
+from app.services.clients import TOKEN_REFRESH_MARGIN_S, ClientPool
+
+
+class _FakeCredentials:
+    """google-auth style credentials: token and naive-UTC expiry set by refresh()."""
+
+    def __init__(self):
+        self.token = None
+        self.expiry = None
+        self.lifetime = timedelta(hours=1)
+        self.refreshes = 0
+
+    def refresh(self, request):
+        self.refreshes += 1
+        self.token = f"token-{self.refreshes}"
+        self.expiry = datetime.utcnow() + self.lifetime
+
+
+def test_access_token_is_refreshed_only_near_expiry(monkeypatch):
+    creds = _FakeCredentials()
+    monkeypatch.setattr(google.auth, "default", lambda scopes=None: (creds, "project"))
+    pool = ClientPool()
+    try:
+        assert pool.access_token() == "token-1"
+        assert pool.access_token() == "token-1"
+        assert creds.refreshes == 1
+
+        # Inside the refresh margin the next caller gets a new token
+        creds.expiry = datetime.utcnow() + timedelta(seconds=TOKEN_REFRESH_MARGIN_S / 2)
+        assert pool.access_token() == "token-2"
+        assert pool.access_token() == "token-2"
+
+        stats = pool.stats()["credentials"]
+        assert stats["token_requests"] == 4
+        assert stats["refreshes"] == creds.refreshes == 2
+        assert stats["expires_in_s"] > TOKEN_REFRESH_MARGIN_S
+    finally:
+        pool.close()
+
+
+def test_session_and_db_are_shared(monkeypatch, tmp_path):
+    monkeypatch.setenv("RISK_ASSER_LOCAL", "1")
+    monkeypatch.setenv("RISK_ASSER_LOCAL_DB", str(tmp_path / "local.db"))
+    pool = ClientPool()
+    try:
+        assert pool.session() is pool.session()
+        assert pool.db() is pool.db()
+        assert pool.stats()["db"] == {"open": True, "requests": 2}
+    finally:
+        pool.close()
+    assert not pool.stats()["db"]["open"]
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.startup import API_DIR, HEAVY_MODULES
+
+_PROBE = """
+import json, sys
+{body}
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+
+def _heavy_after(body: str, tmp_path) -> list:
+    # A fresh interpreter: this test process has long since imported everything
+    env = {**os.environ, "RISK_ASSER_LOCAL": "1", "RISK_ASSER_LOCAL_DB": str(tmp_path / "local.db")}
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(body=body, heavy=HEAVY_MODULES)],
+        cwd=API_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", ["app.main", "app.worker"])
+def test_importing_does_not_load_heavy_sdks(module, tmp_path):
+    assert _heavy_after(f"import {module}", tmp_path) == []
+
+
+def test_serving_from_the_local_store_does_not_load_heavy_sdks(tmp_path):
+    body = """
+import os
+os.environ["STARTUP_WARMUP"] = "off"
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as c:
+    assert c.get("/health").status_code == 200
+    assert c.get("/runs", params={"status": "done"}).status_code == 200
+"""
+    assert _heavy_after(body, tmp_path) == []
@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.firestore import runs_collection
+
+
+@pytest.fixture
+def client(local_db, monkeypatch):
+    monkeypatch.setenv("STARTUP_WARMUP", "off")
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+def _seed_runs(db, n: int = 23) -> None:
+    col = runs_collection(db)
+    for i in range(n):
+        # Groups of three share a created_at, so pages must tiebreak on id
+        col.document(f"run{i:02d}").set({
+            "status": "done" if i % 2 else "failed",
+            "created_at": f"2026-01-01T00:00:{i // 3:02d}+00:00",
+            "request": {"n_sims": 1000, "capital": 1.0, "config": {}},
+            "results": {"gross": {"metrics": {"VaR99": float(i)}}, "big": list(range(10))},
+        })
+
+
+def test_keyset_pages_cover_every_run_once(client, local_db):
+    _seed_runs(local_db)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/runs", params=params).json()
+        seen += [r["run_id"] for r in body["runs"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 23
+    # Newest first, then by id (descending) within equal created_at
+    assert seen == sorted(seen, key=lambda rid: (int(rid[3:]) // 3, rid), reverse=True)
+
+
+def test_filters_and_projection(client, local_db):
+    _seed_runs(local_db)
+    body = client.get("/runs", params=[("status", "done"), ("limit", 50)]).json()
+    assert len(body["runs"]) == 11
+    assert {r["status"] for r in body["runs"]} == {"done"}
+    assert "big" not in body["runs"][0]["results"]
+
+    body = client.get("/runs", params={"created_before": "2026-01-01T00:00:01+00:00"}).json()
+    assert sorted(r["run_id"] for r in body["runs"]) == ["run00", "run01", "run02"]
+
+    assert client.get("/runs", params={"cursor": "missing"}).status_code == 400
@@ -0,0 +1,58 @@
+import multiprocessing
+
+import pytest
+
+from app.services.local_store import LocalClient
+
+WRITERS = 4
+WRITES = 50
+
+
+def _write_fields(path: str, writer: int) -> None:
+    doc = LocalClient(path).collection("runs").document("shared")
+    for j in range(WRITES):
+        doc.update({f"fields.w{writer}_{j}": j})
+
+
+def test_concurrent_process_updates_are_not_lost(tmp_path):
+    path = str(tmp_path / "store.db")
+    LocalClient(path).collection("runs").document("shared").set({"fields": {}})
+
+    # Every update is a read-modify-write of the whole document; without
+    # IMMEDIATE transactions concurrent writers would drop each other's fields
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_write_fields, args=(path, i)) for i in range(WRITERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+
+    fields = LocalClient(path).collection("runs").document("shared").get().to_dict()["fields"]
+    assert len(fields) == WRITERS * WRITES
+
+
+def test_update_semantics(tmp_path):
+    doc = LocalClient(str(tmp_path / "store.db")).collection("runs").document("r")
+    with pytest.raises(KeyError):
+        doc.update({"status": "running"})
+
+    doc.set({"status": "queued", "shards": {"task_0": {"status": "done"}}})
+    doc.update({"shards.task_1": {"status": "running"}, "shards.task_0.partial_key": "k"})
+    assert doc.get().to_dict()["shards"] == {
+        "task_0": {"status": "done", "partial_key": "k"},
+        "task_1": {"status": "running"},
+    }
+    doc.set({"error": None}, merge=True)
+    assert doc.get().get("status") == "queued"
+
+
+def test_queries_filter_order_and_project(tmp_path):
+    col = LocalClient(str(tmp_path / "store.db")).collection("runs")
+    for i, status in enumerate(["done", "failed", "done", "queued"]):
+        col.document(f"r{i}").set({"status": status, "created_at": f"2026-01-0{i + 1}", "results": {"n": i}})
+
+    query = col.where("status", "in", ["done", "queued"]).order_by("created_at", "DESCENDING")
+    snaps = list(query.select(["status"]).stream())
+    assert [s.id for s in snaps] == ["r3", "r2", "r0"]
+    assert snaps[0].to_dict() == {"status": "queued"}
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.metrics import _metrics_and_hist, query_sorted_losses
+from app.core.simulate import simulate_gross_net
+from app.services.artifact_store import get_blob_store, write_loss_vectors
+from app.services.firestore import runs_collection
+
+PARAMS = dict(n_sims=20_000, freq_lambda=1.2, sev_mu=10.0, sev_sigma=1.1, capital=250_000.0, seed=4)
+REINSURANCE = {"type": "xol", "retention": 20_000.0, "limit": 100_000.0}
+# 0.99 is reported by the run itself; 0.975 and 0.999 only exist as queries
+LEVELS = [0.975, 0.99, 0.999]
+CAPITALS = [100_000.0, 250_000.0, 400_000.0]
+
+
+def _simulate():
+    sink = {}
+    out = simulate_gross_net(reinsurance=REINSURANCE, loss_sink=sink, **PARAMS)
+    return out, sink
+
+
+def _expected(S_sorted: np.ndarray) -> dict:
+    return _metrics_and_hist(
+        S_sorted, CAPITALS[0], bins=1, quantiles=LEVELS, capital_levels=CAPITALS[1:]
+    )["metrics"]
+
+
+def test_prefix_sum_queries_match_a_full_recompute():
+    out, sink = _simulate()
+    for key in ("gross", "net"):
+        S_sorted = sink[key]
+        prefix = np.concatenate([[0.0], np.cumsum(S_sorted)])
+        answer = query_sorted_losses(S_sorted, prefix, LEVELS, CAPITALS)
+        expected = _expected(S_sorted)
+
+        assert answer["n_sims"] == PARAMS["n_sims"]
+        assert answer["VaR99"] == out[key]["metrics"]["VaR99"]
+        for q in LEVELS:
+            label = f"{q * 100:g}"
+            assert answer[f"VaR{label}"] == expected[f"VaR{label}"]
+            assert answer[f"TVaR{label}"] == pytest.approx(expected[f"TVaR{label}"], rel=1e-12)
+        assert answer["ruinProbs"] == expected["ruinProbs"]
+
+
+@pytest.fixture
+def client(local_db, monkeypatch):
+    monkeypatch.setenv("STARTUP_WARMUP", "off")
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+def test_metrics_route_answers_from_persisted_losses(client, local_db):
+    _, sink = _simulate()
+    losses = write_loss_vectors(get_blob_store(), "run1", sink)
+    runs_collection(local_db).document("run1").set({
+        "run_id": "run1", "status": "done", "results": {"losses": losses},
+    })
+
+    params = [("q", q) for q in LEVELS] + [("capital", c) for c in CAPITALS] + [("series", "net")]
+    body = client.get("/runs/run1/metrics", params=params).json()
+    assert set(body) == {"run_id", "net"}
+    expected = _expected(sink["net"])
+    for q in LEVELS:
+        label = f"{q * 100:g}"
+        assert body["net"][f"VaR{label}"] == expected[f"VaR{label}"]
+        assert body["net"][f"TVaR{label}"] == pytest.approx(expected[f"TVaR{label}"], rel=1e-12)
+    assert body["net"]["ruinProbs"] == expected["ruinProbs"]
+
+    assert client.get("/runs/run1/metrics", params={"q": 1.5}).status_code == 422
+    assert client.get("/runs/run1/metrics", params={"series": "treaties/0/net"}).status_code == 404
+    assert client.get("/runs/missing/metrics").status_code == 404
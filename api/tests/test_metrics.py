@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from app.core.metrics import _metrics_and_hist, _sorted_quantile, _tail_metrics, tail_size
+
+QUANTILES = (0.9, 0.95, 0.99, 0.995)
+
+
+def _losses(n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    S = rng.lognormal(10.0, 1.3, size=n)
+    # Years without claims and ties, as in real annual losses
+    S[rng.random(n) < 0.3] = 0.0
+    S[: n // 10] = S[-1]
+    return S
+
+
+@pytest.mark.parametrize("n", [1, 2, 101, 10_000])
+def test_sorted_quantile_matches_np_quantile(n):
+    S = _losses(n)
+    S_sorted = np.sort(S)
+    for q in (0.01, 0.5, *QUANTILES, 0.9999):
+        assert _sorted_quantile(S_sorted, n, q) == np.quantile(S, q)
+        # Only the largest values are needed
+        tail = S_sorted[n - tail_size(n, [q]):]
+        assert _sorted_quantile(tail, n, q) == np.quantile(S, q)
+
+
+def test_sorted_quantile_rejects_a_short_tail():
+    S_sorted = np.sort(_losses(1_000))
+    with pytest.raises(ValueError):
+        _sorted_quantile(S_sorted[-5:], 1_000, 0.99)
+
+
+def test_tail_metrics_match_reference():
+    S = _losses(50_000)
+    S_sorted = np.sort(S)
+    out = _tail_metrics(S_sorted, S.size, QUANTILES)
+    for q in QUANTILES:
+        label = f"{q * 100:g}"
+        var = np.quantile(S, q)
+        assert out[f"VaR{label}"] == var
+        np.testing.assert_array_max_ulp(out[f"TVaR{label}"], S_sorted[S_sorted >= var].mean(), maxulp=1)
+
+
+def test_metrics_and_hist_match_numpy():
+    S = _losses(40_000)
+    capital = float(np.quantile(S, 0.98))
+    extra = [0.5 * capital, 2.0 * capital]
+    out = _metrics_and_hist(S, capital, bins=60, quantiles=QUANTILES, capital_levels=extra)
+    metrics, hist = out["metrics"], out["histogram"]
+
+    counts, edges = np.histogram(S, bins=60)
+    assert hist["counts"] == counts.tolist()
+    assert hist["bins"] == edges.tolist()
+
+    assert metrics["mean"] == S.mean()
+    for q in QUANTILES:
+        assert metrics[f"VaR{q * 100:g}"] == np.quantile(S, q)
+        assert f"TVaR{q * 100:g}" in metrics
+
+    assert metrics["ruinProb"] == np.mean(S > capital)
+    assert metrics["ruinProbs"] == [
+        {"capital": c, "prob": float(np.mean(S > c))} for c in [capital, *extra]
+    ]
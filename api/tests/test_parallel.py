@@ -0,0 +1,95 @@
+import pytest
+
+from app.core.parallel import (
+    reduce_tasks,
+    simulate_gross_net_batch_parallel,
+    simulate_gross_net_parallel,
+    simulate_task,
+)
+
+PARAMS = dict(n_sims=30_000, freq_lambda=1.5, sev_mu=10.0, sev_sigma=1.2, capital=300_000.0, seed=5)
+REINSURANCE = {"type": "xol", "retention": 20_000.0, "limit": 100_000.0}
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_results_do_not_depend_on_worker_count(workers):
+    serial = simulate_gross_net_parallel(reinsurance=REINSURANCE, workers=1, shard_size=7_000, **PARAMS)
+    pooled = simulate_gross_net_parallel(reinsurance=REINSURANCE, workers=workers, shard_size=7_000, **PARAMS)
+    assert pooled == serial
+
+
+def test_results_do_not_depend_on_chunk_size_within_shards():
+    whole = simulate_gross_net_parallel(workers=1, shard_size=7_000, **PARAMS)
+    chunked = simulate_gross_net_parallel(workers=1, shard_size=7_000, chunk_size=1_000, **PARAMS)
+    assert chunked == whole
+
+
+@pytest.mark.parametrize("batch", [False, True])
+@pytest.mark.parametrize("task_count", [1, 3, 7])
+def test_reduce_of_task_partials_equals_single_process(task_count, batch):
+    treaties = [REINSURANCE, {"type": "xol", "retention": 50_000.0, "limit": 200_000.0}]
+    if not batch:
+        treaties = treaties[:1]
+    seed = PARAMS["seed"]
+    args = tuple(PARAMS[k] for k in ("n_sims", "freq_lambda", "sev_mu", "sev_sigma", "capital"))
+
+    partials = [
+        simulate_task(*args, treaties, i, task_count, seed=seed, workers=1, shard_size=4_000)
+        for i in range(task_count)
+    ]
+    reduced = reduce_tasks(partials, *args, treaties, batch=batch, seed=seed)
+
+    if batch:
+        single = simulate_gross_net_batch_parallel(*args, treaties, seed=seed, workers=1, shard_size=4_000)
+    else:
+        single = simulate_gross_net_parallel(*args, treaties[0], seed=seed, workers=1, shard_size=4_000)
+    assert reduced == single
+
+
+def test_sharded_run_status_is_not_revived_by_a_late_task(local_db):
+    from app.services.firestore import runs_collection
+    from app.worker import execute_task
+
+    doc = {
+        "run_id": "r", "status": "queued",
+        "request": {"n_sims": 12_000, "capital": 1e6, "config": {"shards": 3, "seed": 3}},
+    }
+    ref = runs_collection(local_db).document("r")
+    ref.set(doc)
+
+    execute_task(local_db, "r", doc, 0, 3)
+    assert ref.get().get("status") == "running"
+
+    # A sibling failed: a task starting later records itself but leaves the run failed
+    ref.update({"status": "failed", "error": "Task 1: boom"})
+    execute_task(local_db, "r", doc, 2, 3)
+    assert ref.get().get("status") == "failed"
+    assert ref.get().get("shards.task_2.status") == "done"
+
+    # The retried task completes the set and the reduce finishes the run
+    execute_task(local_db, "r", doc, 1, 3)
+    assert ref.get().get("status") == "done"
+    execute_task(local_db, "r", doc, 1, 3)
+    assert ref.get().get("status") == "done"
+
+
+def test_float32_check_runs_once_per_sharded_run(local_db, monkeypatch):
+    import app.core.parallel as parallel
+    from app.services.firestore import runs_collection
+    from app.worker import execute_task, run_precision
+
+    calls = []
+    select_dtype = parallel.select_dtype
+    monkeypatch.setattr(parallel, "select_dtype", lambda *a: calls.append(a) or select_dtype(*a))
+
+    request = {"n_sims": 12_000, "capital": 1e6, "config": {"shards": 3, "seed": 3, "dtype": "float32"}}
+    doc = {"run_id": "r", "status": "queued", "request": request, "precision": run_precision(request)}
+    ref = runs_collection(local_db).document("r")
+    ref.set(doc)
+    for i in range(3):
+        execute_task(local_db, "r", doc, i, 3)
+
+    assert len(calls) == 1
+    assert ref.get().get("status") == "done"
+    assert ref.get().get("results")["precision"] == doc["precision"]
+    assert doc["precision"]["requested"] == "float32"
@@ -0,0 +1,57 @@
+import pytest
+
+from app.core.portfolio import simulate_portfolio
+
+LINES = [
+    {"name": "property", "freq_lambda": 1.5, "sev_mu": 10.0, "sev_sigma": 1.2,
+     "reinsurance": {"type": "xol", "retention": 20_000.0, "limit": 100_000.0}},
+    {"name": "motor", "freq_lambda": 4.0, "sev_mu": 9.0, "sev_sigma": 0.8},
+    {"name": "liability", "freq_lambda": 0.4, "sev_mu": 11.0, "sev_sigma": 1.5},
+]
+PARAMS = dict(n_sims=20_000, lines=LINES, capital=500_000.0, seed=21)
+
+
+@pytest.mark.parametrize("copula", ["gaussian", "t"])
+def test_euler_contributions_add_up(copula):
+    out = simulate_portfolio(correlation=0.5, copula=copula, **PARAMS)
+    for key in ("gross", "net"):
+        metrics = out["portfolio"][key]["metrics"]
+        for m in ("VaR99", "TVaR99", "VaR95", "TVaR95"):
+            total = sum(line["contributions"][key][m] for line in out["lines"])
+            assert total == pytest.approx(metrics[m], rel=1e-9)
+
+
+def test_zero_correlation_is_independent_lines():
+    independent = simulate_portfolio(correlation=None, **PARAMS)
+    assert simulate_portfolio(correlation=0.0, **PARAMS) == independent
+
+    # Dependence between the lines eats into the diversification benefit
+    dependent = simulate_portfolio(correlation=0.9, **PARAMS)
+    for key in ("gross", "net"):
+        benefit = independent["portfolio"]["diversification_benefit"][key]["VaR99"]
+        assert 0 < dependent["portfolio"]["diversification_benefit"][key]["VaR99"] < benefit
+
+
+@pytest.mark.parametrize("copula", ["gaussian", "t"])
+def test_results_do_not_depend_on_chunk_size(copula):
+    whole = simulate_portfolio(correlation=0.3, copula=copula, chunk_size=PARAMS["n_sims"], **PARAMS)
+    chunked = simulate_portfolio(correlation=0.3, copula=copula, chunk_size=7_000, **PARAMS)
+    assert chunked == whole
+
+
+def test_invalid_correlation_is_rejected():
+    not_psd = [[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]]
+    with pytest.raises(ValueError, match="positive definite"):
+        simulate_portfolio(correlation=not_psd, **PARAMS)
+    with pytest.raises(ValueError):
+        simulate_portfolio(correlation=[[1.0, 0.2], [0.2, 1.0]], **PARAMS)
+    with pytest.raises(ValueError):
+        simulate_portfolio(correlation=[[1.0, 0.2, 0.0], [0.3, 1.0, 0.0], [0.0, 0.0, 1.0]], **PARAMS)
+
+
+def test_portfolio_runs_reject_reduced_precision():
+    from app.worker import run_simulation
+
+    config = {"portfolio": {"lines": LINES}, "dtype": "float32"}
+    with pytest.raises(ValueError, match="float64"):
+        run_simulation({"n_sims": 1_000, "capital": 1e6, "config": config})
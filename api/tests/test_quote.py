@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from google.cloud import storage
+from joblib import dump
+from sklearn.linear_model import LinearRegression
+
+from app.services import model_store
+from app.services.model_store import FEATURES, MODEL_FILES, GCSArtifactSource
+
+ROWS = [
+    {"freq_lambda": 0.3, "sev_mu": 10.0, "sev_sigma": 1.0, "retention": 0.0, "limit": 0.0},
+    {"freq_lambda": 0.5, "sev_mu": 10.4, "sev_sigma": 0.8, "retention": 20_000.0, "limit": 100_000.0},
+]
+
+
+def _train(directory) -> dict:
+    """Two small linear surrogates with different coefficients, saved like the real ones."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((50, len(FEATURES))), columns=FEATURES)
+    models = {}
+    for scale, key in enumerate(MODEL_FILES, start=1):
+        models[key] = LinearRegression().fit(X, X.to_numpy() @ np.arange(1.0, 6.0) * scale)
+        dump(models[key], directory / MODEL_FILES[key])
+    return models
+
+
+@pytest.fixture
+def clear_models():
+    model_store._load_models.cache_clear()
+    yield
+    model_store._load_models.cache_clear()
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path, clear_models):
+    monkeypatch.setenv("STARTUP_WARMUP", "off")
+    monkeypatch.setenv("MODEL_DIR", str(tmp_path))
+    from app.main import app
+
+    models = _train(tmp_path)
+    with TestClient(app) as c:
+        yield c, models
+
+
+def test_quote_predicts_with_both_surrogates(client):
+    c, models = client
+    resp = c.post("/quote", json={"rows": ROWS})
+    assert resp.status_code == 200
+    body = resp.json()
+
+    X = pd.DataFrame.from_records(ROWS, columns=FEATURES)
+    assert [q["gross_VaR99"] for q in body["quotes"]] == pytest.approx(models["gross"].predict(X).tolist())
+    assert [q["net_VaR99"] for q in body["quotes"]] == pytest.approx(models["net"].predict(X).tolist())
+    assert set(body["versions"]) == set(MODEL_FILES)
+
+
+def test_quote_validates_rows(client):
+    c, _ = client
+    assert c.post("/quote", json={"rows": []}).status_code == 422
+    assert c.post("/quote", json={"rows": [{**ROWS[0], "sev_sigma": 0.0}]}).status_code == 422
+
+
+def test_quote_without_models_is_unavailable(monkeypatch, tmp_path, clear_models):
+    monkeypatch.setenv("STARTUP_WARMUP", "off")
+    monkeypatch.setenv("MODEL_DIR", str(tmp_path / "missing"))
+    from app.main import app
+
+    with TestClient(app) as c:
+        assert c.post("/quote", json={"rows": ROWS}).status_code == 503
+
+
+class _FakeBlob:
+    def __init__(self, objects: dict, name: str):
+        self.objects = objects
+        self.name = name
+
+    def reload(self):
+        self.generation = self.objects[self.name][1]
+        self.etag = f"etag-{self.generation}"
+
+    def download_to_filename(self, path, if_generation_match=None):
+        data, generation = self.objects[self.name]
+        assert generation == if_generation_match
+        with open(path, "wb") as f:
+            f.write(data)
+        _FakeClient.downloads += 1
+
+
+class _FakeClient:
+    objects: dict = {}
+    downloads = 0
+
+    def bucket(self, name):
+        return self
+
+    def blob(self, name):
+        return _FakeBlob(self.objects, name)
+
+
+def test_gcs_source_downloads_only_changed_artifacts(monkeypatch, tmp_path):
+    monkeypatch.setattr(storage, "Client", _FakeClient)
+    _FakeClient.objects = {"models/m.joblib": (b"v1", 1)}
+    _FakeClient.downloads = 0
+    source = GCSArtifactSource("bucket", cache_dir=str(tmp_path))
+
+    first = source.fetch("m.joblib")
+    assert first["downloaded"] and first["version"] == {"generation": 1, "etag": "etag-1"}
+
+    # Same generation: the cached copy is reused (e.g. on the next cold start)
+    again = GCSArtifactSource("bucket", cache_dir=str(tmp_path)).fetch("m.joblib")
+    assert not again["downloaded"]
+    assert _FakeClient.downloads == 1
+
+    _FakeClient.objects["models/m.joblib"] = (b"v2", 2)
+    changed = source.fetch("m.joblib")
+    assert changed["downloaded"] and changed["version"]["generation"] == 2
+    assert _FakeClient.downloads == 2
+    with open(changed["path"], "rb") as f:
+        assert f.read() == b"v2"
@@ -0,0 +1,47 @@
+import pytest
+
+from app.services import result_cache
+from app.services.result_cache import DiskCache, FirestoreCache, get_result_cache, run_cache_key
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch, tmp_path):
+    monkeypatch.delenv("RESULT_CACHE_BACKEND", raising=False)
+    monkeypatch.setenv("RESULT_CACHE_DIR", str(tmp_path / "cache"))
+    get_result_cache.cache_clear()
+    yield
+    get_result_cache.cache_clear()
+
+
+def test_cache_key_ignores_number_spelling_and_defaults():
+    a = run_cache_key({"n_sims": 10000, "capital": 1000000, "config": {}})
+    b = run_cache_key({"n_sims": 1e4, "capital": 1e6, "config": {"note": "x", "workers": 4}})
+    assert a == b
+    assert a != run_cache_key({"n_sims": 10000, "capital": 1000000, "config": {"seed": 1}})
+
+
+def test_default_backend_is_shared_across_processes_in_local_mode(fresh_cache, monkeypatch):
+    monkeypatch.setenv("RISK_ASSER_LOCAL", "1")
+    cache = get_result_cache()
+    assert isinstance(cache, DiskCache)
+
+    # Another process (e.g. a job worker) sees the same entries
+    cache.put("k", {"metrics": {"VaR99": 1.0}})
+    assert DiskCache(cache.directory).get("k") == {"metrics": {"VaR99": 1.0}}
+
+
+def test_default_backend_is_firestore_outside_local_mode(monkeypatch):
+    monkeypatch.delenv("RISK_ASSER_LOCAL", raising=False)
+    assert result_cache._default_backend() == "firestore"
+
+
+
+def test_firestore_cache_keeps_the_newest_max_entries(local_db, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(result_cache.time, "time", lambda: float(next(clock)))
+    cache = FirestoreCache(local_db, max_entries=3)
+    for i in range(5):
+        cache.put(f"k{i}", {"i": i})
+
+    assert [cache.get(f"k{i}") for i in range(5)] == [None, None, {"i": 2}, {"i": 3}, {"i": 4}]
+    assert cache.evictions == 2
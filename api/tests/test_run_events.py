@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.firestore import runs_collection
+from app.services.run_events import RunEventHub
+
+TIMEOUT_S = 5.0
+
+
+async def _next(queue: asyncio.Queue):
+    return await asyncio.wait_for(queue.get(), TIMEOUT_S)
+
+
+def test_hub_pushes_each_status_change_once(local_db):
+    ref = runs_collection(local_db).document("run1")
+    ref.set({"run_id": "run1", "status": "queued", "progress": None})
+
+    async def follow():
+        hub = RunEventHub()
+        queue = hub.subscribe(local_db, "run1")
+        events = [await _next(queue)]
+
+        # Writes to fields clients are not sent produce no events
+        ref.update({"results": {"partial": 1}})
+        ref.update({"status": "running"})
+        events.append(await _next(queue))
+        ref.update({"results": {"partial": 2}})
+        ref.update({"status": "done"})
+        events.append(await _next(queue))
+
+        # A late subscriber gets the latest state right away, on the same listener
+        late = hub.subscribe(local_db, "run1")
+        assert (await _next(late))["status"] == "done"
+        assert hub.stats() == {"watched_runs": 1, "subscribers": 2}
+
+        await asyncio.sleep(0.5)
+        assert queue.empty()
+        hub.unsubscribe("run1", queue)
+        hub.unsubscribe("run1", late)
+        assert hub.stats() == {"watched_runs": 0, "subscribers": 0}
+        return events
+
+    events = asyncio.run(follow())
+    assert [e["status"] for e in events] == ["queued", "running", "done"]
+    assert all(e["run_id"] == "run1" and "results" not in e for e in events)
+
+
+@pytest.fixture
+def client(local_db, monkeypatch):
+    monkeypatch.setenv("STARTUP_WARMUP", "off")
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+def _sse(client, path: str):
+    with client.stream("GET", path) as resp:
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        blocks = resp.read().decode().strip().split("\n\n")
+    return [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+        for block in blocks
+    ]
+
+
+def test_stream_ends_after_a_terminal_status(client, local_db):
+    runs_collection(local_db).document("run1").set({"run_id": "run1", "status": "failed", "error": "boom"})
+    events = _sse(client, "/runs/run1/events")
+    assert events == [("status", {
+        "run_id": "run1", "status": "failed", "progress": None, "error": "boom",
+        "started_at": None, "finished_at": None,
+    })]
+
+
+def test_stream_reports_a_missing_run(client):
+    assert _sse(client, "/runs/missing/events") == [("error", {"detail": "Run not found"})]
@@ -0,0 +1,68 @@
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services import run_executor
+from app.services.firestore import runs_collection
+from app.services.run_executor import InProcessExecutor
+
+
+def _crash(run_id, run_doc):
+    os._exit(1)
+
+
+def _wait_for(predicate, timeout: float = 30.0) -> bool:
+    # Done callbacks run just after result() returns, on the pool's thread
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _queued_run(db, run_id: str):
+    doc = {
+        "run_id": run_id, "status": "queued",
+        "request": {"n_sims": 2_000, "capital": 1e6, "config": {"seed": 1}},
+    }
+    runs_collection(db).document(run_id).set(doc)
+    return doc
+
+
+def test_crashed_child_fails_its_run_and_the_pool_recovers(local_db, monkeypatch):
+    executor = InProcessExecutor(workers=1, max_queue=1, max_work=1e9)
+    execute = run_executor._execute_in_child
+    try:
+        monkeypatch.setattr(run_executor, "_execute_in_child", _crash)
+        assert executor.reserve()
+        with pytest.raises(BrokenProcessPool):
+            executor.submit("a", _queued_run(local_db, "a")).result(timeout=60)
+        monkeypatch.setattr(run_executor, "_execute_in_child", execute)
+
+        assert executor.reserve()
+        executor.submit("b", _queued_run(local_db, "b")).result(timeout=60)
+    finally:
+        executor.shutdown()
+
+    col = runs_collection(local_db)
+    assert _wait_for(lambda: executor.stats()["in_flight"] == 0)
+    assert col.document("a").get().get("status") == "failed"
+    assert col.document("b").get().get("status") == "done"
+    stats = executor.stats()
+    assert (stats["failed"], stats["completed"]) == (1, 1)
+
+
+def test_submit_replaces_a_broken_pool(local_db, monkeypatch):
+    executor = InProcessExecutor(workers=1, max_queue=1, max_work=1e9)
+    try:
+        pool = executor._get_pool()
+        monkeypatch.setattr(pool, "submit", lambda *a, **k: (_ for _ in ()).throw(BrokenProcessPool("x")))
+        assert executor.reserve()
+        executor.submit("c", _queued_run(local_db, "c")).result(timeout=60)
+        assert executor._pool is not pool
+    finally:
+        executor.shutdown()
+    assert runs_collection(local_db).document("c").get().get("status") == "done"
@@ -0,0 +1,89 @@
+import itertools
+
+import numpy as np
+import pytest
+from scipy.stats import poisson
+
+from app.core.metrics import _metrics_and_hist
+from app.core.reinsurance import apply_reinsurance_to_severities
+from app.core.sweep import SWEEP_PARAMS, simulate_sweep, sweep_grid
+
+N_SIMS = 3_000
+CAPITAL = 150_000.0
+SEED = 8
+REINSURANCE = {"type": "xol", "retention": 20_000.0, "limit": 100_000.0}
+GRID = sweep_grid(
+    {"freq_lambda": 1.0, "sev_mu": 10.0, "sev_sigma": 1.0},
+    {"freq_lambda": [0.5, 1.0, 2.0], "sev_mu": [9.5, 10.0, 10.2], "sev_sigma": [0.8, 1.2]},
+)
+
+
+def _standalone(lam: float, mu: float, sigma: float) -> dict:
+    """One point, year by year, from the sweep's common random numbers."""
+    rng = np.random.default_rng(SEED)
+    u = rng.random(N_SIMS)
+    N_max = poisson.ppf(u, GRID["freq_lambda"][-1]).astype(int)
+    z = rng.standard_normal(int(N_max.sum()))
+
+    N = poisson.ppf(u, lam).astype(int)
+    starts = np.cumsum(N_max) - N_max
+    S = {"gross": np.zeros(N_SIMS), "net": np.zeros(N_SIMS)}
+    for year, (start, n) in enumerate(zip(starts, N)):
+        claims = np.exp(mu + sigma * z[start : start + n])
+        S["gross"][year] = claims.sum()
+        S["net"][year] = apply_reinsurance_to_severities(claims, REINSURANCE, out=np.empty(n)).sum()
+    return {
+        key: _metrics_and_hist(losses, CAPITAL, bins=1)["metrics"] for key, losses in S.items()
+    }
+
+
+def test_every_point_matches_a_standalone_run():
+    out = simulate_sweep(N_SIMS, GRID, CAPITAL, reinsurance=REINSURANCE, seed=SEED)
+    points = list(itertools.product(*(GRID[name] for name in SWEEP_PARAMS)))
+    assert [tuple(p[name] for name in SWEEP_PARAMS) for p in out["points"]] == points
+    for point in out["points"]:
+        expected = _standalone(point["freq_lambda"], point["sev_mu"], point["sev_sigma"])
+        assert point["gross"] == expected["gross"]
+        assert point["net"] == expected["net"]
+
+
+def test_sensitivity_signs_on_monotone_axes():
+    out = simulate_sweep(N_SIMS, GRID, CAPITAL, reinsurance=REINSURANCE, seed=SEED)
+    for point in out["points"]:
+        for key in ("gross", "net"):
+            sens = point["sensitivities"][key]
+            # Common random numbers: every year's loss grows with lambda and mu
+            for param in ("freq_lambda", "sev_mu"):
+                assert sens[param]["mean"] > 0
+                assert sens[param]["VaR99"] >= 0
+                assert sens[param]["ruinProb"] >= 0
+
+
+def test_axes_with_one_value_have_no_sensitivity():
+    grid = sweep_grid({"freq_lambda": 1.0, "sev_mu": 10.0, "sev_sigma": 1.0}, {"sev_mu": [9.0, 10.0]})
+    out = simulate_sweep(1_000, grid, CAPITAL, seed=SEED)
+    assert len(out["points"]) == 2
+    assert set(out["points"][0]["sensitivities"]["gross"]) == {"sev_mu"}
+    with pytest.raises(ValueError):
+        sweep_grid({"freq_lambda": 1.0, "sev_mu": 10.0, "sev_sigma": 1.0}, {"capital": [1.0]})
+
+
+def test_sweep_runs_reject_reduced_precision():
+    from app.worker import run_simulation
+
+    config = {"sweep": {"sev_mu": [9.0, 10.0]}, "dtype": "float32"}
+    with pytest.raises(ValueError, match="float64"):
+        run_simulation({"n_sims": 1_000, "capital": 1e6, "config": config})
+
+
+def test_schema_bounds_the_size_of_a_sweep():
+    from pydantic import ValidationError
+
+    from app.models.schemas import MAX_SIMS_PER_TASK, RunCreateRequest
+
+    axes = {"sev_mu": [9.0, 9.5, 10.0, 10.5], "sev_sigma": [0.8, 1.0]}
+    RunCreateRequest(n_sims=MAX_SIMS_PER_TASK // 8, config={"sweep": axes})
+    with pytest.raises(ValidationError, match="grid points x n_sims"):
+        RunCreateRequest(n_sims=MAX_SIMS_PER_TASK // 8 + 1, config={"sweep": axes})
+    with pytest.raises(ValidationError, match="largest freq_lambda"):
+        RunCreateRequest(n_sims=100_000, config={"sweep": {"freq_lambda": [1.0, 500.0]}})
@@ -0,0 +1,76 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.telemetry import Counter, Histogram
+
+# name{label="value",...} value
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[a-zA-Z_]+="[^"]*"(,[a-zA-Z_]+="[^"]*")*\})? (\S+)$')
+
+
+def _parse(text: str):
+    """Samples of a text exposition, checking each family is declared before use."""
+    declared, samples = {}, []
+    for line in text.strip().split("\n"):
+        if line.startswith("# HELP "):
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            declared[name] = kind
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"not a sample line: {line!r}"
+        name, labels, value = match.group(1), match.group(2) or "", float(match.group(4))
+        family = re.sub(r"_(bucket|sum|count)$", "", name) if name not in declared else name
+        assert family in declared, f"{name} has no # TYPE line"
+        samples.append((name, labels, value))
+    return declared, samples
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 2.0):
+        h.observe(v, route="/x")
+    _, samples = _parse(h.render())
+    assert samples == [
+        ("test_seconds_bucket", '{route="/x",le="0.1"}', 2.0),
+        ("test_seconds_bucket", '{route="/x",le="1"}', 3.0),
+        ("test_seconds_bucket", '{route="/x",le="+Inf"}', 4.0),
+        ("test_seconds_sum", '{route="/x"}', 2.65),
+        ("test_seconds_count", '{route="/x"}', 4.0),
+    ]
+
+
+def test_counter_escapes_label_values():
+    c = Counter("test_total", "Test.", ("tier",))
+    c.inc(tier='a"b')
+    c.inc(2, tier='a"b')
+    assert c.render().split("\n")[-1] == 'test_total{tier="a\\"b"} 3'
+
+
+@pytest.fixture
+def client(local_db, monkeypatch):
+    monkeypatch.setenv("STARTUP_WARMUP", "off")
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+def test_metrics_endpoint_serves_prometheus_text(client):
+    client.get("/health")
+    client.get("/runs/some-run-id")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    declared, samples = _parse(resp.text)
+    assert declared["risklab_http_request_duration_seconds"] == "histogram"
+    assert declared["risklab_runs_dispatched_total"] == "counter"
+
+    # Requests are labelled by route template, not by the raw path
+    labels = {l for name, l, _ in samples if name == "risklab_http_request_duration_seconds_count"}
+    assert '{method="GET",route="/health",status="200"}' in labels
+    assert '{method="GET",route="/runs/{run_id}",status="404"}' in labels
+    assert not any("some-run-id" in l for l in labels)
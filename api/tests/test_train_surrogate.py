@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.ml.train_surrogate import (
+    TrainConfig,
+    generate_dataset,
+    run_scenario,
+    sample_scenarios,
+    write_checkpoint_part,
+)
+
+
+def _config(tmp_path, name: str, **overrides) -> TrainConfig:
+    params = dict(n_scenarios=8, n_sims_per_scenario=500, seed=3, workers=2, checkpoint_every=3)
+    return TrainConfig(checkpoint_dir=str(tmp_path / name), **{**params, **overrides})
+
+
+def test_resume_only_simulates_missing_scenarios(tmp_path, capsys):
+    full = generate_dataset(_config(tmp_path, "full"))
+    assert full["scenario"].tolist() == list(range(8))
+
+    # An interrupted run that checkpointed scenarios 0-2 and 5
+    cfg = _config(tmp_path, "resumed")
+    os.makedirs(cfg.checkpoint_dir)
+    scenarios = sample_scenarios(cfg.n_scenarios, cfg.seed).to_dict("records")
+    write_checkpoint_part(cfg, [run_scenario(scenarios[i], cfg.n_sims_per_scenario) for i in (0, 1, 2, 5)])
+    capsys.readouterr()
+
+    resumed = generate_dataset(cfg)
+    assert "4 scenarios restored from checkpoint, 4 to simulate." in capsys.readouterr().out
+    pd.testing.assert_frame_equal(resumed, full)
+
+
+def test_checkpoint_of_another_config_is_rejected(tmp_path):
+    generate_dataset(_config(tmp_path, "ckpt"))
+    with pytest.raises(RuntimeError):
+        generate_dataset(_config(tmp_path, "ckpt", seed=4))